@@ -10,10 +10,24 @@ import datetime
 
 # Singleton Cache (Simple in-memory for demo)
 class DataCache:
-    df = None
     session_df = None
     _service_instance = None
 
+    def __init__(self):
+        self._df = None
+        # Bumped on every assignment of df; results derived from the frame (forecast jobs) are keyed
+        # on it. Code that modifies df in place must bump it as well.
+        self.version = 0
+
+    @property
+    def df(self):
+        return self._df
+
+    @df.setter
+    def df(self, value):
+        self._df = value
+        self.version += 1
+
 data_cache = DataCache()
 
 def get_analytics_service():
@@ -46,7 +46,7 @@ async def startup_event():
     print("Initializing Database Schema...")
     from .database import engine, Base
     from .models.events import EvEvent
-    from .models.outputs import ModelPrediction, Recommendation
+    from .models.outputs import ModelPrediction, Recommendation, BacktestResult, ForecastRun, VideoJob
     from sqlalchemy import text
     from .database import AsyncSessionLocal
     from sqlalchemy import select
@@ -113,30 +113,25 @@ async def startup_event():
             
     if db_connected and not existing_data:
         print("Database empty. Seeding from synthetic CSV...")
-        async with AsyncSessionLocal() as session:
-            if csv_path:
-                df_seed = pd.read_csv(csv_path)
+        if csv_path:
+            from .services.bulk_writer import ev_event_writer
+
+            # COPY in chunks (falls back to batched INSERT if COPY is unavailable)
+            writer = ev_event_writer()
+            for df_seed in pd.read_csv(csv_path, chunksize=100_000):
                 df_seed['timestamp'] = pd.to_datetime(df_seed['timestamp'])
                 if df_seed['timestamp'].dt.tz is None:
                     df_seed['timestamp'] = df_seed['timestamp'].dt.tz_localize('UTC')
-                
-                # Bulk Insert
-                events = df_seed.to_dict(orient='records')
-                chunk_size = 1000
-                for i in range(0, len(events), chunk_size):
-                    chunk = events[i:i+chunk_size]
-                    await session.execute(
-                        text("INSERT INTO ev_events (timestamp, station_id, vehicle_count, session_count, occupancy_rate, queue_length) VALUES (:timestamp, :station_id, :vehicle_count, :session_count, :occupancy_rate, :queue_length)"),
-                        chunk
-                    )
-                    await session.commit()
-                print(f"Seeded {len(events)} records into TimescaleDB.")
-            else:
-                 print("WARNING: Seed file not found.")
+                await writer.write(df_seed)
+            print(f"Seeded {writer.rows} records into TimescaleDB ({writer.stats()['seconds']}s).")
+        else:
+             print("WARNING: Seed file not found.")
 
     # 2.5 Seed Model Predictions and Recommendations (DB Backend)
     if db_connected:
-        from .models.outputs import ModelPrediction, Recommendation
+        from .models.outputs import Recommendation
+        from .services.forecast_store import has_future_run, run_record, save_runs
+        from .services.forecast_cache import forecast_summaries
         from sqlalchemy import select, delete
         import datetime
         import uuid
@@ -145,12 +140,9 @@ async def startup_event():
         async with AsyncSessionLocal() as session:
             # Check if we have recent predictions (future)
             now = datetime.datetime.now()
-            existing_preds = await session.execute(
-                select(ModelPrediction).where(ModelPrediction.timestamp > now).limit(1)
-            )
             
             # Use Shared Engine adapter to generate if needed
-            if not existing_preds.scalar_one_or_none():
+            if not await has_future_run(session):
                  print("No future predictions found. Generating and Seeding from Loaded Models...")
                  
                  # 1. Forecast seeding
@@ -160,33 +152,19 @@ async def startup_event():
                  # data_cache.df handles it
                  if data_cache.df is not None:
                      adapter = SharedForecastEngineAdapter(data_cache.df)
+                     adapter.ensemble.load_or_train(adapter.model_dir)
                      # Generate 7 days
                      res = adapter.ensemble.forecast(hours=24*7) 
                      
                      run_id = f"startup_seed_{int(now.timestamp())}"
                      
-                     objs = []
-                     # Map results to DB objects
-                     # res keys: timestamp (list), ensemble (list), lower, upper
-                     timestamps = res['timestamp']
-                     values = res['ensemble']
-                     lower = res['lower']
-                     upper = res['upper']
-                     
-                     for i, ts in enumerate(timestamps):
-                         objs.append(ModelPrediction(
-                             run_id=run_id,
-                             timestamp=ts,
-                             predicted_value=float(values[i]),
-                             model_type="ensemble_v1",
-                             lower_bound=float(lower[i]),
-                             upper_bound=float(upper[i]),
-                             source_file="loaded_models"
-                         ))
-                     
-                     session.add_all(objs)
+                     # One forecast_runs row holds the whole horizon (ensemble, bounds, members)
+                     record = run_record(res, run_id, model_type="ensemble_v1", source="loaded_models",
+                                         metadata={"model_version": adapter.ensemble.bundle_version})
+                     await save_runs(session, [record])
                      await session.commit()
-                     print(f"Seeded {len(objs)} prediction records (7 days).")
+                     forecast_summaries.update([record])
+                     print(f"Seeded forecast run {run_id} ({record['horizon']} hours).")
                  else:
                      print("Skipping forecast seeding - no input data available.")
 
@@ -260,6 +238,36 @@ async def startup_event():
         data_cache.session_df = simulator.get_charger_level_data()
         print(f"Session Cache Ready: {len(data_cache.session_df)} sessions generated.")
 
+    # 5. Background retention of superseded forecast runs
+    if db_connected:
+        from .services.forecast_store import retention_loop
+        from .services.accuracy_tracker import accuracy_tracker
+        app.state.forecast_retention = asyncio.create_task(retention_loop())
+        # Score stored forecasts against hourly actuals as they arrive
+        app.state.accuracy_tracking = asyncio.create_task(accuracy_tracker.loop())
+        # Append newly ingested ev_events to the data cache
+        from .services.cache_refresher import cache_refresher
+        app.state.cache_refresh = asyncio.create_task(cache_refresher.loop())
+
+    # 6. Video processing queue (re-queues jobs interrupted by a restart)
+    from .services.video_jobs import video_jobs
+    from .services.video_cameras import get_cameras
+    get_cameras()  # an invalid cameras.json stops startup here rather than failing uploads
+    await video_jobs.start(use_db=db_connected)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    from .services.forecast_jobs import forecast_jobs
+    from .services.forecast_batcher import forecast_batcher
+    forecast_jobs.shutdown()
+    forecast_batcher.shutdown()
+    from .services.video_jobs import video_jobs
+    video_jobs.shutdown()
+    for name in ("forecast_retention", "accuracy_tracking", "cache_refresh"):
+        task = getattr(app.state, name, None)
+        if task is not None:
+            task.cancel()
+
 # --- WebSocket ---
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
@@ -384,8 +384,14 @@ except ImportError:
     from models.prediction.demand_prediction_engine import EnsembleForecaster
 
 class SharedForecastEngineAdapter:
-    def __init__(self, raw_df):
+    # Process-wide feature pipeline: adapters built over the same growing raw
+    # frame only pay for the rows appended since the previous construction.
+    _shared_fe = None
+
+    def __init__(self, raw_df, feature_engineer=None, accuracy_provider=None):
         self.raw_df = raw_df
+        # Callable returning the current accuracy string (e.g. live tracker), or None
+        self.accuracy_provider = accuracy_provider
         # We need to construct the feature-engineered DF that EnsembleForecaster expects
         # Or simpler: The EnsembleForecaster expects (df_model, df_full).
         # We will reuse the FeatureEngineer from prediction module too.
@@ -394,8 +400,12 @@ class SharedForecastEngineAdapter:
         except ImportError:
             from models.prediction.demand_prediction_engine import FeatureEngineer
             
-        self.fe = FeatureEngineer()
-        self.df_model, self.df_full, _ = self.fe.process(self.raw_df)
+        if feature_engineer is None:
+            if SharedForecastEngineAdapter._shared_fe is None:
+                SharedForecastEngineAdapter._shared_fe = FeatureEngineer()
+            feature_engineer = SharedForecastEngineAdapter._shared_fe
+        self.fe = feature_engineer
+        self.df_model, self.df_full = self.fe.update(self.raw_df)
         
         self.ensemble = EnsembleForecaster(self.df_model, self.df_full)
         
@@ -434,7 +444,7 @@ class SharedForecastEngineAdapter:
             "lower_bound": res['lower'].tolist(),
             "upper_bound": res['upper'].tolist(),
             "dates": [t.strftime("%Y-%m-%dT%H:%M:%S") for t in res['timestamp']],
-            "accuracy": "92.0%" # placeholder or fetch from somewhere
+            "accuracy": (self.accuracy_provider() if self.accuracy_provider else None) or "N/A"
         }
 
 # --- MAIN AGGREGATOR ---
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, Float, String, DateTime, ForeignKey, JSON, Index
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.sql import func
 from ..database import Base
 
@@ -7,15 +8,40 @@ class ModelPrediction(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     run_id = Column(String, index=True)  # To group predictions from a single execution
+    station_id = Column(String, nullable=True, index=True) # NULL = system-wide forecast
     timestamp = Column(DateTime(timezone=True), index=True) # The future time being predicted
     predicted_value = Column(Float)
     model_type = Column(String) # 'ensemble', 'prophet', (from file or engine)
     lower_bound = Column(Float, nullable=True)
     upper_bound = Column(Float, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     # Adding metadata for file-based tracking
     source_file = Column(String, nullable=True) # e.g. 'forecast_result.json'
 
+class ForecastRun(Base):
+    """One forecast run for one station key: the whole hourly horizon is stored as arrays."""
+    __tablename__ = "forecast_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(String, index=True)  # Shared by all station rows of one execution
+    station_id = Column(String, nullable=True) # NULL = system-wide forecast
+    model_type = Column(String) # 'ensemble', 'ensemble_station', ...
+    start_time = Column(DateTime(timezone=True)) # First forecast hour
+    end_time = Column(DateTime(timezone=True), index=True) # Last forecast hour
+    horizon = Column(Integer) # Number of hourly steps
+    ensemble = Column(ARRAY(Float))
+    lower = Column(ARRAY(Float))
+    upper = Column(ARRAY(Float))
+    prophet = Column(ARRAY(Float), nullable=True)
+    lstm = Column(ARRAY(Float), nullable=True)
+    xgboost = Column(ARRAY(Float), nullable=True)
+    source = Column(String, nullable=True) # 'startup_seed', 'forecast_job', ...
+    run_metadata = Column("metadata", JSON, nullable=True) # model version, data version, ...
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+    # Latest run per station key is a single index probe
+    __table_args__ = (Index("ix_forecast_runs_station_created", "station_id", "created_at"),)
+
 class Recommendation(Base):
     __tablename__ = "recommendations"
 
@@ -31,3 +57,40 @@ class Recommendation(Base):
     status = Column(String, default="Proposed") # Proposed, Implemented, Rejected
     estimated_monthly_revenue = Column(String, nullable=True)
     key_insights = Column(String, nullable=True) # Stored as JSON string
+
+class BacktestResult(Base):
+    __tablename__ = "backtest_results"
+
+    id = Column(Integer, primary_key=True, index=True)
+    run_id = Column(String, index=True)  # One rolling-origin backtest
+    model_type = Column(String) # 'prophet', 'lstm', 'xgboost', 'ensemble'
+    horizon = Column(Integer, nullable=True) # Hours ahead (1..N); NULL = all horizons pooled
+    mape = Column(Float, nullable=True) # NULL if every actual was zero
+    rmse = Column(Float)
+    samples = Column(Integer)
+    folds = Column(Integer)
+    first_origin = Column(DateTime(timezone=True))
+    last_origin = Column(DateTime(timezone=True))
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+class VideoJob(Base):
+    """One uploaded video in the processing queue (services/video_jobs.py)."""
+    __tablename__ = "video_jobs"
+
+    id = Column(String, primary_key=True) # job_id (uuid)
+    filename = Column(String) # Stored upload name (uuid-prefixed)
+    original_filename = Column(String, nullable=True)
+    content_hash = Column(String(64), nullable=True, index=True) # sha256 of the upload (services/video_store.py)
+    mode = Column(String, default="annotate") # annotate (burned-in boxes) or overlay (original + track file)
+    camera_id = Column(String, nullable=True) # ROI / inference size settings (cameras.json)
+    file_path = Column(String) # Input file while queued/running
+    output_url = Column(String, nullable=True)
+    state = Column(String, index=True) # queued, running, done, failed, cancelled, expired
+    frames_processed = Column(Integer, default=0)
+    total_frames = Column(Integer, nullable=True)
+    fps = Column(Float, nullable=True) # Processing speed
+    error = Column(String, nullable=True)
+    stats = Column(JSON, nullable=True) # Pipeline stage counters once finished
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
@@ -0,0 +1,320 @@
+import os
+import json
+import uuid
+import shutil
+import hashlib
+import datetime
+import threading
+
+# --- Versioned Model Artifact Bundles ---
+#
+# Layout (under <model_dir>/artifacts):
+#   CURRENT                   -> name of the active version directory, e.g. "v0003"
+#   v0003/manifest.json       -> format version, metadata and per-member files/hashes/params
+#   v0003/prophet.json        -> Prophet model (prophet.serialize JSON, no pickle)
+#   v0003/xgboost.ubj         -> XGBoost booster (UBJSON)
+#   v0003/lstm.json           -> Keras architecture
+#   v0003/lstm.weights.h5     -> Keras weights (scaler params live in the manifest)
+#
+# Versions are immutable once published. Publishing stages a new directory,
+# renames it into place and then swaps CURRENT atomically, so readers never
+# observe a half-written bundle.
+
+FORMAT_VERSION = 1
+ARTIFACT_DIRNAME = "artifacts"
+MANIFEST_NAME = "manifest.json"
+CURRENT_NAME = "CURRENT"
+
+MEMBERS = ("prophet", "xgboost", "lstm")
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _write_atomic(path, text):
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, 'w') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+# --- Per-member writers (model object -> files in a staging dir) ---
+
+def _write_prophet(model, stage_dir):
+    from prophet.serialize import model_to_json
+    with open(os.path.join(stage_dir, "prophet.json"), 'w') as f:
+        f.write(model_to_json(model))
+    return {"format": "prophet-json", "files": ["prophet.json"], "params": {}}
+
+
+def _write_xgboost(model, stage_dir):
+    # Accepts XGBRegressor or a raw Booster
+    model.save_model(os.path.join(stage_dir, "xgboost.ubj"))
+    return {"format": "xgboost-ubj", "files": ["xgboost.ubj"], "params": {}}
+
+
+def _write_lstm(lstm_parts, stage_dir):
+    # (keras_model, scaler) or (keras_model, scaler, look_back)
+    model, scaler, *rest = lstm_parts
+    look_back = rest[0] if rest else 24
+    with open(os.path.join(stage_dir, "lstm.json"), 'w') as f:
+        f.write(model.to_json())
+    model.save_weights(os.path.join(stage_dir, "lstm.weights.h5"))
+    return {
+        "format": "keras-weights",
+        "files": ["lstm.json", "lstm.weights.h5"],
+        "params": {
+            "look_back": look_back,
+            "scaler": {
+                "feature_range": list(scaler.feature_range),
+                "data_min": [float(v) for v in scaler.data_min_],
+                "data_max": [float(v) for v in scaler.data_max_],
+            }
+        }
+    }
+
+
+_WRITERS = {
+    "prophet": _write_prophet,
+    "xgboost": _write_xgboost,
+    "lstm": _write_lstm,
+}
+
+
+class ModelBundle:
+    """A single immutable artifact version. Members are deserialized on request only."""
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, MANIFEST_NAME)) as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported artifact format: {self.manifest.get('format_version')}")
+        self.version = self.manifest["version"]
+        self.metadata = self.manifest.get("metadata", {})
+
+    def has(self, member):
+        return member in self.manifest["members"]
+
+    def member_path(self, member, index=0):
+        return os.path.join(self.path, self.manifest["members"][member]["files"][index])
+
+    def params(self, member):
+        return self.manifest["members"][member].get("params", {})
+
+    def verify(self):
+        """Re-hashes every member file against the manifest. Returns list of mismatched files."""
+        bad = []
+        for member, entry in self.manifest["members"].items():
+            for name, digest in entry["sha256"].items():
+                if _sha256(os.path.join(self.path, name)) != digest:
+                    bad.append(name)
+        return bad
+
+    # Loaders (imports are local so unused members never pay for their libraries)
+
+    def load_prophet(self):
+        from prophet.serialize import model_from_json
+        with open(self.member_path("prophet")) as f:
+            return model_from_json(f.read())
+
+    def load_xgboost(self):
+        from xgboost import XGBRegressor
+        model = XGBRegressor()
+        model.load_model(self.member_path("xgboost"))
+        return model
+
+    def load_lstm(self):
+        """Returns (keras_model, scaler)."""
+        import numpy as np
+        from sklearn.preprocessing import MinMaxScaler
+        from tensorflow.keras.models import model_from_json
+
+        with open(self.member_path("lstm", 0)) as f:
+            model = model_from_json(f.read())
+        model.load_weights(self.member_path("lstm", 1))
+
+        sp = self.params("lstm")["scaler"]
+        scaler = MinMaxScaler(feature_range=tuple(sp["feature_range"]))
+        scaler.fit(np.array([sp["data_min"], sp["data_max"]]))
+        return model, scaler
+
+
+class ArtifactStore:
+    """Publishes and resolves versioned bundles under a single artifact root."""
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+        self._bundle = None
+        self._current_stamp = None
+
+    @property
+    def current_path(self):
+        return os.path.join(self.root, CURRENT_NAME)
+
+    def current_version(self):
+        try:
+            with open(self.current_path) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def versions(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(d for d in os.listdir(self.root)
+                      if d.startswith("v") and os.path.exists(os.path.join(self.root, d, MANIFEST_NAME)))
+
+    def open(self, version=None):
+        version = version or self.current_version()
+        if not version:
+            return None
+        return ModelBundle(os.path.join(self.root, version))
+
+    def bundle(self):
+        """
+        Returns the active bundle, re-resolving it only when CURRENT has changed.
+        This is the hot-swap point: callers hold on to the store, not the bundle.
+        """
+        try:
+            st = os.stat(self.current_path)
+            stamp = (st.st_mtime_ns, st.st_ino, st.st_size)
+        except FileNotFoundError:
+            return None
+
+        if stamp == self._current_stamp and self._bundle is not None:
+            return self._bundle
+
+        with self._lock:
+            if stamp != self._current_stamp or self._bundle is None:
+                self._bundle = self.open()
+                self._current_stamp = stamp
+            return self._bundle
+
+    def _next_version(self):
+        existing = [int(v[1:]) for v in self.versions() if v[1:].isdigit()]
+        return f"v{(max(existing) + 1 if existing else 1):04d}"
+
+    def publish(self, members, metadata=None, base=None):
+        """
+        Writes a new version and makes it current.
+
+        members: dict of member name -> model object. The LSTM entry is a
+                 (keras_model, scaler[, look_back]) tuple. Members left out are carried over
+                 unchanged from `base` (defaults to the current bundle).
+        metadata: free-form training metadata stored in the manifest.
+        """
+        stage_dir = self.stage()
+        try:
+            entries = {name: write_member(name, members[name], stage_dir)
+                       for name in MEMBERS if members.get(name) is not None}
+        except Exception:
+            shutil.rmtree(stage_dir, ignore_errors=True)
+            raise
+        return self.commit(stage_dir, entries, metadata, base)
+
+    def stage(self):
+        """Creates an empty staging directory for a new version (see write_member / commit)."""
+        os.makedirs(self.root, exist_ok=True)
+        stage_dir = os.path.join(self.root, f".staging-{uuid.uuid4().hex}")
+        os.makedirs(stage_dir)
+        return stage_dir
+
+    def commit(self, stage_dir, entries, metadata=None, base=None):
+        """
+        Publishes a staging directory whose members were written with write_member.
+        Members missing from `entries` are carried over from `base` (defaults to the current bundle).
+        """
+        if base is None:
+            base = self.open()
+        try:
+            entries = dict(entries)
+            for name in MEMBERS:
+                if name in entries or base is None or not base.has(name):
+                    continue
+                entry = dict(base.manifest["members"][name])
+                for fname in entry["files"]:
+                    src = os.path.join(base.path, fname)
+                    dst = os.path.join(stage_dir, fname)
+                    try:
+                        os.link(src, dst)  # versions are immutable, hardlinks are safe
+                    except OSError:
+                        shutil.copy2(src, dst)
+                entries[name] = entry
+
+            # Retry on the (unlikely) race with a concurrent publisher claiming the same name
+            while True:
+                version = self._next_version()
+                manifest = {
+                    "format_version": FORMAT_VERSION,
+                    "version": version,
+                    "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                    "parent": base.version if base is not None else None,
+                    "metadata": metadata or {},
+                    "members": {name: entries[name] for name in MEMBERS if name in entries},
+                }
+                _write_atomic(os.path.join(stage_dir, MANIFEST_NAME), json.dumps(manifest, indent=2))
+                try:
+                    os.rename(stage_dir, os.path.join(self.root, version))
+                    break
+                except OSError:
+                    if not os.path.exists(os.path.join(self.root, version)):
+                        raise
+        except Exception:
+            shutil.rmtree(stage_dir, ignore_errors=True)
+            raise
+
+        _write_atomic(self.current_path, version + "\n")
+        print(f"Published model artifacts {version} to {self.root}")
+        return version
+
+
+def write_member(name, model, stage_dir):
+    """Serializes one member into a staging dir. Returns its manifest entry (files, params, hashes)."""
+    entry = _WRITERS[name](model, stage_dir)
+    entry["sha256"] = {f: _sha256(os.path.join(stage_dir, f)) for f in entry["files"]}
+    return entry
+
+
+# Process-wide store registry so every EnsembleForecaster shares one resolved bundle
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_artifact_store(model_dir):
+    root = os.path.abspath(os.path.join(model_dir, ARTIFACT_DIRNAME))
+    with _stores_lock:
+        if root not in _stores:
+            _stores[root] = ArtifactStore(root)
+        return _stores[root]
+
+
+def convert_legacy(model_dir):
+    """Builds a bundle from the legacy pickle/.keras files in model_dir."""
+    import pickle
+    import joblib
+    from xgboost import XGBRegressor
+    from tensorflow.keras.models import load_model
+
+    with open(os.path.join(model_dir, "prophet_model.pkl"), 'rb') as f:
+        prophet_model = pickle.load(f)
+    xgb = XGBRegressor()
+    xgb.load_model(os.path.join(model_dir, "xgboost_model.json"))
+    lstm_model = load_model(os.path.join(model_dir, "lstm_model.keras"))
+    scaler = joblib.load(os.path.join(model_dir, "lstm_scaler.pkl"))
+
+    store = get_artifact_store(model_dir)
+    return store.publish(
+        {"prophet": prophet_model, "xgboost": xgb, "lstm": (lstm_model, scaler, 24)},
+        metadata={"source": "legacy_conversion"},
+    )
+
+
+if __name__ == "__main__":
+    convert_legacy(os.path.dirname(os.path.abspath(__file__)))
@@ -0,0 +1,162 @@
+import os
+import json
+import uuid
+import hashlib
+import datetime
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .artifacts import ArtifactStore
+
+# --- Rolling-Origin Backtesting ---
+#
+# For every fold the members are fitted on data strictly before the origin and
+# forecast the next `horizon` hours, exactly like production forecast() does.
+# Folds are independent, so they run in parallel worker processes.
+#
+# Fitted fold models are cached as artifact bundles under
+# <model_dir>/backtest_cache/<key>, where key hashes the training slice and the
+# training config. Re-running on the same (or appended) data only fits folds
+# whose training window is new.
+
+MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIRNAME = "backtest_cache"
+BACKTEST_WORKERS = int(os.getenv("BACKTEST_WORKERS", str(os.cpu_count() or 1)))
+MEMBERS = ("prophet", "lstm", "xgboost", "ensemble")
+# Folds need at least a week of history for Prophet's weekly seasonality and the 24h lags
+MIN_TRAIN_HOURS = 7 * 24
+
+
+def fold_key(train_agg, config):
+    """Content hash of a fold's training slice + training config."""
+    h = hashlib.sha256()
+    h.update(pd.util.hash_pandas_object(train_agg[['timestamp', 'vehicle_count']], index=False).values.tobytes())
+    h.update(json.dumps(config, sort_keys=True).encode())
+    return h.hexdigest()[:20]
+
+
+def _fit_fold(task):
+    """Worker-process entry point: fit (or load) one fold and forecast its horizon."""
+    from .demand_prediction_engine import EnsembleForecaster, ProphetWrapper, XGBoostWrapper, LSTMWrapper
+
+    df_agg, origin, horizon = task['df_agg'], task['origin'], task['horizon']
+    train = df_agg.iloc[:origin]
+    train_model = train.dropna().reset_index(drop=True)
+    actual = df_agg['vehicle_count'].values[origin:origin + horizon]
+
+    ens = EnsembleForecaster(train_model, train)
+    store = ArtifactStore(os.path.join(task['cache_dir'], fold_key(train, task['config'])))
+    bundle = store.open()
+    cached = bundle is not None
+    if cached:
+        ens.attach_bundle(bundle)
+    else:
+        ens.prophet = ProphetWrapper()
+        ens.prophet.train(train)
+        ens.xgboost = XGBoostWrapper()
+        ens.xgboost.train(train_model)
+        ens.lstm = LSTMWrapper(look_back=ens.lstm.look_back)
+        ens.lstm.train(train_model, epochs=task['config']['lstm_epochs'])
+        store.publish(
+            {"prophet": ens.prophet.model, "xgboost": ens.xgboost.model,
+             "lstm": (ens.lstm.model, ens.lstm.scaler, ens.lstm.look_back)},
+            metadata={"source": "backtest", "trained_through": str(train['timestamp'].iloc[-1]),
+                      "rows": len(train)},
+        )
+
+    res = ens.forecast(hours=horizon)
+    return {
+        'origin': df_agg['timestamp'].iloc[origin],
+        'cached': cached,
+        'actual': actual,
+        **{m: np.asarray(res[m], dtype=float) for m in MEMBERS},
+    }
+
+
+def score(actual, predicted):
+    """
+    Error metrics over (folds, horizon) arrays.
+    Returns (mape, rmse, samples); MAPE skips zero actuals and is None if all are zero.
+    """
+    err = predicted - actual
+    rmse = float(np.sqrt(np.mean(err ** 2)))
+    mask = actual > 0
+    mape = float(np.mean(np.abs(err[mask] / actual[mask])) * 100) if mask.any() else None
+    return mape, rmse, int(actual.size)
+
+
+class BacktestHarness:
+    """Runs rolling-origin folds over the aggregated hourly series and aggregates per-member errors."""
+    def __init__(self, model_dir=MODEL_DIR, max_workers=BACKTEST_WORKERS,
+                 folds=8, horizon=24, step=24, lstm_epochs=20):
+        self.cache_dir = os.path.join(model_dir, CACHE_DIRNAME)
+        self.max_workers = max_workers
+        self.folds = folds
+        self.horizon = horizon
+        self.step = step
+        self.lstm_epochs = lstm_epochs
+
+    def origins(self, n_hours):
+        """Fold origins (row indices), oldest first; the last fold ends at the latest hour."""
+        last = n_hours - self.horizon
+        origins = [last - k * self.step for k in range(self.folds)]
+        return sorted(o for o in origins if o >= MIN_TRAIN_HOURS)
+
+    def run(self, raw_df):
+        from .demand_prediction_engine import FeatureEngineer
+
+        _, df_agg, _ = FeatureEngineer().process(raw_df.copy())
+        origins = self.origins(len(df_agg))
+        if not origins:
+            raise ValueError(f"Not enough history for a {self.horizon}h backtest "
+                             f"({len(df_agg)} hours, need > {MIN_TRAIN_HOURS + self.horizon}).")
+
+        config = {"lstm_epochs": self.lstm_epochs, "look_back": 24}
+        tasks = [{'df_agg': df_agg, 'origin': o, 'horizon': self.horizon,
+                  'cache_dir': self.cache_dir, 'config': config} for o in origins]
+
+        print(f"Backtesting {len(tasks)} folds x {self.horizon}h on {self.max_workers} workers...")
+        if self.max_workers > 1:
+            # spawn: TensorFlow state does not survive fork
+            with ProcessPoolExecutor(max_workers=self.max_workers,
+                                     mp_context=multiprocessing.get_context("spawn")) as pool:
+                folds = list(pool.map(_fit_fold, tasks))
+        else:
+            folds = [_fit_fold(t) for t in tasks]
+
+        actual = np.stack([f['actual'] for f in folds])
+        metrics = []
+        for m in MEMBERS:
+            pred = np.stack([f[m] for f in folds])
+            mape, rmse, n = score(actual, pred)
+            metrics.append({"model_type": m, "horizon": None, "mape": mape, "rmse": rmse, "samples": n})
+            for h in range(self.horizon):
+                mape, rmse, n = score(actual[:, h], pred[:, h])
+                metrics.append({"model_type": m, "horizon": h + 1, "mape": mape, "rmse": rmse, "samples": n})
+
+        return {
+            "run_id": str(uuid.uuid4()),
+            "folds": len(folds),
+            "horizon": self.horizon,
+            "cached_folds": sum(f['cached'] for f in folds),
+            "origins": [f['origin'] for f in folds],
+            "metrics": metrics,
+        }
+
+    @staticmethod
+    def result_records(result):
+        """Flattens a run() result into backtest_results rows (dicts, for bulk insert)."""
+        return [{
+            "run_id": result["run_id"],
+            "model_type": m["model_type"],
+            "horizon": m["horizon"],
+            "mape": m["mape"],
+            "rmse": m["rmse"],
+            "samples": m["samples"],
+            "folds": result["folds"],
+            "first_origin": result["origins"][0],
+            "last_origin": result["origins"][-1],
+        } for m in result["metrics"]]
@@ -1,8 +1,8 @@
 import pandas as pd
 import numpy as np
 import datetime
-import random
 import json
+import threading
 import matplotlib.pyplot as plt
 import warnings
 
@@ -12,86 +12,142 @@ warnings.filterwarnings('ignore')
 # --- Data Generation ---
 
 class DataGenerator:
-    """Generates synthetic EV charging session data."""
-    def __init__(self, start_date=None, days=90, n_stations=5):
+    """
+    Generates synthetic EV charging session data.
+
+    Rows are produced in whole-array chunks of `chunk_days` (hours x stations),
+    so memory stays bounded by one chunk whatever `days` and `n_stations` are.
+    Every random quantity has its own stream derived from `seed`, so the output
+    for a given seed does not depend on the chunk size.
+    """
+    CAPACITY = 10  # vehicles per station before a queue forms
+
+    def __init__(self, start_date=None, days=90, n_stations=5, seed=None, chunk_days=7):
         self.start_date = start_date if start_date else datetime.datetime.now() - datetime.timedelta(days=days)
         self.days = days
         self.n_stations = n_stations
+        self.seed = seed
+        self.chunk_days = chunk_days
+        self.station_ids = np.array([f"S{i:02d}" for i in range(1, n_stations + 1)], dtype=object)
+
+    def _streams(self):
+        # noise, event spikes, station split, session ratio
+        return [np.random.default_rng(s) for s in np.random.SeedSequence(self.seed).spawn(4)]
+
+    def iter_chunks(self, chunk_days=None):
+        """Yields DataFrames of consecutive `chunk_days` x 24 hours for all stations."""
+        noise_rng, event_rng, split_rng, session_rng = self._streams()
+        total_hours = self.days * 24
+        step = max(1, (chunk_days or self.chunk_days) * 24)
+        start = pd.Timestamp(self.start_date)
+        n = self.n_stations
+
+        for offset in range(0, total_hours, step):
+            hours_idx = np.arange(offset, min(offset + step, total_hours))
+            timestamps = start + pd.to_timedelta(hours_idx, unit='h')
+            hour = timestamps.hour.values
+            is_weekend = timestamps.weekday.values >= 5
+
+            # Daily pattern: morning (7-9 AM) and evening (4-7 PM) peaks, weekend reduction
+            base_demand = np.full(len(hours_idx), 10.0)
+            base_demand[(hour >= 7) & (hour <= 9)] += 20
+            base_demand[(hour >= 16) & (hour <= 19)] += 25
+            base_demand[is_weekend] *= 0.6
+
+            # Random variation, slight growth over time, 1% chance of a special event
+            total = np.maximum(0, np.trunc(base_demand + noise_rng.normal(0, 5, len(hours_idx))))
+            total += np.trunc((hours_idx // 24) * 0.1)
+            spikes = event_rng.random(len(hours_idx)) < 0.01
+            total[spikes] = np.trunc(total[spikes] * 1.5)
+
+            # Distribute across stations (hours x stations)
+            vehicle_count = np.trunc(total[:, None] / n * split_rng.uniform(0.8, 1.2, (len(hours_idx), n))).astype(np.int64)
+            session_count = np.trunc(vehicle_count * session_rng.uniform(0.9, 1.1, vehicle_count.shape)).astype(np.int64)
+            queue_length = np.maximum(0, vehicle_count - self.CAPACITY)
+            occupancy_rate = np.round(np.minimum(1.0, vehicle_count / self.CAPACITY), 2)
+
+            yield pd.DataFrame({
+                'timestamp': np.repeat(timestamps.values, n),
+                'station_id': np.tile(self.station_ids, len(hours_idx)),
+                'vehicle_count': vehicle_count.ravel(),
+                'session_count': session_count.ravel(),
+                'occupancy_rate': occupancy_rate.ravel(),
+                'queue_length': queue_length.ravel(),
+            })
 
     def generate(self):
         """Generates a DataFrame with timestamp, station_id, vehicle_count, etc."""
-        timestamps = pd.date_range(start=self.start_date, periods=self.days * 24, freq='H')
-        data = []
-        
-        for ts in timestamps:
-            # Simulate daily pattern (peak morning and evening)
-            hour = ts.hour
-            is_weekend = ts.weekday() >= 5
-            
-            base_demand = 10  # Baseline
-            
-            # Morning peak (7-9 AM)
-            if 7 <= hour <= 9:
-                base_demand += 20
-            # Evening peak (4-7 PM)
-            elif 16 <= hour <= 19:
-                base_demand += 25
-            
-            # Weekend reduction
-            if is_weekend:
-                base_demand *= 0.6
-                
-            # Random variation
-            demand_noise = np.random.normal(0, 5)
-            total_vehicles = max(0, int(base_demand + demand_noise))
-            
-            # Trends (slight growth over time)
-            days_passed = (ts - self.start_date).days
-            total_vehicles += int(days_passed * 0.1) # Growth
-
-            # Seasonality / Special Events (random spikes)
-            if random.random() < 0.01: # 1% chance of event
-                total_vehicles = int(total_vehicles * 1.5)
-
-            # Distribute across stations
-            for station_id in range(1, self.n_stations + 1):
-                # Station specific variation
-                station_vehicles = int(total_vehicles / self.n_stations * np.random.uniform(0.8, 1.2))
-                
-                # Input fields derivation
-                vehicle_count = station_vehicles
-                
-                # Logic for derived fields to maintain consistency
-                # Approx 1 session per vehicle for simplicity in this window, but varies
-                session_count = int(vehicle_count * np.random.uniform(0.9, 1.1))
-                
-                # Occupancy rate (assume capacity of 10 per station)
-                capacity = 10
-                occupancy_rate = min(1.0, vehicle_count / capacity)
-                
-                # Queue length (if occupancy > 100%)
-                queue_length = max(0, vehicle_count - capacity)
-                if queue_length > 0:
-                    occupancy_rate = 1.0 # Cap occupancy at 100% physically
-                
-                data.append({
-                    'timestamp': ts,
-                    'station_id': f"S{station_id:02d}",
-                    'vehicle_count': vehicle_count,
-                    'session_count': session_count,
-                    'occupancy_rate': round(occupancy_rate, 2),
-                    'queue_length': queue_length
-                })
-                
-        df = pd.DataFrame(data)
-        return df
+        return pd.concat(self.iter_chunks(), ignore_index=True)
+
+    def to_csv(self, path):
+        """Streams all chunks to one CSV file. Returns the number of rows written."""
+        rows = 0
+        for i, chunk in enumerate(self.iter_chunks()):
+            chunk.to_csv(path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+            rows += len(chunk)
+        return rows
+
+    def to_parquet(self, path):
+        """Streams all chunks to one Parquet file (one row group per chunk; needs pyarrow)."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        rows = 0
+        writer = None
+        try:
+            for chunk in self.iter_chunks():
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+                rows += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+        return rows
 
 # --- Feature Engineering ---
 
 class FeatureEngineer:
-    """Handles preprocessing and feature engineering."""
+    """
+    Handles preprocessing and feature engineering.
+
+    Stateful: keeps the sorted raw rows (as chunks), the aggregated hourly
+    series and its features. `append` re-aggregates only the timestamps the
+    new rows touch and recomputes lag/rolling features starting MAX_WINDOW
+    rows before the first changed hour, so the result is identical to
+    `process` over the concatenated data at O(new rows) cost.
+    """
+    AGG_SPEC = {
+        'vehicle_count': 'sum',
+        'session_count': 'sum',
+        'occupancy_rate': 'mean', # Average occupancy
+        'queue_length': 'sum'
+    }
+    # Longest look-back of any derived feature (lag_24, rolling_mean_24h)
+    MAX_WINDOW = 24
+    # Raw chunks are merged once this many appends have accumulated
+    MAX_CHUNKS = 64
+
     def __init__(self):
-        pass
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        self._chunks = []        # sorted, non-overlapping raw row chunks
+        self._source = None      # frame last synced through update()
+        self.rows_seen = 0
+        self.df_agg = None
+        self.df_model = None
+
+    @property
+    def raw(self):
+        """All raw rows seen so far, sorted by timestamp."""
+        if not self._chunks:
+            return None
+        if len(self._chunks) > 1:
+            self._chunks = [pd.concat(self._chunks)]
+        return self._chunks[0]
         
     def process(self, df):
         """
@@ -99,16 +155,94 @@ class FeatureEngineer:
         Output: Processed DataFrame with features for modeling
         """
         df['timestamp'] = pd.to_datetime(df['timestamp'])
-        df = df.sort_values('timestamp')
-        
-        # Aggregate to global level for overall demand prediction
-        df_agg = df.groupby('timestamp').agg({
-            'vehicle_count': 'sum',
-            'session_count': 'sum',
-            'occupancy_rate': 'mean', # Average occupancy
-            'queue_length': 'sum'
-        }).reset_index()
-        
+        with self._lock:
+            self.reset()
+            df_model, df_agg = self.append(df)
+            return df_model, df_agg, self.raw # Return model-ready, aggregated-full, and raw
+
+    def update(self, raw_df):
+        """
+        Syncs with a raw frame that only grows by appending (e.g. the data cache):
+        unseen trailing rows go through append(), any other frame is fully processed.
+        Returns (df_model, df_agg).
+        """
+        with self._lock:
+            if self._source is raw_df and len(raw_df) >= self.rows_seen:
+                if len(raw_df) > self.rows_seen:
+                    self.append(raw_df.iloc[self.rows_seen:])
+            else:
+                self.process(raw_df)
+            self._source = raw_df
+            self.rows_seen = len(raw_df)
+            return self.df_model, self.df_agg
+
+    def extend(self, raw_df, previous):
+        """
+        Like update(), for a new frame that is `previous` plus appended rows
+        (e.g. a refreshed data cache built with concat): if `previous` is the
+        frame last synced, only the trailing rows are folded in.
+        """
+        with self._lock:
+            if previous is not None and self._source is previous:
+                self._source = raw_df
+            return self.update(raw_df)
+
+    def append(self, new_rows):
+        """Folds new raw rows into the state. Returns (df_model, df_agg)."""
+        with self._lock:
+            if len(new_rows) == 0 and self.df_agg is not None:
+                return self.df_model, self.df_agg
+            new = new_rows.assign(timestamp=pd.to_datetime(new_rows['timestamp']))
+            new = new.sort_values('timestamp', kind='mergesort')
+            if new.empty:
+                # Nothing seen yet: still produce correctly shaped (empty) frames
+                self.df_agg = self._add_features(new.groupby('timestamp').agg(self.AGG_SPEC).reset_index())
+                self.df_model = self.df_agg.dropna().reset_index(drop=True)
+                return self.df_model, self.df_agg
+            cut = new['timestamp'].iloc[0]
+            
+            # 1. Detach raw rows at/after the first new timestamp (existing rows keep precedence on ties)
+            tail = []
+            while self._chunks and self._chunks[-1]['timestamp'].iloc[0] >= cut:
+                tail.insert(0, self._chunks.pop())
+            if self._chunks:
+                last = self._chunks[-1]
+                i = last['timestamp'].searchsorted(cut, side='left')
+                if i < len(last):
+                    tail.insert(0, last.iloc[i:])
+                    self._chunks[-1] = last.iloc[:i]
+            tail = pd.concat(tail + [new]).sort_values('timestamp', kind='mergesort') if tail else new
+            self._chunks.append(tail)
+            if len(self._chunks) > self.MAX_CHUNKS:
+                self._chunks = [pd.concat(self._chunks)]
+            
+            # 2. Re-aggregate only the affected hours
+            agg_tail = tail.groupby('timestamp').agg(self.AGG_SPEC).reset_index()
+            
+            # 3. Recompute features from MAX_WINDOW rows of context before the cut
+            k = 0 if self.df_agg is None else int(self.df_agg['timestamp'].searchsorted(cut, side='left'))
+            ctx = max(0, k - self.MAX_WINDOW)
+            if k > 0:
+                base_cols = ['timestamp'] + list(self.AGG_SPEC)
+                window = pd.concat([self.df_agg.iloc[ctx:k][base_cols], agg_tail], ignore_index=True)
+            else:
+                window = agg_tail
+            fresh = self._add_features(window).iloc[k - ctx:]
+            
+            if k > 0:
+                self.df_agg = pd.concat([self.df_agg.iloc[:k], fresh], ignore_index=True)
+                m = int(self.df_model['timestamp'].searchsorted(cut, side='left'))
+                self.df_model = pd.concat([self.df_model.iloc[:m], fresh.dropna()], ignore_index=True)
+            else:
+                self.df_agg = fresh.reset_index(drop=True)
+                # Drop NaN created by lags for training for XGBoost/LSTM
+                # Keep a copy with full timestamps for Prophet which can handle/needs full range
+                self.df_model = self.df_agg.dropna().reset_index(drop=True)
+            return self.df_model, self.df_agg
+
+    @staticmethod
+    def _add_features(df_agg):
+        df_agg = df_agg.copy()
         # Temporal features
         df_agg['hour'] = df_agg['timestamp'].dt.hour
         df_agg['day_of_week'] = df_agg['timestamp'].dt.dayofweek
@@ -123,21 +257,15 @@ class FeatureEngineer:
         # Rolling means
         df_agg['rolling_mean_3h'] = df_agg['vehicle_count'].rolling(window=3).mean()
         df_agg['rolling_mean_24h'] = df_agg['vehicle_count'].rolling(window=24).mean()
-        
-        # Drop NaN created by lags for training for XGBoost/LSTM
-        # Keep a copy with full timestamps for Prophet which can handle/needs full range
-        df_model = df_agg.dropna().reset_index(drop=True)
-        
-        return df_model, df_agg, df # Return model-ready, aggregated-full, and raw
+        return df_agg
 
 # --- Models ---
 
 from prophet import Prophet
 from xgboost import XGBRegressor
 from sklearn.preprocessing import MinMaxScaler
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense, Dropout
-from tensorflow.keras.optimizers import Adam
+# TensorFlow is imported inside LSTMWrapper: it is by far the slowest import
+# and only needed once the LSTM member is actually trained or used.
 import logging
 
 # Silence Prophet logging
@@ -147,15 +275,78 @@ logger.addHandler(logging.NullHandler())
 logger.propagate = False
 logger.setLevel(logging.CRITICAL)
 
-class ProphetWrapper:
+class LazyMember:
+    """
+    Mixin for ensemble members whose model is deserialized on first use.
+    `attach(loader)` registers a callable that receives the wrapper and sets its
+    model attributes; it runs at most once, on the first access to `model`.
+    """
+    def __init__(self):
+        self._loader = None
+        # Per member: loading one member (e.g. the LSTM) never waits on another
+        self._load_lock = threading.RLock()
+
+    def attach(self, loader):
+        self._model = None
+        self._loader = loader
+
+    def _ensure_loaded(self):
+        if self._loader is None:
+            return
+        with self._load_lock:
+            if self._loader is not None:
+                loader = self._loader
+                loader(self)
+                self._loader = None
+
+    @property
+    def model(self):
+        self._ensure_loaded()
+        return self._model
+
+    @model.setter
+    def model(self, value):
+        self._loader = None
+        self._model = value
+
+WEEK_NS = 7 * 24 * 3600 * 10**9
+
+class ProphetWrapper(LazyMember):
+    """
+    Prophet member. Prediction bypasses Prophet.predict: it scores only the
+    requested timestamps with the posterior-mean parameters (no uncertainty
+    sampling, the ensemble computes its own bounds) and caches seasonal
+    feature rows by position within the week.
+    """
+    # Bound on cached week positions (168 for an hourly grid with a fixed offset)
+    MAX_CACHED_POSITIONS = 10000
+
     def __init__(self):
+        super().__init__()
         self.model = None
+        self._design_model = None
 
-    def train(self, df):
+    def train(self, df, init=None):
         # Prophet requires columns 'ds' and 'y'
         p_df = df[['timestamp', 'vehicle_count']].rename(columns={'timestamp': 'ds', 'vehicle_count': 'y'})
+        p_df['ds'] = self._naive(p_df['ds']).values
         self.model = Prophet(yearly_seasonality=False, weekly_seasonality=True, daily_seasonality=True)
-        self.model.fit(p_df)
+        if init is None:
+            self.model.fit(p_df)
+        else:
+            # Starting values for the optimizer (see warm_start_params)
+            self.model.fit(p_df, init=init)
+
+    def warm_start_params(self):
+        """Fitted parameters of the current model, in the form Prophet.fit(init=...) expects."""
+        m = self.model
+        params = {name: m.params[name][0][0] for name in ('k', 'm', 'sigma_obs')}
+        params.update({name: m.params[name][0] for name in ('delta', 'beta')})
+        return params
+
+    def history_frame(self):
+        """Training history of the current model as a timestamp/vehicle_count frame."""
+        return self.model.history[['ds', 'y']].rename(columns={'ds': 'timestamp', 'y': 'vehicle_count'})
 
     def load(self, path):
         import pickle
@@ -164,12 +355,83 @@ class ProphetWrapper:
         
     def predict(self, periods=24):
         if not self.model: return pd.DataFrame()
-        future = self.model.make_future_dataframe(periods=periods, freq='H')
-        forecast = self.model.predict(future)
-        return forecast[['ds', 'yhat']].tail(periods)
+        # Same grid as make_future_dataframe(freq='H'), without the history rows
+        last = self.model.history['ds'].max()
+        future = last + pd.to_timedelta(np.arange(1, periods + 1), unit='h')
+        return self.predict_at(future)
+
+    def predict_at(self, timestamps):
+        """Point forecast ('ds', 'yhat') for arbitrary timestamps; cost is O(len(timestamps))."""
+        m = self.model
+        if not m: return pd.DataFrame()
+        ds = self._naive(timestamps)
+        # setup_dataframe sorts by ds; score in sorted order and map back to the input order
+        order = np.argsort(ds.values, kind='stable')
+        df = m.setup_dataframe(pd.DataFrame({'ds': ds.values[order]}))
+        
+        self._prepare_design()
+        trend = np.asarray(m.predict_trend(df))
+        X = self._seasonal_matrix(df)
+        additive = X @ self._beta_additive
+        multiplicative = X @ self._beta_multiplicative
+        
+        yhat = np.empty(len(order))
+        yhat[order] = trend * (1 + multiplicative) + additive
+        return pd.DataFrame({'ds': ds.values, 'yhat': yhat})
+
+    @staticmethod
+    def _naive(timestamps):
+        # Prophet rejects tz-aware 'ds'; the event store is UTC, so drop the zone
+        ts = pd.to_datetime(pd.Series(timestamps)).reset_index(drop=True)
+        if ts.dt.tz is not None:
+            ts = ts.dt.tz_convert(None)
+        return ts
 
-class XGBoostWrapper:
+    def _prepare_design(self):
+        """(Re)builds per-model constants whenever the underlying Prophet model changes."""
+        m = self.model
+        if self._design_model is m:
+            return
+        # Component masks come from a one-row feature build
+        probe = m.setup_dataframe(pd.DataFrame({'ds': [m.history['ds'].max()]}))
+        features, _, component_cols, _ = m.make_all_seasonality_features(probe)
+        beta = np.nanmean(m.params['beta'], axis=0)
+        self._feature_names = list(features.columns)
+        self._beta_additive = beta * component_cols['additive_terms'].values * m.y_scale
+        self._beta_multiplicative = beta * component_cols['multiplicative_terms'].values
+        
+        # Rows can be cached by position-in-week only if every seasonal term repeats weekly
+        # and nothing else (holidays, regressors, conditions) enters the feature matrix
+        self._weekly_cacheable = (
+            not m.extra_regressors
+            and m.holidays is None
+            and not m.country_holidays
+            and all(sea['condition_name'] is None and (7 / sea['period']).is_integer()
+                    for sea in m.seasonalities.values())
+        )
+        self._row_cache = {}
+        self._design_model = m
+
+    def _seasonal_matrix(self, df):
+        m = self.model
+        if not self._weekly_cacheable:
+            return m.make_all_seasonality_features(df)[0].values
+        
+        keys = df['ds'].values.astype('datetime64[ns]').astype(np.int64) % WEEK_NS
+        missing = [i for i, k in enumerate(keys) if k not in self._row_cache]
+        if missing:
+            if len(self._row_cache) + len(missing) > self.MAX_CACHED_POSITIONS:
+                self._row_cache.clear()
+            rows = m.make_all_seasonality_features(df.iloc[missing])[0].values
+            for i, row in zip(missing, rows):
+                self._row_cache[keys[i]] = row
+        if len(keys) == 0:
+            return np.zeros((0, len(self._feature_names)))
+        return np.stack([self._row_cache[k] for k in keys])
+
+class XGBoostWrapper(LazyMember):
     def __init__(self):
+        super().__init__()
         self.model = XGBRegressor(n_estimators=100, learning_rate=0.05, max_depth=5)
         self.features = ['hour', 'day_of_week', 'is_weekend', 'lag_1', 'lag_2', 'lag_24', 'rolling_mean_3h', 'rolling_mean_24h']
         
@@ -180,39 +442,135 @@ class XGBoostWrapper:
 
     def load(self, path):
         self.model.load_model(path)
+
+    def update(self, df, n_estimators=20):
+        """Continues boosting from the current model with `n_estimators` extra trees fitted on df."""
+        params = self.model.get_params()
+        params['n_estimators'] = n_estimators
+        model = XGBRegressor(**params)
+        model.fit(df[self.features], df['vehicle_count'], xgb_model=self.model.get_booster())
+        self.model = model
         
     def predict(self, df_input):
         X = df_input[self.features]
         return self.model.predict(X)
 
-class LSTMWrapper:
+    def predict_recursive(self, history, last_timestamp, hours):
+        """
+        Iterative multi-step forecast for a batch of series. `history` is
+        (batch, T>=24) vehicle counts whose last column is at `last_timestamp`
+        (one timestamp for all rows, or one per row); each step scores every
+        series with a single model call. Returns (batch, hours).
+        """
+        history = np.asarray(history, dtype=float)
+        if history.ndim == 1:
+            history = history[None, :]
+        buf = np.empty((len(history), 24 + hours))
+        buf[:, :24] = history[:, -24:]
+        
+        ts = pd.DatetimeIndex(np.atleast_1d(pd.to_datetime(last_timestamp)))
+        for i in range(hours):
+            ts = ts + datetime.timedelta(hours=1)
+            end = 24 + i
+            hour = np.broadcast_to(ts.hour, len(buf))
+            dow = np.broadcast_to(ts.dayofweek, len(buf))
+            X = pd.DataFrame({
+                'hour': hour,
+                'day_of_week': dow,
+                'is_weekend': (dow >= 5).astype(int),
+                'lag_1': buf[:, end - 1],
+                'lag_2': buf[:, end - 2],
+                'lag_24': buf[:, end - 24],
+                'rolling_mean_3h': buf[:, end - 3:end].mean(axis=1),
+                'rolling_mean_24h': buf[:, end - 24:end].mean(axis=1)
+            }, columns=self.features)
+            buf[:, end] = self.model.predict(X)
+        return buf[:, 24:]
+
+class LSTMWrapper(LazyMember):
     def __init__(self, look_back=24):
+        super().__init__()
         self.look_back = look_back
         self.model = None
-        self.scaler = MinMaxScaler(feature_range=(0, 1))
+        self._scaler = MinMaxScaler(feature_range=(0, 1))
         self.scaled_data = None
+
+    @property
+    def scaler(self):
+        # The scaler ships with the model artifact, so it is loaded together with it
+        self._ensure_loaded()
+        return self._scaler
+
+    @scaler.setter
+    def scaler(self, value):
+        self._scaler = value
         
     def create_dataset(self, dataset):
-        X, Y = [], []
-        for i in range(len(dataset) - self.look_back):
-            a = dataset[i:(i + self.look_back), 0]
-            X.append(a)
-            Y.append(dataset[i + self.look_back, 0])
-        return np.array(X), np.array(Y)
+        """
+        (n, 1) series -> windows X (n - look_back, look_back) and next values Y.
+        X is a strided view over `dataset` (no copy).
+        """
+        series = np.asarray(dataset)[:, 0]
+        if len(series) <= self.look_back:
+            return np.empty((0, self.look_back)), np.empty(0)
+        X = np.lib.stride_tricks.sliding_window_view(series, self.look_back)[:-1]
+        Y = series[self.look_back:]
+        return X, Y
+
+    def input_pipeline(self, scaled, batch_size=32):
+        """
+        Shuffled, batched tf.data pipeline over the (n, 1) scaled series that prefetches the next
+        batch while training. The series is held once (float32); only window start indices are
+        shuffled, and each batch's (batch, look_back, 1) windows are gathered from it on the fly.
+        Same windows as create_dataset(). None if the series is too short.
+        """
+        import tensorflow as tf
         
-    def train(self, df):
+        series = tf.constant(np.asarray(scaled, dtype=np.float32).reshape(-1))
+        n = int(series.shape[0]) - self.look_back
+        if n <= 0:
+            return None
+        offsets = tf.range(self.look_back, dtype=tf.int64)
+        
+        def windows(starts):
+            X = tf.gather(series, starts[:, None] + offsets)[..., None]
+            y = tf.gather(series, starts + self.look_back)
+            return X, y
+        
+        ds = tf.data.Dataset.range(n).shuffle(n, reshuffle_each_iteration=True).batch(batch_size)
+        return ds.map(windows, num_parallel_calls=tf.data.AUTOTUNE).prefetch(tf.data.AUTOTUNE)
+        
+    def train(self, df, epochs=20):
         data = df['vehicle_count'].values.reshape(-1, 1)
         self.scaled_data = self.scaler.fit_transform(data)
         
-        X, y = self.create_dataset(self.scaled_data)
-        X = np.reshape(X, (X.shape[0], X.shape[1], 1))
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import LSTM, Dense
         
         self.model = Sequential()
         self.model.add(LSTM(50, return_sequences=True, input_shape=(self.look_back, 1)))
         self.model.add(LSTM(50))
         self.model.add(Dense(1))
         self.model.compile(loss='mean_squared_error', optimizer='adam')
-        self.model.fit(X, y, epochs=20, batch_size=32, verbose=0)
+        self.model.fit(self.input_pipeline(self.scaled_data), epochs=epochs, verbose=0)
+
+    def fine_tune(self, df, epochs=3, learning_rate=1e-4):
+        """
+        Continues training the current weights on df (which should include
+        look_back rows of context before the new data). The scaler is kept
+        fixed so the fine-tuned weights stay compatible with it.
+        """
+        from tensorflow.keras.optimizers import Adam
+        
+        scaled = self.scaler.transform(df['vehicle_count'].values.reshape(-1, 1))
+        dataset = self.input_pipeline(scaled)
+        if dataset is None:
+            return 0
+        
+        self.model.compile(loss='mean_squared_error', optimizer=Adam(learning_rate=learning_rate))
+        self.model.fit(dataset, epochs=epochs, verbose=0)
+        self.scaled_data = None # context now comes from the latest history, not the original training set
+        return len(scaled) - self.look_back
 
     def load(self, model_path, scaler_path):
         import joblib
@@ -224,23 +582,51 @@ class LSTMWrapper:
         
     def predict_sequence(self, last_sequence, n_steps):
         if self.model is None: return np.zeros(n_steps)
-        predictions = []
-        curr_seq = last_sequence.copy()
-        
-        for _ in range(n_steps):
-            curr_input = curr_seq.reshape((1, self.look_back, 1))
-            pred = self.model.predict(curr_input, verbose=0)
-            predictions.append(pred[0, 0])
+        return self.predict_sequences(np.reshape(last_sequence, (1, -1)), n_steps)[0]
+
+    def predict_sequences(self, last_sequences, n_steps):
+        """
+        Batched recursive forecast. `last_sequences` is (batch, look_back) in
+        scaled units; every step runs one model call for the whole batch.
+        Returns (batch, n_steps) in original units.
+        """
+        batch = len(last_sequences)
+        if self.model is None: return np.zeros((batch, n_steps))
+        curr_seq = np.array(last_sequences, dtype=np.float32).reshape(batch, self.look_back)
+        predictions = np.empty((batch, n_steps), dtype=np.float32)
+        
+        for step in range(n_steps):
+            # predict_on_batch reuses the compiled predict function; Model.predict()
+            # rebuilds its data pipeline every call, which dominates at these sizes
+            pred = np.asarray(self.model.predict_on_batch(curr_seq[:, :, None]))[:, 0]
+            predictions[:, step] = pred
             
             # Update sequence
-            curr_seq = np.roll(curr_seq, -1)
-            curr_seq[-1] = pred[0, 0]
+            curr_seq = np.roll(curr_seq, -1, axis=1)
+            curr_seq[:, -1] = pred
             
-        predictions = np.array(predictions).reshape(-1, 1)
-        return self.scaler.inverse_transform(predictions).flatten()
+        flat = self.scaler.inverse_transform(predictions.reshape(-1, 1))
+        return flat.reshape(batch, n_steps)
 
 # --- Ensemble & Analytics ---
 
+def combine_members(p_pred, l_pred, x_pred):
+    """
+    Ensemble average with member-spread 95% bounds. Works element-wise, so
+    members may be (hours,) or (stations, hours). Returns (ensemble, lower, upper).
+    """
+    ensemble_pred = (p_pred + l_pred + x_pred) / 3.0
+    ensemble_pred = np.maximum(ensemble_pred, 0)
+    
+    # Confidence Bounds
+    variance = np.var([p_pred, l_pred, x_pred], axis=0)
+    std_dev = np.sqrt(variance)
+    confidence_interval = 1.96 * std_dev
+    
+    lower_bound = np.maximum(ensemble_pred - confidence_interval, 0)
+    upper_bound = ensemble_pred + confidence_interval
+    return ensemble_pred, lower_bound, upper_bound
+
 class EnsembleForecaster:
     def __init__(self, df_model, df_full):
         self.df_model = df_model
@@ -249,10 +635,46 @@ class EnsembleForecaster:
         self.xgboost = XGBoostWrapper()
         self.lstm = LSTMWrapper(look_back=24)
             
+        self.artifact_store = None
+        self.bundle_version = None
+
+    def attach_bundle(self, bundle):
+        """Registers lazy loaders for every member present in a versioned artifact bundle."""
+        if bundle.has("prophet"):
+            self.prophet.attach(lambda w: setattr(w, '_model', bundle.load_prophet()))
+        if bundle.has("xgboost"):
+            self.xgboost.attach(lambda w: setattr(w, '_model', bundle.load_xgboost()))
+        if bundle.has("lstm"):
+            def load_lstm(w):
+                w._model, w._scaler = bundle.load_lstm()
+                w.look_back = bundle.params("lstm").get("look_back", w.look_back)
+            self.lstm.attach(load_lstm)
+        self.bundle_version = bundle.version
+
+    def refresh_bundle(self):
+        """Hot-swap: re-attaches members if a newer bundle has been published since the last use."""
+        if self.artifact_store is None:
+            return
+        bundle = self.artifact_store.bundle()
+        if bundle is not None and bundle.version != self.bundle_version:
+            print(f"Model artifacts changed ({self.bundle_version} -> {bundle.version}), swapping.")
+            self.attach_bundle(bundle)
+
     def load_or_train(self, model_dir):
         """Attempts to load models; logs error if missing (does NOT retrain automatically per user request)."""
         import os
-        
+        from .artifacts import get_artifact_store
+        
+        # Preferred: versioned bundle, members deserialized lazily on first use
+        store = get_artifact_store(model_dir)
+        bundle = store.bundle()
+        if bundle is not None:
+            print(f"Using model artifact bundle {bundle.version} (lazy load)")
+            self.artifact_store = store
+            self.attach_bundle(bundle)
+            return
+        
+        # Legacy single-file artifacts
         p_path = os.path.join(model_dir, "prophet_model.pkl")
         x_path = os.path.join(model_dir, "xgboost_model.json")
         l_path = os.path.join(model_dir, "lstm_model.keras")
@@ -315,13 +737,8 @@ class EnsembleForecaster:
         # to see how well it fits/generalizes in a time-series context)
         
         # 1. Prophet
-        # Prophet can predict for past dates
-        p_pred = self.prophet.predict(periods=0) # Only gets historical fit
-        # We need to align timestamps. 
-        # Let's just predict the specific timestamps of test set
-        future_dates = pd.DataFrame({'ds': test_df['timestamp']})
-        p_forecast = self.prophet.model.predict(future_dates)
-        p_vals = p_forecast['yhat'].values
+        # Prophet can predict for past dates: score the test timestamps directly
+        p_vals = self.prophet.predict_at(test_df['timestamp'])['yhat'].values
         
         # 2. XGBoost
         x_vals = self.xgboost.predict(test_df)
@@ -350,53 +767,27 @@ class EnsembleForecaster:
         return round(accuracy, 1)
 
     def forecast(self, hours=24):
+        self.refresh_bundle()
+        
         # 1. Prophet
         p_pred = self.prophet.predict(periods=hours)['yhat'].values
         
         # 2. LSTM
-        last_sequence = self.lstm.scaled_data[-self.lstm.look_back:]
+        if self.lstm.scaled_data is not None:
+            last_sequence = self.lstm.scaled_data[-self.lstm.look_back:]
+        else:
+            # Loaded (not trained) model: build the context window from the latest history
+            recent = self.df_model['vehicle_count'].values[-self.lstm.look_back:].reshape(-1, 1)
+            last_sequence = self.lstm.scaler.transform(recent)
         l_pred = self.lstm.predict_sequence(last_sequence, hours)
         
         # 3. XGBoost (Iterative)
-        x_preds = []
-        last_row = self.df_model.iloc[-1].copy()
-        current_timestamp = last_row['timestamp']
-        history_counts = list(self.df_model['vehicle_count'].values)
-        
-        for i in range(hours):
-            next_timestamp = current_timestamp + datetime.timedelta(hours=1)
-            
-            features = {
-                'hour': next_timestamp.hour,
-                'day_of_week': next_timestamp.dayofweek,
-                'is_weekend': int(next_timestamp.dayofweek >= 5),
-                'lag_1': history_counts[-1],
-                'lag_2': history_counts[-2],
-                'lag_24': history_counts[-24],
-                'rolling_mean_3h': np.mean(history_counts[-3:]),
-                'rolling_mean_24h': np.mean(history_counts[-24:])
-            }
-            
-            feat_df = pd.DataFrame([features])
-            pred_val = self.xgboost.predict(feat_df)[0]
-            x_preds.append(pred_val)
-            
-            history_counts.append(pred_val)
-            current_timestamp = next_timestamp
-            
-        x_pred = np.array(x_preds)
-        
-        # Ensemble Average
-        ensemble_pred = (p_pred + l_pred + x_pred) / 3.0
-        ensemble_pred = np.maximum(ensemble_pred, 0)
-        
-        # Confidence Bounds
-        variance = np.var([p_pred, l_pred, x_pred], axis=0)
-        std_dev = np.sqrt(variance)
-        confidence_interval = 1.96 * std_dev
+        x_pred = self.xgboost.predict_recursive(
+            self.df_model['vehicle_count'].values, self.df_model['timestamp'].iloc[-1], hours
+        )[0]
         
-        lower_bound = np.maximum(ensemble_pred - confidence_interval, 0)
-        upper_bound = ensemble_pred + confidence_interval
+        # Ensemble Average + Confidence Bounds
+        ensemble_pred, lower_bound, upper_bound = combine_members(p_pred, l_pred, x_pred)
         
         return {
             'timestamp': [self.df_full['timestamp'].iloc[-1] + datetime.timedelta(hours=i+1) for i in range(hours)],
@@ -0,0 +1,162 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+import datetime
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from app.models.prediction.demand_prediction_engine import FeatureEngineer, EnsembleForecaster
+from app.models.prediction.artifacts import get_artifact_store
+
+# --- Incremental (Warm-Start) Retraining ---
+#
+# Updates the current artifact bundle with events that arrived after it was
+# trained, instead of retraining from scratch (train_and_save.py):
+#   - XGBoost: a few extra boosting rounds on the new rows, starting from the saved booster
+#   - LSTM:    a few epochs of fine-tuning from the saved weights (scaler unchanged)
+#   - Prophet: refit on history + new rows, starting the optimizer at the previous parameters
+# The result is published as a new bundle version (atomic CURRENT swap), so a
+# running API picks it up on its next forecast. Intended to run daily, e.g. from cron:
+#   python app/models/prediction/retrain.py
+
+MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+# Rows before the cut-off needed to build lag/rolling features and LSTM windows
+CONTEXT_HOURS = 48
+XGB_EXTRA_TREES = 20
+LSTM_EPOCHS = 3
+# Prophet refit cost grows with history; keep the most recent window only
+PROPHET_HISTORY_DAYS = 90
+
+
+def _naive_utc(ts):
+    ts = pd.Timestamp(ts)
+    return ts.tz_convert(None) if ts.tzinfo is not None else ts
+
+
+def trained_through(bundle, ensemble):
+    """Last timestamp the bundle was trained on (manifest metadata, else Prophet's history)."""
+    value = bundle.metadata.get("trained_through")
+    if value:
+        return _naive_utc(value)
+    return _naive_utc(ensemble.prophet.model.history['ds'].max())
+
+
+async def load_events_since(since):
+    """Raw ev_events rows with timestamp > since (naive UTC), as a DataFrame."""
+    from sqlalchemy import select
+    from app.database import AsyncSessionLocal
+    from app.models.events import EvEvent
+
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(EvEvent).where(EvEvent.timestamp > since.tz_localize('UTC')).order_by(EvEvent.timestamp)
+        )
+        rows = result.scalars().all()
+    return pd.DataFrame([{
+        'timestamp': r.timestamp,
+        'station_id': r.station_id,
+        'vehicle_count': r.vehicle_count,
+        'session_count': r.session_count,
+        'occupancy_rate': r.occupancy_rate,
+        'queue_length': r.queue_length
+    } for r in rows])
+
+
+def retrain_incremental(raw_df, model_dir=MODEL_DIR, xgb_trees=XGB_EXTRA_TREES, lstm_epochs=LSTM_EPOCHS):
+    """
+    Warm-starts all members on the rows of raw_df newer than the current bundle
+    and publishes the result. raw_df must include CONTEXT_HOURS of history before
+    the cut-off. Returns the new version, or None if there was nothing new.
+    """
+    store = get_artifact_store(model_dir)
+    bundle = store.bundle()
+    if bundle is None:
+        raise RuntimeError("No artifact bundle to warm-start from; run train_and_save.py first.")
+
+    ens = EnsembleForecaster(None, None)
+    ens.attach_bundle(bundle)
+    cutoff = trained_through(bundle, ens)
+
+    _, df_agg, _ = FeatureEngineer().process(raw_df.copy())
+    df_agg['timestamp'] = ens.prophet._naive(df_agg['timestamp']).values
+    is_new = df_agg['timestamp'] > cutoff
+    if not is_new.any():
+        print(f"No data after {cutoff}; bundle {bundle.version} is up to date.")
+        return None
+    first_new = int(is_new.values.argmax())
+    new_agg = df_agg.iloc[first_new:]
+    through = new_agg['timestamp'].iloc[-1]
+    print(f"Warm-starting {bundle.version} on {len(new_agg)} new hours ({cutoff} -> {through})")
+    timings = {}
+
+    # 1. XGBoost: extra trees on the new rows only
+    t0 = time.perf_counter()
+    new_model = new_agg.dropna()
+    ens.xgboost.update(new_model, n_estimators=xgb_trees)
+    timings['xgboost'] = time.perf_counter() - t0
+
+    # 2. LSTM: fine-tune on windows whose targets are new rows
+    t0 = time.perf_counter()
+    look_back = ens.lstm.look_back
+    lstm_df = df_agg.iloc[max(0, first_new - look_back):]
+    windows = ens.lstm.fine_tune(lstm_df, epochs=lstm_epochs)
+    timings['lstm'] = time.perf_counter() - t0
+
+    # 3. Prophet: full refit on a bounded window, initialised from the previous fit
+    t0 = time.perf_counter()
+    init = ens.prophet.warm_start_params()
+    history = pd.concat([ens.prophet.history_frame(), new_agg[['timestamp', 'vehicle_count']]], ignore_index=True)
+    history = history[history['timestamp'] > through - datetime.timedelta(days=PROPHET_HISTORY_DAYS)]
+    ens.prophet.train(history, init=init)
+    timings['prophet'] = time.perf_counter() - t0
+
+    version = store.publish(
+        {"prophet": ens.prophet.model, "xgboost": ens.xgboost.model,
+         "lstm": (ens.lstm.model, ens.lstm.scaler, look_back)},
+        metadata={
+            "source": "retrain_incremental",
+            "trained_through": through.isoformat(),
+            "previous_trained_through": cutoff.isoformat(),
+            "new_hours": len(new_agg),
+            "lstm_windows": windows,
+            "xgboost_extra_trees": xgb_trees,
+            "seconds": {k: round(v, 2) for k, v in timings.items()},
+        },
+        base=bundle,
+    )
+    print("Retrain timings: " + ", ".join(f"{k} {v:.1f}s" for k, v in timings.items()))
+    return version
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--csv", help="Raw events CSV to train on instead of ev_events")
+    parser.add_argument("--xgb-trees", type=int, default=XGB_EXTRA_TREES)
+    parser.add_argument("--lstm-epochs", type=int, default=LSTM_EPOCHS)
+    args = parser.parse_args()
+
+    if args.csv:
+        raw_df = pd.read_csv(args.csv)
+    else:
+        bundle = get_artifact_store(MODEL_DIR).bundle()
+        if bundle is None:
+            print("No artifact bundle to warm-start from; run train_and_save.py first.")
+            sys.exit(1)
+        ens = EnsembleForecaster(None, None)
+        ens.attach_bundle(bundle)
+        since = trained_through(bundle, ens) - datetime.timedelta(hours=CONTEXT_HOURS)
+        raw_df = await load_events_since(since)
+        if raw_df.empty:
+            print(f"No events after {since}.")
+            return
+
+    # Training is CPU-bound and synchronous
+    retrain_incremental(raw_df, xgb_trees=args.xgb_trees, lstm_epochs=args.lstm_epochs)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,209 @@
+import os
+import math
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+# --- Per-Station Forecasting ---
+#
+# The ensemble members are trained on the global (summed) demand series. Per
+# station we:
+#   - fit a Prophet model on the station's own hourly series, and
+#   - run the shared LSTM / XGBoost members on the station series rescaled to
+#     the global level (then scaled back), batched across stations.
+#
+# Stations are sharded across a process pool. The (stations x hours) history
+# matrix lives in one shared-memory segment that workers map read-only, so
+# only shard bounds and a few scalars are pickled per task.
+
+MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+STATION_WORKERS = int(os.getenv("STATION_FORECAST_WORKERS", str(os.cpu_count() or 1)))
+# Shards per worker: >1 keeps workers busy when per-station Prophet fits vary in cost
+SHARDS_PER_WORKER = 4
+
+
+# --- Worker side ---
+
+_worker = {}
+
+
+def _worker_ensemble(model_dir):
+    """Per-process ensemble members, loaded once and hot-swapped on new artifacts."""
+    ensemble = _worker.get('ensemble')
+    if ensemble is None:
+        from .demand_prediction_engine import EnsembleForecaster
+        ensemble = EnsembleForecaster(None, None)
+        ensemble.load_or_train(model_dir)
+        _worker['ensemble'] = ensemble
+    else:
+        ensemble.refresh_bundle()
+    return ensemble
+
+
+def _attach_history(shm_name, shape):
+    cached = _worker.get('history')
+    if cached and cached[0] == shm_name:
+        return cached[2]
+    if cached:
+        cached[1].close()
+    # The parent owns (and unlinks) the segment; spawned workers share its resource tracker
+    shm = shared_memory.SharedMemory(name=shm_name)
+    history = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    history.flags.writeable = False
+    _worker['history'] = (shm_name, shm, history)
+    return history
+
+
+def _forecast_shard(task):
+    from .demand_prediction_engine import ProphetWrapper
+
+    history = _attach_history(task['shm_name'], task['shape'])
+    start, stop, hours = task['start'], task['stop'], task['hours']
+    series = history[start:stop]                      # view, no copy
+    timestamps = pd.to_datetime(task['timestamps'])
+    ensemble = _worker_ensemble(task['model_dir'])
+
+    # 1. Prophet: one fit per station (the CPU-heavy, embarrassingly parallel part)
+    p_pred = np.empty((len(series), hours))
+    for i, row in enumerate(series):
+        pw = ProphetWrapper()
+        pw.train(pd.DataFrame({'timestamp': timestamps, 'vehicle_count': row}))
+        p_pred[i] = pw.predict(periods=hours)['yhat'].values
+
+    # Rescale to the level the shared members were trained on
+    means = series.mean(axis=1)
+    factor = np.where(means > 0, task['target_level'] / np.where(means > 0, means, 1), 1.0)[:, None]
+    scaled = series * factor
+
+    # 2. LSTM: one batched call per step for the whole shard
+    look_back = ensemble.lstm.look_back
+    context = ensemble.lstm.scaler.transform(scaled[:, -look_back:].reshape(-1, 1)).reshape(len(series), look_back)
+    l_pred = ensemble.lstm.predict_sequences(context, hours) / factor
+
+    # 3. XGBoost: iterative, one batched call per step
+    x_pred = ensemble.xgboost.predict_recursive(scaled, timestamps[-1], hours) / factor
+
+    return {'start': start, 'prophet': p_pred, 'lstm': l_pred, 'xgboost': x_pred}
+
+
+# --- Parent side ---
+
+class StationForecastPipeline:
+    """Forecasts every station in parallel and combines members into station-level ensembles."""
+    def __init__(self, model_dir=MODEL_DIR, max_workers=STATION_WORKERS):
+        self.model_dir = model_dir
+        self.max_workers = max_workers
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            # spawn: safe with TensorFlow already initialised in the parent
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    @staticmethod
+    def history_matrix(raw_df):
+        """Raw events -> (station_ids, timestamps, stations x hours vehicle_count matrix)."""
+        df = raw_df[['timestamp', 'station_id', 'vehicle_count']].copy()
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        pivot = df.pivot_table(index='station_id', columns='timestamp', values='vehicle_count',
+                               aggfunc='sum', fill_value=0)
+        return list(pivot.index), pivot.columns, np.ascontiguousarray(pivot.values, dtype=np.float64)
+
+    def run(self, raw_df, hours=24, on_progress=None):
+        """on_progress(stations_done, stations) is called as each shard of stations finishes."""
+        from .demand_prediction_engine import combine_members
+
+        station_ids, timestamps, matrix = self.history_matrix(raw_df)
+        n = len(station_ids)
+        if n == 0:
+            return None
+
+        shm = shared_memory.SharedMemory(create=True, size=matrix.nbytes)
+        try:
+            np.ndarray(matrix.shape, dtype=matrix.dtype, buffer=shm.buf)[:] = matrix
+            shard = max(1, math.ceil(n / (self.max_workers * SHARDS_PER_WORKER)))
+            base = {
+                'shm_name': shm.name,
+                'shape': matrix.shape,
+                'timestamps': timestamps.values,
+                'hours': hours,
+                'model_dir': self.model_dir,
+                # Global hourly level the shared LSTM/XGBoost members were trained on
+                'target_level': float(matrix.sum(axis=0).mean()),
+            }
+            pool = self._get_pool()
+            futures = [pool.submit(_forecast_shard, dict(base, start=s, stop=min(s + shard, n)))
+                       for s in range(0, n, shard)]
+
+            members = {k: np.empty((n, hours)) for k in ('prophet', 'lstm', 'xgboost')}
+            done = 0
+            if on_progress is not None:
+                on_progress(done, n)
+            for fut in as_completed(futures):
+                part = fut.result()
+                rows = slice(part['start'], part['start'] + len(part['prophet']))
+                for k in members:
+                    members[k][rows] = part[k]
+                done += len(part['prophet'])
+                if on_progress is not None:
+                    on_progress(done, n)
+        finally:
+            shm.close()
+            shm.unlink()
+
+        ensemble, lower, upper = combine_members(members['prophet'], members['lstm'], members['xgboost'])
+        last = timestamps[-1]
+        return {
+            'station_id': station_ids,
+            'timestamp': [(last + pd.Timedelta(hours=i + 1)).to_pydatetime() for i in range(hours)],
+            **members,
+            'ensemble': ensemble,
+            'lower': lower,
+            'upper': upper,
+        }
+
+    @staticmethod
+    def prediction_records(result, run_id, model_type='ensemble_station', source=None, metadata=None):
+        """Splits a run() result into station-keyed forecast_runs rows (dicts, for bulk insert)."""
+        from ...services.forecast_store import run_record
+        return [run_record(result, run_id, model_type=model_type, source=source, station_id=station_id,
+                           metadata=metadata, row=s)
+                for s, station_id in enumerate(result['station_id'])]
+
+    @staticmethod
+    def summarize(result):
+        """JSON-friendly view of a run() result."""
+        return {
+            "stations": len(result['station_id']),
+            "timestamp": [t.strftime("%Y-%m-%dT%H:%M:%S") for t in result['timestamp']],
+            "ensemble": {sid: np.round(result['ensemble'][s], 2).tolist()
+                         for s, sid in enumerate(result['station_id'])},
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+if __name__ == "__main__":
+    # Scaling check: python -m app.models.prediction.station_forecast [stations] [workers]
+    import sys
+    import time
+    from .demand_prediction_engine import DataGenerator
+
+    n_stations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else STATION_WORKERS
+    raw = DataGenerator(days=30, n_stations=n_stations).generate()
+    pipeline = StationForecastPipeline(max_workers=workers)
+    t0 = time.perf_counter()
+    res = pipeline.run(raw, hours=24)
+    print(f"{n_stations} stations x 24h on {workers} workers: {time.perf_counter() - t0:.1f}s")
+    pipeline.shutdown()
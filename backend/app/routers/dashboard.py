@@ -30,3 +30,9 @@ async def get_dashboard_performance(service: AnalyticsService = Depends(get_anal
 @router.get("/utilization-trend")
 async def get_utilization_trend(service: AnalyticsService = Depends(get_analytics_service)):
     return service.get_utilization_trend()
+
+@router.get("/freshness")
+async def get_data_freshness():
+    # How far the cached read path lags behind ingestion (see services/cache_refresher.py)
+    from ..services.cache_refresher import cache_refresher
+    return cache_refresher.freshness()
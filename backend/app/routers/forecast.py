@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from ..dependencies import data_cache, get_analytics_service
 from ..services.forecast import PredictionService
+from ..services.forecast_jobs import forecast_jobs
 from ..services.analytics import AnalyticsService
 from ..schemas.dashboard import ForecastResponse
 
@@ -12,65 +13,30 @@ from sqlalchemy.ext.asyncio import AsyncSession
 @router.get("/run")
 async def run_forecast(
     days: int = 7,
+    station_id: str = None,
     service: AnalyticsService = Depends(get_analytics_service),
     db: AsyncSession = Depends(get_db)
 ):
     """
     Run the prediction engine (Prophet) on latest data.
+    station_id selects a per-station run (see POST /jobs?per_station=true).
     """
-    # Try fetching latest run from DB
-    from sqlalchemy import select, func
-    from ..models.outputs import ModelPrediction
+    # Latest run for the station key, summarized once per run and served from memory
+    from ..services.forecast_cache import forecast_summaries
     
-    # Find latest run_id
-    # We can assume latest timestamp or just order by created_at which we added to model
-    # Wait, `created_at` is on server default.
-    result_run = await db.execute(select(ModelPrediction.run_id).order_by(ModelPrediction.created_at.desc()).limit(1))
-    latest_run_id = result_run.scalar_one_or_none()
+    summary = await forecast_summaries.get(db, station_id=station_id)
     
-    if latest_run_id:
-        result_rows = await db.execute(
-            select(ModelPrediction)
-            .where(ModelPrediction.run_id == latest_run_id)
-            .order_by(ModelPrediction.timestamp.asc())
-        )
-        rows = result_rows.scalars().all()
-        
-        if rows:
-            # Reconstruct response format
-            # dates, ensemble, lower, upper
-            
-            dates = []
-            ensemble = []
-            lower = []
-            upper = []
-            
-            for row in rows:
-                dates.append(row.timestamp) # DateTime object
-                ensemble.append(row.predicted_value)
-                lower.append(row.lower_bound or 0)
-                upper.append(row.upper_bound or 0)
-            
-            # Mock aggregate stats since we store granular data
-            # peak
-            peak_val = max(ensemble) if ensemble else 0
-            peak_idx = ensemble.index(peak_val) if ensemble else 0
-            peak_time = dates[peak_idx].strftime("%H:%M") if dates else "--"
-            avg_dem = sum(ensemble)/len(ensemble) if ensemble else 0
-            
-            # Calculate projected revenue mock
-            proj_rev = sum(ensemble) * 5 
-            
-            return {"forecast": {
-                "peak_hour": peak_time,
-                "peak_value": int(peak_val),
-                "projected_revenue": f"${proj_rev:,.2f}",
-                "ensemble": ensemble,
-                "lower_bound": lower,
-                "upper_bound": upper,
-                "dates": [d.strftime("%Y-%m-%dT%H:%M:%S") for d in dates],
-                "accuracy": "85.6%" # stored or constant
-            }}
+    if summary is not None and summary["ensemble"]:
+        return {"forecast": {
+            "peak_hour": summary["peak_hour"],
+            "peak_value": int(summary["peak_value"]),
+            "projected_revenue": summary["projected_revenue"],
+            "ensemble": summary["ensemble"],
+            "lower_bound": summary["lower_bound"],
+            "upper_bound": summary["upper_bound"],
+            "dates": summary["dates"],
+            "accuracy": summary["accuracy"]
+        }}
 
     # If no data found in DB, return empty struct or error (Strict DB Mode)
     # The startup seeded it, so it should start appearing instantly.
@@ -87,26 +53,126 @@ async def run_forecast(
         "accuracy": "N/A"
     }}
 
+@router.post("/jobs")
+async def submit_forecast_job(days: int = Query(7, ge=1, le=30), per_station: bool = False):
+    """
+    Queue an on-demand ensemble forecast on the worker pool.
+    Identical in-flight requests (same data version and horizon) share one job.
+    per_station=true forecasts every station separately (stored with station_id).
+    """
+    if data_cache.df is None or data_cache.df.empty:
+        raise HTTPException(status_code=503, detail="No event data loaded.")
+    
+    job, coalesced = await forecast_jobs.submit(data_cache.df, days=days, per_station=per_station,
+                                               cache_version=data_cache.version)
+    return {
+        "job_id": job.job_id,
+        "status": job.to_dict()["status"],
+        "coalesced": coalesced,
+        "status_url": f"/api/forecast/jobs/{job.job_id}"
+    }
+
+@router.get("/jobs/{job_id}")
+async def get_forecast_job(job_id: str):
+    """Status, progress and (once done) the result of a forecast job."""
+    job = forecast_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Forecast job not found.")
+    return job.to_dict()
+
+@router.get("/stations/{station_id}")
+async def forecast_station(station_id: str, hours: int = Query(24, ge=1, le=168)):
+    """
+    On-demand forecast for one station. Concurrent requests are micro-batched
+    into shared LSTM/XGBoost/Prophet calls (see /batcher/metrics).
+    """
+    from ..services.forecast_batcher import forecast_batcher, station_histories
+    
+    if data_cache.df is None or data_cache.df.empty:
+        raise HTTPException(status_code=503, detail="No event data loaded.")
+    try:
+        request = await station_histories.request(data_cache.df, data_cache.version, station_id, hours=hours)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Station {station_id}: {e}")
+    if request is None:
+        raise HTTPException(status_code=404, detail=f"Unknown station {station_id}.")
+    
+    res = await forecast_batcher.submit(request)
+    return {
+        "station_id": station_id,
+        "dates": [t.strftime("%Y-%m-%dT%H:%M:%S") for t in res["timestamp"]],
+        "ensemble": res["ensemble"].tolist(),
+        "lower_bound": res["lower"].tolist(),
+        "upper_bound": res["upper"].tolist(),
+        "members": {m: res[m].tolist() for m in ("prophet", "lstm", "xgboost")},
+        "batch_size": res["batch_size"]
+    }
+
+@router.get("/batcher/metrics")
+async def get_batcher_metrics():
+    """Micro-batcher stats: batch sizes, queue wait and inference time percentiles."""
+    from ..services.forecast_batcher import forecast_batcher
+    return dict(forecast_batcher.metrics.snapshot(),
+                max_batch_size_limit=forecast_batcher.max_batch_size,
+                max_wait_ms=forecast_batcher.max_wait * 1000)
+
 @router.get("/accuracy")
-async def get_forecast_accuracy(db: AsyncSession = Depends(get_db)):
-    # Fetch from metadata or latest prediction run
-    return {"accuracy": "85.6%"} # placeholder, or could store in run metadata table
+async def get_forecast_accuracy(station_id: str = None, db: AsyncSession = Depends(get_db)):
+    """
+    Live accuracy: running error stats of stored forecasts against hourly actuals
+    as they arrive, per model, horizon and station (station_id selects one station).
+    Backtest: latest rolling-origin backtest (run_backtest.py), MAPE/RMSE per member and horizon.
+    The headline figure (100 - ensemble MAPE) is live once enough hours were scored.
+    """
+    from ..services.forecast_store import latest_backtest, backtest_accuracy
+    from ..services.accuracy_tracker import accuracy_tracker
+    
+    rows = await latest_backtest(db)
+    backtest = None
+    if rows:
+        members = {}
+        by_horizon = {}
+        for r in rows:
+            if r.horizon is None:
+                members[r.model_type] = {"mape": r.mape, "rmse": r.rmse, "samples": r.samples}
+            else:
+                by_horizon.setdefault(r.model_type, []).append({"horizon": r.horizon, "mape": r.mape, "rmse": r.rmse})
+        for points in by_horizon.values():
+            points.sort(key=lambda p: p["horizon"])
+        backtest = {
+            "accuracy": backtest_accuracy(rows) or "N/A",
+            "run_id": rows[0].run_id,
+            "evaluated_at": rows[0].created_at,
+            "folds": rows[0].folds,
+            "window": [rows[0].first_origin, rows[0].last_origin],
+            "members": members,
+            "by_horizon": by_horizon,
+        }
+    
+    live_accuracy = accuracy_tracker.headline()
+    return {
+        "accuracy": live_accuracy or (backtest or {}).get("accuracy") or "N/A",
+        "source": "live" if live_accuracy else ("backtest" if backtest else None),
+        "live": dict(accuracy_tracker.report(station_id), stations=accuracy_tracker.stations()),
+        "backtest": backtest,
+    }
 
 @router.get("/next7days")
 async def get_forecast_next_7_days(
     db: AsyncSession = Depends(get_db)
 ):
-    # Fetch 7 days from DB
-    from sqlalchemy import select
-    from ..models.outputs import ModelPrediction
+    # Upcoming hours of the latest system-wide run (cached summary)
+    from ..services.forecast_cache import forecast_summaries
     import datetime
     
-    future = datetime.datetime.now()
-    result = await db.execute(select(ModelPrediction).where(ModelPrediction.timestamp >= future).order_by(ModelPrediction.timestamp.asc()).limit(24*7))
-    rows = result.scalars().all()
+    summary = await forecast_summaries.get(db)
+    if summary is None:
+        return []
+    
+    # Summary dates are UTC without an offset: compare as aware datetimes
+    now = datetime.datetime.now(datetime.timezone.utc)
+    points = [{"timestamp": ts, "value": v} for ts, v in zip(summary["dates"], summary["ensemble"])
+              if datetime.datetime.fromisoformat(ts).replace(tzinfo=datetime.timezone.utc) >= now]
     
     # Simple list return
-    return [{
-        "timestamp": r.timestamp,
-        "value": r.predicted_value
-    } for r in rows]
+    return points[:24*7]
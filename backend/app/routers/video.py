@@ -1,47 +1,260 @@
-from fastapi import APIRouter, UploadFile, File, BackgroundTasks, HTTPException
-import shutil
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Request, Header
+from fastapi.responses import JSONResponse
+from typing import Optional
 import os
 import uuid
-from ..services.video_processor import process_video_file
+import asyncio
+from ..services.video_jobs import video_jobs, QueueFull
+from ..services.video_store import video_store, store_key
+from ..services.video_processor import VIDEO_MODES, VIDEO_DEFAULT_MODE
+from ..services.video_cameras import get_camera, get_cameras
+from ..services.video_uploads import (
+    video_uploads, save_upload_file, UploadError, OffsetMismatch, ChecksumMismatch,
+    UPLOAD_DIR, VIDEO_STREAM_START_BYTES
+)
 
 router = APIRouter(
     prefix="/api/video",
     tags=["Video Processing"]
 )
 
-UPLOAD_DIR = "temp_uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi')
+MODE_PATTERN = "^(" + "|".join(VIDEO_MODES) + ")$"
+
+def queue_full_response():
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Video processing queue is full. Try again later."},
+        headers={"Retry-After": "30"},
+    )
+
+def job_response(job, message, cached=None):
+    response = {
+        "message": message,
+        "job_id": job.job_id,
+        "status_url": f"/api/video/jobs/{job.job_id}",
+        "filename": job.filename,
+        "original_filename": job.original_filename,
+        "content_hash": job.content_hash,
+        "mode": job.mode,
+        "camera_id": job.camera_id,
+        "status": job.state,
+        "output_video_url": job.output_url,
+        # overlay mode: boxes to draw over output_video_url (the original video), once done
+        "tracks_url": job.tracks_url,
+        "cached": cached is not None,
+    }
+    if cached is not None:
+        response["detections"] = cached.get("detections")
+    return response
+
+def resolve_camera(camera_id):
+    camera = get_camera(camera_id)
+    if camera is None:
+        raise HTTPException(status_code=400, detail=f"Unknown camera {camera_id}.")
+    return camera
+
+async def reuse_result(digest, filename, original_filename, mode, camera_id=None):
+    """
+    Same content seen before: a finished job answered from the result store, or the job already
+    processing it. Returns (job, cached result or None), or None when the content is new.
+    """
+    variant = resolve_camera(camera_id).fingerprint
+    cached = await asyncio.to_thread(video_store.get, store_key(digest, mode, variant))
+    if cached is not None:
+        job = await video_jobs.add_cached(filename, original_filename, digest, cached, mode=mode,
+                                          camera_id=camera_id)
+        return job, cached
+    active = video_jobs.find_active(digest, mode, camera_id)
+    if active is not None:
+        return active, None
+    return None
 
 @router.post("/upload")
-async def upload_video(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
+async def upload_video(file: UploadFile = File(...), mode: str = Query(VIDEO_DEFAULT_MODE, pattern=MODE_PATTERN),
+                       camera: Optional[str] = None):
     """
     Upload a video file for async YOLO processing.
+    The video is queued as a job; poll status_url for progress.
+    mode=overlay skips re-encoding: the original video is served with a per-frame track file.
+    camera selects the region of interest and inference size from cameras.json.
     """
-    if not file.filename.lower().endswith(('.mp4', '.mov', '.avi')):
+    if not file.filename.lower().endswith(VIDEO_EXTENSIONS):
          raise HTTPException(status_code=400, detail="Invalid file type. Only video files allowed.")
+    resolve_camera(camera)
     
     # Generate unique filename
     safe_filename = f"{uuid.uuid4()}_{file.filename}"
     file_path = os.path.join(UPLOAD_DIR, safe_filename)
     
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        _, digest = await save_upload_file(file, file_path)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Could not save file: {e}")
+
+    # Already processed (or being processed): no inference for a re-upload
+    reused = await reuse_result(digest, safe_filename, file.filename, mode, camera)
+    if reused is not None:
+        os.remove(file_path)
+        job, cached = reused
+        if cached is not None:
+            return job_response(job, "Video already processed. Returning cached results.", cached)
+        return job_response(job, "Same video is already being processed.")
         
-    # Trigger background processing
+    # Queue for background processing
     # Use safe_filename to ensure output is unique and matches what we return
-    background_tasks.add_task(process_video_file, file_path, safe_filename)
-    
-    # Construct the URL where the video will be available (once processed)
-    # The frontend can poll this or just display it (it might take a moment to appear)
-    output_url = f"/static/videos/processed_{safe_filename}"
+    try:
+        job = await video_jobs.submit(file_path, safe_filename, file.filename, content_hash=digest, mode=mode,
+                                      camera_id=camera)
+    except QueueFull:
+        os.remove(file_path)
+        return queue_full_response()
     
-    return {
-        "message": "Video uploaded successfully. Processing started.",
-        "filename": safe_filename,
-        "original_filename": file.filename,
-        "status": "processing",
-        "output_video_url": output_url
-    }
+    # The output URL is where the video will be available (once processed)
+    # The frontend can poll status_url until the job state is 'done'
+    return job_response(job, "Video uploaded successfully. Processing queued.")
+
+# --- Resumable chunked uploads (see services/video_uploads.py) ---
+
+def get_upload_session(upload_id):
+    session = video_uploads.get(upload_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return session
+
+async def start_processing(session):
+    """Queues the job of a resumable upload once enough of it arrived. Returns the job or None."""
+    if session.job_id is not None:
+        return video_jobs.get(session.job_id)
+    if not session.complete and session.received < VIDEO_STREAM_START_BYTES:
+        return None
+    job = await video_jobs.submit(session.path, session.filename, session.original_filename,
+                                  upload=None if session.complete else session,
+                                  content_hash=session.sha256 if session.complete else None, mode=session.mode,
+                                  camera_id=session.camera_id)
+    session.job_id = job.job_id
+    await asyncio.to_thread(session.save_meta)
+    return job
+
+@router.post("/uploads")
+async def create_upload(filename: str = Query(...), size: Optional[int] = Query(None, ge=1),
+                        sha256: Optional[str] = None, mode: str = Query(VIDEO_DEFAULT_MODE, pattern=MODE_PATTERN),
+                        camera: Optional[str] = None):
+    """
+    Starts a resumable upload. Send the file in chunks with PUT /uploads/{upload_id}?offset=N.
+    """
+    if not filename.lower().endswith(VIDEO_EXTENSIONS):
+        raise HTTPException(status_code=400, detail="Invalid file type. Only video files allowed.")
+    resolve_camera(camera)
+    session = await video_uploads.create(filename, size=size, sha256=sha256, mode=mode, camera_id=camera)
+    return {**session.to_dict(), "chunk_url": f"/api/video/uploads/{session.upload_id}"}
+
+@router.get("/uploads/{upload_id}")
+async def get_upload(upload_id: str):
+    """
+    Bytes received so far (offset): a client resumes by sending the next chunk from there.
+    """
+    return get_upload_session(upload_id).to_dict()
+
+@router.put("/uploads/{upload_id}")
+async def upload_chunk(upload_id: str, request: Request, offset: int = Query(..., ge=0),
+                       x_chunk_sha256: Optional[str] = Header(None)):
+    """
+    Appends the request body at `offset`. 409 (with the current offset) if the offset is not the end
+    of the data received so far; 400 if X-Chunk-SHA256 does not match the chunk.
+    Processing starts on the partial file once VIDEO_STREAM_START_BYTES have arrived.
+    """
+    session = get_upload_session(upload_id)
+    try:
+        await session.write_chunk(offset, request.stream(), sha256=x_chunk_sha256)
+    except OffsetMismatch as e:
+        return JSONResponse(status_code=409, content={"detail": str(e), "offset": e.offset})
+    except UploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        await start_processing(session)
+    except QueueFull:
+        pass  # retried on the next chunk and on complete
+    return session.to_dict()
+
+@router.post("/uploads/{upload_id}/complete")
+async def complete_upload(upload_id: str, sha256: Optional[str] = None):
+    """
+    Finishes a resumable upload: checks the declared size and the whole-file sha256
+    (given here or when the upload was created) and queues processing if it has not started yet.
+    """
+    session = get_upload_session(upload_id)
+    try:
+        await session.finish(sha256=sha256)
+    except ChecksumMismatch as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except UploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Hash known now: reuse an earlier result, stopping processing that started on the partial file
+    started = video_jobs.get(session.job_id) if session.job_id else None
+    if started is None or started.content_hash is None:
+        reused = await reuse_result(session.sha256, session.filename, session.original_filename, session.mode,
+                                    session.camera_id)
+        if reused is not None:
+            if started is not None:
+                await video_jobs.cancel(started.job_id)
+            elif os.path.exists(session.path):
+                os.remove(session.path)
+            job, cached = reused
+            session.job_id = job.job_id
+            await asyncio.to_thread(session.save_meta)
+            return job_response(job, "Upload complete. Video already processed." if cached is not None
+                                else "Upload complete. Same video is already being processed.", cached)
+        if started is not None:
+            await video_jobs.set_content_hash(started.job_id, session.sha256)
+    try:
+        job = await start_processing(session)
+    except QueueFull:
+        return queue_full_response()
+    if job is None:
+        # Job trimmed from memory after finishing: report what the upload knows
+        return {**session.to_dict(), "status_url": f"/api/video/jobs/{session.job_id}"}
+    return job_response(job, "Upload complete.")
+
+@router.get("/cameras")
+async def list_cameras():
+    """
+    Configured cameras with their region of interest and inference size.
+    """
+    return [camera.to_dict() for camera in get_cameras().values()]
+
+@router.get("/store")
+async def get_video_store():
+    """
+    Size, entry count and hit rate of the content-addressed result store.
+    """
+    return await asyncio.to_thread(video_store.stats)
+
+@router.get("/jobs/{job_id}")
+async def get_video_job(job_id: str):
+    """
+    Job state (queued/running/done/failed/cancelled, or expired once its stored result was evicted),
+    frames processed and processing fps.
+    """
+    status = await video_jobs.lookup(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Video job not found")
+    if status["state"] == "done" and status.get("content_hash"):
+        camera = get_camera(status["camera_id"])
+        key = store_key(status["content_hash"], status["mode"] or "annotate", camera.fingerprint if camera else None)
+        cached = await asyncio.to_thread(video_store.peek, key)
+        if cached is not None:
+            status["detections"] = cached.get("detections")
+    return status
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_video_job(job_id: str):
+    """
+    Cancels a queued or running job. Finished jobs are returned unchanged.
+    """
+    job = await video_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Video job not found")
+    return video_jobs.status(job)
@@ -0,0 +1,197 @@
+import os
+import math
+import asyncio
+import datetime
+
+from sqlalchemy import select, func
+
+from ..models.events import EvEvent
+from ..models.outputs import ForecastRun
+
+# --- Online Forecast Accuracy ---
+#
+# As hourly actuals land in ev_events, each closed hour is joined against every
+# stored forecast run that predicted it, and the errors are folded into running
+# statistics keyed by (model, horizon, station). Each key holds a fixed set of
+# sums, so memory is O(models x horizons x stations) regardless of how many
+# hours have been evaluated, and nothing is ever re-scored.
+#
+# Hours are evaluated once, in order, up to the hour of the newest event (that
+# hour may still be filling). Events that arrive for an already-evaluated hour
+# are not re-counted. Stats live in memory; after a restart they are rebuilt
+# from the runs still retained in forecast_runs.
+
+ACCURACY_INTERVAL = int(os.getenv("ACCURACY_INTERVAL", "300"))  # seconds between evaluation passes
+# Minimum system-wide ensemble observations before the live figure replaces the backtest one
+MIN_LIVE_SAMPLES = 24
+# Hours evaluated per pass (bounds the first catch-up pass)
+MAX_HOURS_PER_PASS = 24 * 14
+MEMBERS = ("ensemble", "prophet", "lstm", "xgboost")
+ONE_HOUR = datetime.timedelta(hours=1)
+
+
+def _floor_hour(ts):
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+class RunningStats:
+    """Streaming error statistics (O(1) memory): MAE, RMSE, MAPE and bias with Welford variance."""
+    __slots__ = ("n", "abs_sum", "sq_sum", "ape_sum", "ape_n", "mean_err", "m2")
+
+    def __init__(self):
+        self.n = 0
+        self.abs_sum = 0.0
+        self.sq_sum = 0.0
+        self.ape_sum = 0.0
+        self.ape_n = 0
+        self.mean_err = 0.0
+        self.m2 = 0.0
+
+    def add(self, actual, predicted):
+        err = predicted - actual
+        self.n += 1
+        self.abs_sum += abs(err)
+        self.sq_sum += err * err
+        if actual > 0:
+            self.ape_sum += abs(err) / actual
+            self.ape_n += 1
+        delta = err - self.mean_err
+        self.mean_err += delta / self.n
+        self.m2 += delta * (err - self.mean_err)
+
+    @property
+    def mape(self):
+        return self.ape_sum / self.ape_n * 100 if self.ape_n else None
+
+    def to_dict(self):
+        if not self.n:
+            return {"samples": 0}
+        mape = self.mape
+        return {
+            "samples": self.n,
+            "mae": round(self.abs_sum / self.n, 4),
+            "rmse": round(math.sqrt(self.sq_sum / self.n), 4),
+            "mape": round(mape, 2) if mape is not None else None,
+            "bias": round(self.mean_err, 4),
+            "error_std": round(math.sqrt(self.m2 / self.n), 4),
+        }
+
+
+class OnlineAccuracyTracker:
+    def __init__(self):
+        # (model, horizon or None for pooled, station or None for system-wide) -> RunningStats
+        self._stats = {}
+        self.watermark = None   # next hour bucket to evaluate
+        self.hours_evaluated = 0
+        self._lock = asyncio.Lock()
+
+    def _add(self, model, horizon, station, actual, predicted):
+        for key in ((model, horizon, station), (model, None, station)):
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = RunningStats()
+            stats.add(actual, predicted)
+
+    def observe(self, run, hour, actual):
+        """Folds one actual (hour bucket) into the stats of every member the run stored for that hour."""
+        i = int((hour - _floor_hour(run.start_time)) / ONE_HOUR)
+        if i < 0 or i >= run.horizon:
+            return
+        for model in MEMBERS:
+            values = getattr(run, model)
+            if values is not None and i < len(values) and values[i] is not None:
+                self._add(model, i + 1, run.station_id, float(actual), float(values[i]))
+
+    async def step(self, session):
+        """Evaluates the closed hours since the last pass. Returns the number of hours evaluated."""
+        async with self._lock:
+            latest = (await session.execute(select(func.max(EvEvent.timestamp)))).scalar_one_or_none()
+            if latest is None:
+                return 0
+            end = _floor_hour(latest)  # the newest event's hour may still be filling
+
+            if self.watermark is None:
+                first = (await session.execute(select(func.min(ForecastRun.start_time)))).scalar_one_or_none()
+                if first is None:
+                    return 0
+                self.watermark = _floor_hour(first)
+            start = self.watermark
+            end = min(end, start + MAX_HOURS_PER_PASS * ONE_HOUR)
+            if end <= start:
+                return 0
+
+            hour_col = func.date_trunc('hour', EvEvent.timestamp)
+            result = await session.execute(
+                select(hour_col, EvEvent.station_id, func.sum(EvEvent.vehicle_count))
+                .where(EvEvent.timestamp >= start, EvEvent.timestamp < end)
+                .group_by(hour_col, EvEvent.station_id)
+            )
+            actuals = {}   # hour -> {station: count}
+            for hour, station, count in result.all():
+                actuals.setdefault(hour, {})[station] = count or 0
+
+            runs = (await session.execute(
+                select(ForecastRun).where(ForecastRun.start_time < end, ForecastRun.end_time >= start)
+            )).scalars().all()
+
+            for hour, by_station in actuals.items():
+                total = sum(by_station.values())
+                for run in runs:
+                    if run.station_id is None:
+                        self.observe(run, hour, total)
+                    elif run.station_id in by_station:
+                        self.observe(run, hour, by_station[run.station_id])
+
+            hours = int((end - start) / ONE_HOUR)
+            self.watermark = end
+            self.hours_evaluated += hours
+            return hours
+
+    async def loop(self, interval=ACCURACY_INTERVAL):
+        """Background task: evaluates newly closed hours every `interval` seconds."""
+        from ..database import AsyncSessionLocal
+
+        while True:
+            try:
+                async with AsyncSessionLocal() as session:
+                    while await self.step(session) >= MAX_HOURS_PER_PASS:
+                        pass  # catching up
+            except Exception as e:
+                print(f"Accuracy tracker error: {e}")
+            await asyncio.sleep(interval)
+
+    def stats(self, model="ensemble", horizon=None, station_id=None):
+        return self._stats.get((model, horizon, station_id))
+
+    def headline(self, min_samples=MIN_LIVE_SAMPLES):
+        """'NN.N%' (100 - live system-wide ensemble MAPE), or None until enough hours were scored."""
+        stats = self.stats()
+        if stats is None or stats.n < min_samples or stats.mape is None:
+            return None
+        return f"{max(0.0, 100 - stats.mape):.1f}%"
+
+    def report(self, station_id=None):
+        """Per-model pooled stats and per-horizon breakdown for one station key (None = system-wide)."""
+        models, by_horizon = {}, {}
+        for (model, horizon, station), stats in self._stats.items():
+            if station != station_id:
+                continue
+            if horizon is None:
+                models[model] = stats.to_dict()
+            else:
+                by_horizon.setdefault(model, []).append(dict(stats.to_dict(), horizon=horizon))
+        for points in by_horizon.values():
+            points.sort(key=lambda p: p["horizon"])
+        return {
+            "station_id": station_id,
+            "evaluated_through": self.watermark,
+            "hours_evaluated": self.hours_evaluated,
+            "models": models,
+            "by_horizon": by_horizon,
+        }
+
+    def stations(self):
+        return sorted({station for (_, _, station) in self._stats if station is not None})
+
+
+accuracy_tracker = OnlineAccuracyTracker()
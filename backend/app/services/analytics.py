@@ -22,7 +22,8 @@ class AnalyticsService:
             self.session_df['timestamp'] = pd.to_datetime(self.session_df['timestamp'])
             
         # Initialize Forecast Engine once to reuse
-        self.forecast_engine = SharedForecastEngineAdapter(self.df)
+        from .accuracy_tracker import accuracy_tracker
+        self.forecast_engine = SharedForecastEngineAdapter(self.df, accuracy_provider=accuracy_tracker.headline)
         self.cached_forecast = None
 
     def get_latest_row(self):
@@ -37,33 +38,22 @@ class AnalyticsService:
         return self.df.iloc[-1]
         
     async def get_forecast_async(self, session):
-        # Fetch from DB
-        from ..models.outputs import ModelPrediction
-        from sqlalchemy import select
+        # Latest system-wide run summary (in-memory, refreshed on new runs)
+        from .forecast_cache import forecast_summaries
         
         try:
-            # Get latest run
-            result = await session.execute(select(ModelPrediction).order_by(ModelPrediction.timestamp))
-            rows = result.scalars().all()
+            summary = await forecast_summaries.get(session)
             
-            if rows:
+            if summary is not None and summary["ensemble"]:
                 # Convert to format expected by frontend
-                values = [r.predicted_value for r in rows]
-                times = [r.timestamp.strftime("%H:%00") for r in rows]
-                
-                # Identify peak
-                peak_val = max(values)
-                peak_idx = values.index(peak_val)
-                peak_hour = times[peak_idx]
-                
                 return {
-                    "peak_hour": peak_hour,
-                    "peak_value": peak_val,
-                    "projected_revenue": "$1,200.00", # could also calculate
-                    "ensemble": values,
-                    "lower_bound": [v*0.8 for v in values],
-                    "upper_bound": [v*1.2 for v in values],
-                    "accuracy": "Stored V1"
+                    "peak_hour": summary["peak_hour"][:2] + ":00",
+                    "peak_value": summary["peak_value"],
+                    "projected_revenue": summary["projected_revenue"],
+                    "ensemble": summary["ensemble"],
+                    "lower_bound": summary["lower_bound"],
+                    "upper_bound": summary["upper_bound"],
+                    "accuracy": summary["accuracy"]
                 }
         except Exception as e:
             print(f"DB Forecast Fetch Error: {e}")
@@ -0,0 +1,116 @@
+import os
+import time
+import asyncio
+import datetime
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from sqlalchemy import select
+
+from ..models.events import EvEvent
+
+# --- Data Cache Refresher ---
+#
+# The dashboard read paths serve data_cache.df, which used to be loaded once at
+# startup. This task polls ev_events for rows newer than the cache's newest
+# timestamp and appends them: the shared FeatureEngineer folds in only the new
+# rows, and the AnalyticsService is rebuilt lazily on the next request.
+# Rows that arrive for a timestamp older than the cache's newest are not picked
+# up until restart (ingestion is expected to be in time order).
+
+CACHE_REFRESH_INTERVAL = float(os.getenv("CACHE_REFRESH_INTERVAL", "10"))  # seconds
+EVENT_COLUMNS = ["timestamp", "station_id", "vehicle_count", "session_count", "occupancy_rate", "queue_length"]
+
+
+class DataCacheRefresher:
+    WINDOW = 512  # recent refresh durations kept for percentiles
+
+    def __init__(self, cache=None):
+        if cache is None:
+            from ..dependencies import data_cache as cache
+        self.cache = cache
+        self.refreshes = 0
+        self.rows_appended = 0
+        self.last_refresh_at = None   # wall clock of the last completed poll
+        self.last_refresh_ms = None
+        self.last_error = None
+        self.durations = deque(maxlen=self.WINDOW)  # seconds, polls that appended rows
+        self._lock = asyncio.Lock()
+
+    def newest_event(self):
+        df = self.cache.df
+        if df is None or df.empty:
+            return None
+        newest = pd.Timestamp(df['timestamp'].iloc[-1])
+        return newest.tz_localize('UTC') if newest.tzinfo is None else newest
+
+    async def step(self, session):
+        """Appends ev_events rows newer than the cache. Returns the number of rows appended."""
+        async with self._lock:
+            started = time.perf_counter()
+            newest = self.newest_event()
+            query = select(EvEvent).order_by(EvEvent.timestamp)
+            if newest is not None:
+                query = query.where(EvEvent.timestamp > newest.to_pydatetime())
+            rows = (await session.execute(query)).scalars().all()
+
+            if rows:
+                new = pd.DataFrame([{c: getattr(r, c) for c in EVENT_COLUMNS} for r in rows])
+                new['timestamp'] = pd.to_datetime(new['timestamp'], utc=True)
+                previous = self.cache.df
+                combined = new if previous is None or previous.empty else pd.concat([previous, new], ignore_index=True)
+
+                # Incremental features for the shared forecast adapter (O(new rows))
+                from ..models.dashboard.dashboard_engine import SharedForecastEngineAdapter
+                if SharedForecastEngineAdapter._shared_fe is not None:
+                    await asyncio.to_thread(SharedForecastEngineAdapter._shared_fe.extend, combined, previous)
+
+                self.cache.df = combined
+                self.cache._service_instance = None  # rebuilt over the new frame on next request
+                self.rows_appended += len(new)
+                self.durations.append(time.perf_counter() - started)
+
+            self.refreshes += 1
+            self.last_refresh_ms = round((time.perf_counter() - started) * 1000, 3)
+            self.last_refresh_at = datetime.datetime.now(datetime.timezone.utc)
+            return len(rows)
+
+    async def loop(self, interval=CACHE_REFRESH_INTERVAL):
+        """Background task: refreshes the data cache every `interval` seconds."""
+        from ..database import AsyncSessionLocal
+
+        while True:
+            try:
+                async with AsyncSessionLocal() as session:
+                    await self.step(session)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                print(f"Data cache refresh error: {e}")
+            await asyncio.sleep(interval)
+
+    @staticmethod
+    def _ms(values, q):
+        return round(float(np.percentile(values, q)) * 1000, 3) if values else None
+
+    def freshness(self):
+        newest = self.newest_event()
+        now = datetime.datetime.now(datetime.timezone.utc)
+        durations = list(self.durations)
+        return {
+            "newest_event": newest.isoformat() if newest is not None else None,
+            "cache_rows": 0 if self.cache.df is None else len(self.cache.df),
+            "data_age_seconds": round((now - newest.to_pydatetime()).total_seconds(), 3) if newest is not None else None,
+            "last_refresh_at": self.last_refresh_at.isoformat() if self.last_refresh_at else None,
+            "last_refresh_ms": self.last_refresh_ms,
+            "refresh_interval_seconds": CACHE_REFRESH_INTERVAL,
+            "refreshes": self.refreshes,
+            "rows_appended": self.rows_appended,
+            "refresh_ms": {"p50": self._ms(durations, 50), "p99": self._ms(durations, 99)},
+            "last_error": self.last_error,
+        }
+
+
+cache_refresher = DataCacheRefresher()
@@ -1,14 +1,12 @@
 import pandas as pd
 import numpy as np
 import datetime
-from prophet import Prophet
-from xgboost import XGBRegressor
-from sklearn.preprocessing import MinMaxScaler
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense
 import sys
 import os
 
+from ..models.prediction.demand_prediction_engine import ProphetWrapper
+from .accuracy_tracker import accuracy_tracker
+
 # To allow importing from models directory if strictly needed, 
 # but here we will implement a clean service class suitable for FastAPI usage,
 # potentially reusing the logic cleanly.
@@ -29,13 +27,10 @@ class PredictionService:
         # Aggregate to hourly
         df_agg = df.groupby(pd.Grouper(key='timestamp', freq='H'))['vehicle_count'].sum().reset_index()
         
-        # 1. Prophet
-        p_df = df_agg.rename(columns={'timestamp': 'ds', 'vehicle_count': 'y'})
-        m = Prophet(yearly_seasonality=False, weekly_seasonality=True, daily_seasonality=True)
-        m.fit(p_df)
-        future = m.make_future_dataframe(periods=days * 24, freq='H')
-        forecast = m.predict(future)
-        p_res = forecast[['ds', 'yhat']].tail(days * 24)
+        # 1. Prophet (scores only the future horizon, no sampled intervals)
+        pw = ProphetWrapper()
+        pw.train(df_agg)
+        p_res = pw.predict(periods=days * 24)
         
         # 2. XGBoost (Mocked lightweight version for API speed or simplified)
         # In a real app, we load a saved model. Training on every request is too slow.
@@ -69,42 +64,20 @@ class PredictionService:
             "ensemble": ensemble.tolist(),
             "lower": lower.tolist(),
             "upper": upper.tolist(),
-            "model_accuracy": "88.5%",
+            "model_accuracy": accuracy_tracker.headline() or "N/A",
             "peak_hour": timestamps[peak_idx],
             "avg_demand": round(avg_dem, 2)
         }
 
         # --- Persistence Logic ---
-        # If db_session is provided, save the ensemble forecast
+        # If db_session is provided, save the run (one forecast_runs row)
         if db_session:
              import uuid
-             from ..models.outputs import ModelPrediction
-             
-             run_id = str(uuid.uuid4())
-             
-             for i, ts_str in enumerate(timestamps):
-                 # Convert str back to datetime for DB
-                 ts = datetime.datetime.strptime(ts_str, '%Y-%m-%d %H:%M')
-                 
-                 pred = ModelPrediction(
-                     run_id=run_id,
-                     timestamp=ts,
-                     predicted_value=float(ensemble[i]),
-                     model_type='ensemble',
-                     lower_bound=float(lower[i]),
-                     upper_bound=float(upper[i])
-                 )
-                 db_session.add(pred)
+             from ..models.outputs import ForecastRun
+             from .forecast_store import run_record
              
-             # Don't commit here, let the caller commit if needed, or we can flush?
-             # Given it's a service, we usually let the UoW (dependency) handle commit,
-             # but to be safe if caller expects it done:
-             # But here run_forecast is called by router, router can commit.
-             # However, since we are moving fast, let's try/expect router to commit.
-             # Actually, `run_forecast` currently doesn't await anything, it's CPU bound (Prophet).
-             # Persistence should ideally be async. 
-             # Refactoring to make this async would affect callers.
-             # Let's keep it synchronous here but assume we are in a context where we can add to session.
-             pass
+             record = run_record(result, str(uuid.uuid4()), source="prediction_service", metadata={"days": days})
+             db_session.add(ForecastRun(**record))
+             # Caller (router/UoW) owns the commit
 
         return result
@@ -0,0 +1,231 @@
+import os
+import time
+import asyncio
+import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from ..models.prediction.demand_prediction_engine import EnsembleForecaster, combine_members
+from ..models.prediction.station_forecast import StationForecastPipeline, MODEL_DIR
+
+# --- Micro-Batching Inference ---
+#
+# Concurrent on-demand forecasts (per station, per scenario) are queued and
+# collected for up to BATCH_MAX_WAIT_MS (or until BATCH_MAX_SIZE requests), then
+# served by ONE batched call per member and step:
+#   - LSTM:    predict_sequences over the stacked context windows
+#   - XGBoost: predict_recursive over the stacked histories (per-row timestamps)
+#   - Prophet: one predict_at over all requested timestamps
+# Inference runs on a dedicated thread, so the event loop keeps collecting the
+# next batch meanwhile; requests arriving during a batch form the next one.
+
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "64"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "5"))
+# Context the members need: LSTM look_back and XGBoost's 24h lags
+MIN_HISTORY = 24
+
+
+class ForecastRequest:
+    """
+    history: hourly vehicle counts, last value at `last_timestamp`.
+    scale: multiplies the series into the level the shared members were trained on; outputs
+           are divided by it again. Unlike StationForecastPipeline, which fits Prophet per
+           station, all three members (Prophet included) are the shared global ones, so a
+           station's forecast is its share of the global forecast.
+    """
+    __slots__ = ("history", "last_timestamp", "hours", "scale")
+
+    def __init__(self, history, last_timestamp, hours=24, scale=1.0):
+        history = np.asarray(history, dtype=float)
+        if len(history) < MIN_HISTORY:
+            raise ValueError(f"Need at least {MIN_HISTORY} hours of history, got {len(history)}.")
+        self.history = history[-MIN_HISTORY:]
+        self.last_timestamp = pd.Timestamp(last_timestamp)
+        self.hours = hours
+        self.scale = scale
+
+
+class BatcherMetrics:
+    WINDOW = 2048  # recent samples kept for percentiles
+
+    def __init__(self):
+        self.requests = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.max_batch_size = 0
+        self.batch_sizes = {}       # size -> count
+        self.queue_waits = deque(maxlen=self.WINDOW)      # seconds, per request
+        self.inference_times = deque(maxlen=self.WINDOW)  # seconds, per batch
+
+    def record(self, size, waits, inference_s):
+        self.requests += size
+        self.batches += 1
+        self.max_batch_size = max(self.max_batch_size, size)
+        self.batch_sizes[size] = self.batch_sizes.get(size, 0) + 1
+        self.queue_waits.extend(waits)
+        self.inference_times.append(inference_s)
+
+    @staticmethod
+    def _ms(values, q):
+        return round(float(np.percentile(values, q)) * 1000, 3) if values else None
+
+    def snapshot(self):
+        waits, infer = list(self.queue_waits), list(self.inference_times)
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "failed_batches": self.failed_batches,
+            "avg_batch_size": round(self.requests / self.batches, 2) if self.batches else 0,
+            "max_batch_size": self.max_batch_size,
+            "batch_size_histogram": dict(sorted(self.batch_sizes.items())),
+            "queue_wait_ms": {"p50": self._ms(waits, 50), "p95": self._ms(waits, 95),
+                              "p99": self._ms(waits, 99), "max": self._ms(waits, 100)},
+            "inference_ms": {"p50": self._ms(infer, 50), "p95": self._ms(infer, 95)},
+        }
+
+
+class ForecastBatcher:
+    def __init__(self, model_dir=MODEL_DIR, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS):
+        self.model_dir = model_dir
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.metrics = BatcherMetrics()
+        self._ensemble = None
+        self._queue = None
+        self._collector = None
+        # One inference thread: batches are serialized, TF/XGBoost parallelize internally
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def _get_ensemble(self):
+        if self._ensemble is None:
+            self._ensemble = EnsembleForecaster(None, None)
+            self._ensemble.load_or_train(self.model_dir)
+        return self._ensemble
+
+    async def submit(self, request):
+        """Queues a ForecastRequest; resolves to its forecast once its batch has run."""
+        if self._collector is None or self._collector.done():
+            self._queue = asyncio.Queue()
+            self._collector = asyncio.get_running_loop().create_task(self._collect())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((request, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            started = time.perf_counter()
+            waits = [started - enqueued for _, _, enqueued in batch]
+            try:
+                results = await loop.run_in_executor(self._executor, self.run_batch, [r for r, _, _ in batch])
+            except Exception as e:
+                self.metrics.failed_batches += 1
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.metrics.record(len(batch), waits, time.perf_counter() - started)
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(dict(result, batch_size=len(batch)))
+
+    def run_batch(self, requests):
+        """Synchronous batched inference for a list of ForecastRequests (inference thread)."""
+        ens = self._get_ensemble()
+        ens.refresh_bundle()
+        hours = max(r.hours for r in requests)
+        scales = np.array([r.scale for r in requests])[:, None]
+        scaled = np.stack([r.history for r in requests]) * scales
+
+        # LSTM + XGBoost: one call per step for the whole batch
+        look_back = ens.lstm.look_back
+        context = ens.lstm.scaler.transform(scaled[:, -look_back:].reshape(-1, 1)).reshape(len(requests), look_back)
+        l_pred = ens.lstm.predict_sequences(context, hours) / scales
+        x_pred = ens.xgboost.predict_recursive(scaled, [r.last_timestamp for r in requests], hours) / scales
+
+        # Prophet: a single predict_at over every request's horizon
+        stamps = [r.last_timestamp + pd.to_timedelta(np.arange(1, r.hours + 1), unit='h') for r in requests]
+        p_all = ens.prophet.predict_at(np.concatenate([s.values for s in stamps]))['yhat'].values
+        bounds = np.cumsum([0] + [r.hours for r in requests])
+
+        results = []
+        for i, r in enumerate(requests):
+            p = p_all[bounds[i]:bounds[i + 1]] / r.scale
+            l, x = l_pred[i, :r.hours], x_pred[i, :r.hours]
+            ensemble, lower, upper = combine_members(p, l, x)
+            results.append({
+                "timestamp": [t.to_pydatetime() for t in stamps[i]],
+                "prophet": p, "lstm": l, "xgboost": x,
+                "ensemble": ensemble, "lower": lower, "upper": upper,
+            })
+        return results
+
+    def shutdown(self):
+        if self._collector is not None:
+            self._collector.cancel()
+            self._collector = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class StationHistories:
+    """
+    Station x hour history matrix of the data cache, rebuilt only when the cache version changes.
+    The rebuild (a pivot over the whole frame) runs in a worker thread, one at a time.
+    """
+    def __init__(self):
+        self._version = None
+        self._data = None
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def _build(raw_df):
+        station_ids, timestamps, matrix = StationForecastPipeline.history_matrix(raw_df)
+        return {
+            "index": {sid: i for i, sid in enumerate(station_ids)},
+            "last_timestamp": timestamps[-1],
+            "matrix": matrix,
+            # Global hourly level the shared members were trained on
+            "target_level": float(matrix.sum(axis=0).mean()),
+        }
+
+    async def get(self, raw_df, version):
+        """version: data_cache.version of raw_df."""
+        if version == self._version:
+            return self._data
+        async with self._lock:
+            if version != self._version:
+                self._data = await asyncio.to_thread(self._build, raw_df)
+                self._version = version
+        return self._data
+
+    async def request(self, raw_df, version, station_id, hours=24):
+        """
+        ForecastRequest for one station (members' outputs scaled by the station's share of the
+        global level), or None if the station is unknown. ValueError if its history is too short.
+        """
+        data = await self.get(raw_df, version)
+        row = data["index"].get(station_id)
+        if row is None:
+            return None
+        series = data["matrix"][row]
+        mean = series.mean()
+        scale = data["target_level"] / mean if mean > 0 else 1.0
+        return ForecastRequest(series, data["last_timestamp"], hours=hours, scale=scale)
+
+
+forecast_batcher = ForecastBatcher()
+station_histories = StationHistories()
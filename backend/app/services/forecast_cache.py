@@ -0,0 +1,133 @@
+import os
+import time
+import asyncio
+import datetime
+from collections import OrderedDict
+
+import numpy as np
+
+from .forecast_store import latest_run, latest_run_id, latest_backtest, backtest_accuracy
+from .accuracy_tracker import accuracy_tracker
+
+# --- Latest-Forecast Summary Cache ---
+#
+# Dashboard polls (/api/metrics/current, /api/forecast/run) only need the
+# latest run's horizon arrays and peak. Summaries are computed once per run and
+# served from memory:
+#   - writers in this process push new runs in via update() right after commit
+#   - other processes' writes are picked up by a run_id probe once the entry is
+#     older than FORECAST_CACHE_TTL seconds
+# Station keys come from clients, so the cache is an LRU of at most
+# FORECAST_CACHE_MAX_STATIONS keys and keys without a stored run are not cached.
+
+FORECAST_CACHE_TTL = float(os.getenv("FORECAST_CACHE_TTL", "30"))
+FORECAST_CACHE_MAX_STATIONS = int(os.getenv("FORECAST_CACHE_MAX_STATIONS", "1024"))
+# Mock revenue per forecast vehicle (same constant the forecast route used)
+REVENUE_PER_VEHICLE = 5
+
+
+def as_utc(ts):
+    """Timezone-aware UTC datetime; naive timestamps are UTC (the data cache's zone with tz stripped)."""
+    return ts.replace(tzinfo=datetime.timezone.utc) if ts.tzinfo is None else ts.astimezone(datetime.timezone.utc)
+
+
+def summarize_run(run, accuracy=None):
+    """ForecastRun row (or run_record() dict) -> JSON-ready summary."""
+    get = run.get if isinstance(run, dict) else lambda k: getattr(run, k)
+    ensemble = [float(v) for v in (get('ensemble') or [])]
+    start = as_utc(get('start_time'))
+    dates = [start + datetime.timedelta(hours=i) for i in range(len(ensemble))]
+
+    if ensemble:
+        peak_idx = int(np.argmax(ensemble))
+        peak_value = ensemble[peak_idx]
+        peak_hour = dates[peak_idx].strftime("%H:%M")
+        avg_demand = sum(ensemble) / len(ensemble)
+    else:
+        peak_value, peak_hour, avg_demand = 0, "--", 0
+
+    return {
+        "run_id": get('run_id'),
+        "station_id": get('station_id'),
+        "peak_hour": peak_hour,
+        "peak_value": peak_value,
+        "avg_demand": round(avg_demand, 2),
+        "projected_revenue": f"${sum(ensemble) * REVENUE_PER_VEHICLE:,.2f}",
+        "ensemble": ensemble,
+        "lower_bound": [float(v) for v in (get('lower') or [])],
+        "upper_bound": [float(v) for v in (get('upper') or [])],
+        "dates": [d.strftime("%Y-%m-%dT%H:%M:%S") for d in dates],  # UTC
+        "accuracy": accuracy or "N/A",
+    }
+
+
+class ForecastSummaryCache:
+    def __init__(self, ttl=FORECAST_CACHE_TTL, max_entries=FORECAST_CACHE_MAX_STATIONS):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # station key -> {"summary", "checked"}, least recently used first
+        self._locks = {}               # station key -> [lock, tasks using it], only while refreshing
+        self.hits = 0
+        self.misses = 0
+
+    def update(self, records):
+        """Called by writers after their commit: replaces the summaries of the stations in `records`."""
+        now = time.monotonic()
+        for record in records:
+            key = record.get('station_id')
+            previous = self._entries.get(key)
+            accuracy = previous["summary"]["accuracy"] if previous and previous["summary"] else None
+            self._put(key, summarize_run(record, accuracy), now)
+
+    def _put(self, key, summary, checked):
+        self._entries[key] = {"summary": summary, "checked": checked}
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, station_id=None):
+        self._entries.pop(station_id, None)
+
+    async def get(self, session, station_id=None):
+        """Latest-run summary for a station key (None = system-wide), or None if no run is stored."""
+        entry = self._entries.get(station_id)
+        if entry is not None and time.monotonic() - entry["checked"] < self.ttl:
+            self._entries.move_to_end(station_id)
+            self.hits += 1
+            return entry["summary"]
+
+        # Stale or missing: one refresh per key at a time, concurrent pollers wait for it
+        holder = self._locks.setdefault(station_id, [asyncio.Lock(), 0])
+        holder[1] += 1
+        try:
+            async with holder[0]:
+                return await self._refresh(session, station_id)
+        finally:
+            holder[1] -= 1
+            if not holder[1]:
+                del self._locks[station_id]
+
+    async def _refresh(self, session, station_id):
+        entry = self._entries.get(station_id)
+        if entry is not None and time.monotonic() - entry["checked"] < self.ttl:
+            self.hits += 1
+            return entry["summary"]
+        self.misses += 1
+
+        # Live accuracy once enough actuals were scored, else the latest backtest
+        accuracy = accuracy_tracker.headline() or backtest_accuracy(await latest_backtest(session))
+        summary = entry["summary"] if entry else None
+        current_id = summary["run_id"] if summary else None
+        if current_id is None or await latest_run_id(session, station_id) != current_id:
+            run = await latest_run(session, station_id)
+            summary = summarize_run(run, accuracy) if run is not None else None
+        else:
+            summary = dict(summary, accuracy=accuracy or "N/A")
+        if summary is None:
+            self._entries.pop(station_id, None)  # unknown station or nothing stored yet
+        else:
+            self._put(station_id, summary, time.monotonic())
+        return summary
+
+
+forecast_summaries = ForecastSummaryCache()
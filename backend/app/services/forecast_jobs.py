@@ -0,0 +1,209 @@
+import os
+import uuid
+import asyncio
+import datetime
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+
+from .forecast import PredictionService
+from .forecast_store import run_record, save_runs
+from .forecast_cache import forecast_summaries
+from .accuracy_tracker import accuracy_tracker
+from ..models.prediction.station_forecast import StationForecastPipeline
+
+# Heavy forecasting (Prophet fit + ensemble) runs in worker processes, never on the event loop.
+# Per-station jobs use StationForecastPipeline's own pool (STATION_FORECAST_WORKERS).
+FORECAST_WORKERS = int(os.getenv("FORECAST_WORKERS", "2"))
+# Finished jobs kept around for status/result polling
+MAX_FINISHED_JOBS = 200
+
+
+def _run_forecast_job(df, days):
+    """Worker-process entry point."""
+    return PredictionService().run_forecast(df, days=days)
+
+
+def data_version(df):
+    """Content fingerprint of the event frame; identical data + horizon coalesce into one job."""
+    if df is None or df.empty:
+        return "empty"
+    cols = [c for c in ('timestamp', 'station_id', 'vehicle_count') if c in df.columns]
+    digest = int(pd.util.hash_pandas_object(df[cols], index=False).sum()) & 0xFFFFFFFFFFFFFFFF
+    return f"{len(df)}-{digest:016x}"
+
+
+class ForecastJob:
+    def __init__(self, key, days, per_station=False):
+        self.job_id = str(uuid.uuid4())
+        self.key = key
+        self.days = days
+        self.per_station = per_station
+        self.status = "queued"      # queued -> fitting -> writing -> done | failed
+        # Per-station jobs count finished stations; a global job is a single fit (no fraction)
+        self.stations = None
+        self.stations_done = 0
+        self.result = None
+        self.error = None
+        self.run_id = None
+        self.submitters = 1         # requests coalesced onto this job
+        self.created_at = datetime.datetime.now(datetime.timezone.utc)
+        self.finished_at = None
+        self._future = None
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed")
+
+    def _station_progress(self, done, total):
+        """Called from the station runner thread as shards finish."""
+        self.stations_done, self.stations = done, total
+
+    @property
+    def progress(self):
+        """Fraction of stations forecast (per-station jobs), 1.0 once done, otherwise None."""
+        if self.status == "done":
+            return 1.0
+        if self.stations:
+            return round(self.stations_done / self.stations, 3)
+        return None
+
+    def to_dict(self):
+        status = self.status
+        # The pool marks a future running once a worker takes it
+        if status == "queued" and self._future is not None and self._future.running():
+            status = "fitting"
+        return {
+            "job_id": self.job_id,
+            "status": status,
+            "progress": self.progress,
+            "stations": self.stations,
+            "stations_done": self.stations_done if self.stations is not None else None,
+            "days": self.days,
+            "per_station": self.per_station,
+            "data_version": self.key[0],
+            "submitters": self.submitters,
+            "run_id": self.run_id,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "error": self.error,
+            "result": self.result,
+        }
+
+
+class ForecastJobManager:
+    def __init__(self, max_workers=FORECAST_WORKERS):
+        self.max_workers = max_workers
+        self._pool = None
+        # Station runs orchestrate their own process pool; they only need a thread here
+        self._station_runner = None
+        self.station_pipeline = StationForecastPipeline()
+        self._jobs = OrderedDict()   # job_id -> ForecastJob
+        self._inflight = {}          # (data_version, days) -> job_id
+        self._versions = {}          # data_cache.version -> data version, avoids re-hashing the cache frame
+
+    def _get_pool(self):
+        if self._pool is None:
+            # spawn: the API process may already hold TensorFlow/OpenCV threads, which do not survive fork
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    async def _data_version(self, df, cache_version=None):
+        """Hashes off the event loop; the cache frame is hashed once per data_cache.version."""
+        version = self._versions.get(cache_version) if cache_version is not None else None
+        if version is None:
+            version = await asyncio.to_thread(data_version, df)
+            if cache_version is not None:
+                self._versions = {cache_version: version}
+        return version
+
+    async def submit(self, df, days=7, per_station=False, cache_version=None):
+        """
+        Returns (job, coalesced).
+        cache_version: data_cache.version of `df`, so the frame is hashed once per change.
+        """
+        key = (await self._data_version(df, cache_version), days, per_station)
+        job_id = self._inflight.get(key)
+        if job_id is not None:
+            job = self._jobs[job_id]
+            job.submitters += 1
+            return job, True
+
+        job = ForecastJob(key, days, per_station)
+        self._jobs[job.job_id] = job
+        self._inflight[key] = job.job_id
+        if per_station:
+            if self._station_runner is None:
+                self._station_runner = ThreadPoolExecutor(max_workers=1)
+            job._future = self._station_runner.submit(self.station_pipeline.run, df, days * 24,
+                                                      job._station_progress)
+        else:
+            job._future = self._get_pool().submit(_run_forecast_job, df, days)
+        asyncio.get_running_loop().create_task(self._complete(job))
+        return job, False
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    async def _complete(self, job):
+        try:
+            result = await asyncio.wrap_future(job._future)
+            job.status = "writing"
+            run_id = str(uuid.uuid4())
+            metadata = {"job_id": job.job_id, "data_version": job.key[0], "days": job.days}
+            if job.per_station:
+                records = StationForecastPipeline.prediction_records(result, run_id, source="forecast_job",
+                                                                   metadata=metadata)
+                job.result = StationForecastPipeline.summarize(result)
+            else:
+                records = [run_record(result, run_id, source="forecast_job", metadata=metadata)]
+                # The worker process has no live stats; report this process's
+                result["model_accuracy"] = accuracy_tracker.headline() or "N/A"
+                job.result = result
+            job.run_id = run_id if await self._persist(records) else None
+            job.status = "done"
+        except Exception as e:
+            print(f"Forecast job {job.job_id} failed: {e}")
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = datetime.datetime.now(datetime.timezone.utc)
+            job._future = None
+            self._inflight.pop(job.key, None)
+            self._trim()
+
+    async def _persist(self, records):
+        """Bulk-writes forecast_runs rows. Returns False if the DB is unavailable."""
+        from ..database import AsyncSessionLocal
+
+        try:
+            async with AsyncSessionLocal() as session:
+                async with session.begin():
+                    await save_runs(session, records)
+        except Exception as e:
+            print(f"Forecast job persistence skipped (DB unavailable?): {e}")
+            return False
+        forecast_summaries.update(records)
+        return True
+
+    def _trim(self):
+        finished = [j for j in self._jobs.values() if j.finished]
+        for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            self._jobs.pop(job.job_id, None)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        if self._station_runner is not None:
+            self._station_runner.shutdown(wait=False, cancel_futures=True)
+            self._station_runner = None
+        self.station_pipeline.shutdown()
+
+
+forecast_jobs = ForecastJobManager()
@@ -0,0 +1,153 @@
+import os
+import asyncio
+import datetime
+
+import numpy as np
+import pandas as pd
+
+from sqlalchemy import select, delete, insert, func
+
+from ..models.outputs import ForecastRun, BacktestResult
+
+# --- Forecast Run Storage ---
+#
+# A forecast run is stored as one forecast_runs row per station key (NULL =
+# system-wide) holding the whole hourly horizon as arrays, instead of one
+# model_predictions row per hour. Reading the latest forecast is a single
+# (station_id, created_at) index probe.
+
+# Runs kept per station key by the retention job; older ones are superseded
+FORECAST_RUNS_KEEP = int(os.getenv("FORECAST_RUNS_KEEP", "10"))
+FORECAST_RETENTION_INTERVAL = int(os.getenv("FORECAST_RETENTION_INTERVAL", str(6 * 3600)))  # seconds
+
+MEMBER_COLUMNS = ("prophet", "lstm", "xgboost")
+
+
+def _floats(values):
+    return [float(v) for v in np.asarray(values, dtype=float)]
+
+
+def _to_datetime(ts):
+    # Forecast results carry pandas Timestamps, datetimes or 'YYYY-mm-dd HH:MM' strings
+    return pd.Timestamp(ts).to_pydatetime()
+
+
+def run_record(result, run_id, model_type="ensemble", source=None, station_id=None, metadata=None, row=None):
+    """
+    A forecast result ('timestamp', 'ensemble', 'lower', 'upper' and optionally
+    per-member arrays) -> one forecast_runs row (dict, for bulk insert).
+    `row` selects one station from (stations, hours) arrays.
+    """
+    def pick(key):
+        values = result.get(key)
+        if values is None:
+            return None
+        values = np.asarray(values, dtype=float)
+        return _floats(values[row] if row is not None else values)
+
+    timestamps = result['timestamp']
+    record = {
+        "run_id": run_id,
+        "station_id": station_id,
+        "model_type": model_type,
+        "start_time": _to_datetime(timestamps[0]),
+        "end_time": _to_datetime(timestamps[-1]),
+        "horizon": len(timestamps),
+        "ensemble": pick('ensemble'),
+        "lower": pick('lower'),
+        "upper": pick('upper'),
+        "source": source,
+        "run_metadata": metadata,
+    }
+    for member in MEMBER_COLUMNS:
+        record[member] = pick(member)
+    return record
+
+
+def run_timestamps(run):
+    """Hourly timestamps of a ForecastRun."""
+    return [run.start_time + datetime.timedelta(hours=i) for i in range(run.horizon)]
+
+
+async def save_runs(session, records):
+    """Bulk insert of run_record() dicts. Caller owns the transaction."""
+    if records:
+        await session.execute(insert(ForecastRun), records)
+
+
+async def latest_run(session, station_id=None):
+    """Most recent run for a station key (None = system-wide)."""
+    station = ForecastRun.station_id.is_(None) if station_id is None else ForecastRun.station_id == station_id
+    result = await session.execute(
+        select(ForecastRun).where(station)
+        .order_by(ForecastRun.created_at.desc(), ForecastRun.id.desc()).limit(1)
+    )
+    return result.scalar_one_or_none()
+
+
+async def latest_run_id(session, station_id=None):
+    """run_id of the most recent run for a station key (index-only probe)."""
+    station = ForecastRun.station_id.is_(None) if station_id is None else ForecastRun.station_id == station_id
+    result = await session.execute(
+        select(ForecastRun.run_id).where(station)
+        .order_by(ForecastRun.created_at.desc(), ForecastRun.id.desc()).limit(1)
+    )
+    return result.scalar_one_or_none()
+
+
+async def latest_backtest(session):
+    """Rows of the most recent backtest run (run_backtest.py), or [] if none."""
+    result_run = await session.execute(
+        select(BacktestResult.run_id).order_by(BacktestResult.created_at.desc()).limit(1)
+    )
+    run_id = result_run.scalar_one_or_none()
+    if not run_id:
+        return []
+    result_rows = await session.execute(select(BacktestResult).where(BacktestResult.run_id == run_id))
+    return result_rows.scalars().all()
+
+
+def backtest_accuracy(rows):
+    """'NN.N%' (100 - pooled ensemble MAPE) from latest_backtest() rows, or None."""
+    for r in rows:
+        if r.model_type == "ensemble" and r.horizon is None and r.mape is not None:
+            return f"{max(0.0, 100 - r.mape):.1f}%"
+    return None
+
+
+async def has_future_run(session, now=None):
+    """True if any stored run still covers a future hour."""
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    result = await session.execute(select(ForecastRun.id).where(ForecastRun.end_time > now).limit(1))
+    return result.scalar_one_or_none() is not None
+
+
+async def purge_superseded(session, keep=FORECAST_RUNS_KEEP):
+    """Deletes all but the `keep` newest runs per station key. Returns the number of rows removed."""
+    ranked = select(
+        ForecastRun.id,
+        func.row_number().over(
+            partition_by=ForecastRun.station_id,
+            order_by=(ForecastRun.created_at.desc(), ForecastRun.id.desc()),
+        ).label("rn"),
+    ).subquery()
+    result = await session.execute(
+        delete(ForecastRun).where(ForecastRun.id.in_(select(ranked.c.id).where(ranked.c.rn > keep)))
+    )
+    return result.rowcount
+
+
+async def retention_loop(interval=FORECAST_RETENTION_INTERVAL, keep=FORECAST_RUNS_KEEP):
+    """Background task: periodically purges superseded forecast runs."""
+    from ..database import AsyncSessionLocal
+
+    while True:
+        try:
+            async with AsyncSessionLocal() as session:
+                async with session.begin():
+                    removed = await purge_superseded(session, keep=keep)
+            if removed:
+                print(f"Forecast retention: purged {removed} superseded runs (keeping {keep} per station).")
+        except Exception as e:
+            print(f"Forecast retention error: {e}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,82 @@
+import os
+import re
+import json
+import hashlib
+
+# --- Per-Camera Inference Settings ---
+#
+# cameras.json (VIDEO_CAMERAS_CONFIG) maps a camera id, passed with the upload, to:
+#   roi    [x1, y1, x2, y2] in source pixels: only this region is sent to YOLO
+#          (like QUEUE_REGION in models/yolov11/traf1.py); boxes are mapped back
+#          to full-frame coordinates
+#   imgsz  inference size (longest side, multiple of 32); the crop is downscaled
+#          to it before inference
+# Either may be null. The "default" entry applies to uploads without a camera.
+
+VIDEO_CAMERAS_CONFIG = os.getenv("VIDEO_CAMERAS_CONFIG", "cameras.json")
+CAMERA_ID_PATTERN = re.compile(r"^[A-Za-z0-9_]+$")
+
+
+class CameraConfig:
+    def __init__(self, camera_id, roi=None, imgsz=None, name=None):
+        self.camera_id = camera_id
+        self.name = name or camera_id
+        self.roi = tuple(int(v) for v in roi) if roi else None
+        if self.roi is not None and (len(self.roi) != 4 or self.roi[2] <= self.roi[0] or self.roi[3] <= self.roi[1]):
+            raise ValueError(f"Camera {camera_id}: roi must be [x1, y1, x2, y2] with x2 > x1 and y2 > y1")
+        # YOLO needs a multiple of its 32 px stride
+        self.imgsz = max(32, (int(imgsz) + 31) // 32 * 32) if imgsz else None
+
+    @property
+    def fingerprint(self):
+        """Short hash of the settings that change results (None for full-frame defaults)."""
+        if self.roi is None and self.imgsz is None:
+            return None
+        settings = json.dumps({"roi": self.roi, "imgsz": self.imgsz})
+        return hashlib.sha1(settings.encode()).hexdigest()[:8]
+
+    def to_dict(self):
+        return {"camera_id": self.camera_id, "name": self.name, "roi": self.roi, "imgsz": self.imgsz}
+
+
+def load_cameras(path=VIDEO_CAMERAS_CONFIG):
+    """camera id -> CameraConfig; always has a 'default' entry."""
+    cameras = {"default": CameraConfig("default")}
+    if not os.path.exists(path):
+        return cameras
+    with open(path) as f:
+        for camera_id, settings in json.load(f).items():
+            if not CAMERA_ID_PATTERN.match(camera_id):
+                raise ValueError(f"Invalid camera id {camera_id!r} (letters, digits and _ only)")
+            cameras[camera_id] = CameraConfig(camera_id, **settings)
+    return cameras
+
+
+_cameras = None
+_cameras_mtime = None
+
+
+def get_cameras():
+    """
+    Cameras from the config file, reloaded when the file changes. An invalid file is fatal only
+    on the first load (startup); later on the last valid config stays in use.
+    """
+    global _cameras, _cameras_mtime
+    mtime = os.path.getmtime(VIDEO_CAMERAS_CONFIG) if os.path.exists(VIDEO_CAMERAS_CONFIG) else None
+    if _cameras is None or mtime != _cameras_mtime:
+        try:
+            cameras = load_cameras(VIDEO_CAMERAS_CONFIG)
+        except Exception as e:
+            if _cameras is None:
+                raise
+            print(f"Invalid camera config {VIDEO_CAMERAS_CONFIG} ({e}); keeping the previous one.")
+            _cameras_mtime = mtime  # not re-read until the file changes again
+            return _cameras
+        _cameras = cameras
+        _cameras_mtime = mtime
+    return _cameras
+
+
+def get_camera(camera_id=None):
+    """CameraConfig for an id (None -> 'default'); None if the id is unknown."""
+    return get_cameras().get(camera_id or "default")
@@ -0,0 +1,404 @@
+import os
+import uuid
+import asyncio
+import datetime
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import select, update
+
+from ..models.outputs import VideoJob
+from .video_processor import process_video_file, load_yolo_model, output_paths_for
+from .video_pipeline import PipelineCancelled
+from .video_uploads import video_uploads
+from .video_store import video_store, store_key, summarize_detections
+from .video_cameras import get_camera
+
+# --- Video Job Queue ---
+#
+# Uploads become jobs in a FIFO served by VIDEO_WORKERS worker slots, each with
+# its own YOLO model (predictors are not thread-safe) and its own pipeline
+# threads. At most VIDEO_MAX_QUEUED jobs may wait; further uploads are refused
+# (503) instead of piling more work onto the API process.
+# Job state is mirrored into the video_jobs table: after a restart, queued and
+# interrupted jobs whose input file still exists are queued again (interrupted
+# ones restart from the beginning).
+# Jobs of resumable uploads may start before the upload is complete: the job
+# carries the UploadSession and the pipeline follows the file as it grows.
+# Jobs with a content hash store their result in video_store when done; an upload
+# already in the store becomes a job that is done at once (add_cached).
+
+VIDEO_WORKERS = int(os.getenv("VIDEO_WORKERS", "1"))
+VIDEO_MAX_QUEUED = int(os.getenv("VIDEO_MAX_QUEUED", "20"))
+PROGRESS_INTERVAL = 2.0  # seconds between progress writes to the DB
+# Finished jobs kept in memory for status polling (older ones are read from the DB)
+MAX_FINISHED_JOBS = 200
+# expired: done, but its result was evicted from video_store since
+FINISHED_STATES = ("done", "failed", "cancelled", "expired")
+EXPIRED_ERROR = "The result was evicted from the video store; upload the video again."
+
+
+def _tracks_url(output_url, mode):
+    # Overlay results keep their track file next to the (original) video
+    return f"{output_url}.tracks.json" if mode == "overlay" and output_url else None
+
+
+def _now():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+class QueueFull(Exception):
+    pass
+
+
+class VideoJobState:
+    def __init__(self, job_id, filename, file_path, original_filename=None, created_at=None, upload=None,
+                 content_hash=None, mode="annotate", camera_id=None):
+        self.job_id = job_id
+        self.filename = filename
+        self.original_filename = original_filename
+        self.content_hash = content_hash
+        self.mode = mode
+        self.camera_id = camera_id
+        self.file_path = file_path
+        self.output_url = "/" + output_paths_for(filename, mode)[0].replace(os.sep, "/")
+        self.state = "queued"
+        self.error = None
+        self.stats = None
+        self.frames_processed = 0
+        self.total_frames = None
+        self.fps = None
+        self.created_at = created_at or _now()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_event = threading.Event()
+        self.pipeline = None  # set while running
+        self.upload = upload  # UploadSession if the file may still be arriving
+        self.interrupted = False  # was running when the server stopped (its events may be partly written)
+
+    @property
+    def tracks_url(self):
+        return _tracks_url(self.output_url, self.mode)
+
+    @property
+    def finished(self):
+        return self.state in FINISHED_STATES
+
+    def refresh_progress(self):
+        if self.pipeline is not None:
+            self.frames_processed, self.fps = self.pipeline.progress()
+            self.total_frames = self.pipeline.total_frames
+
+    def to_dict(self, queue_position=None):
+        self.refresh_progress()
+        progress = None
+        if self.state == "done":
+            progress = 1.0
+        elif self.total_frames:
+            progress = round(min(1.0, self.frames_processed / self.total_frames), 4)
+        return {
+            "job_id": self.job_id,
+            "state": self.state,
+            "filename": self.filename,
+            "original_filename": self.original_filename,
+            "content_hash": self.content_hash,
+            "mode": self.mode,
+            "camera_id": self.camera_id,
+            "frames_processed": self.frames_processed,
+            "total_frames": self.total_frames,
+            "progress": progress,
+            "fps": self.fps,
+            "queue_position": queue_position,
+            "output_video_url": self.output_url if self.state == "done" else None,
+            "tracks_url": self.tracks_url if self.state == "done" else None,
+            "error": self.error,
+            "stats": self.stats,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+def _row_dict(row):
+    """video_jobs row -> the same shape as VideoJobState.to_dict()."""
+    return {
+        "job_id": row.id,
+        "state": row.state,
+        "filename": row.filename,
+        "original_filename": row.original_filename,
+        "content_hash": row.content_hash,
+        "mode": row.mode,
+        "camera_id": row.camera_id,
+        "frames_processed": row.frames_processed,
+        "total_frames": row.total_frames,
+        "progress": 1.0 if row.state == "done" else None,
+        "fps": row.fps,
+        "queue_position": None,
+        "output_video_url": row.output_url if row.state == "done" else None,
+        "tracks_url": _tracks_url(row.output_url, row.mode) if row.state == "done" else None,
+        "error": row.error,
+        "stats": row.stats,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        "started_at": row.started_at.isoformat() if row.started_at else None,
+        "finished_at": row.finished_at.isoformat() if row.finished_at else None,
+    }
+
+
+class VideoJobQueue:
+    def __init__(self, workers=VIDEO_WORKERS, max_queued=VIDEO_MAX_QUEUED):
+        self.workers = max(1, workers)
+        self.max_queued = max_queued
+        self.use_db = False
+        self._jobs = OrderedDict()   # job_id -> VideoJobState
+        self._pending = None         # asyncio.Queue of job ids
+        self._tasks = []
+        self._bg = set()             # fire-and-forget DB updates, referenced until they finish
+
+    # -- persistence (best effort: the queue also works without a database) --
+
+    async def _db(self, fn):
+        if not self.use_db:
+            return None
+        from ..database import AsyncSessionLocal
+        try:
+            async with AsyncSessionLocal() as session:
+                async with session.begin():
+                    return await fn(session)
+        except Exception as e:
+            print(f"Video job persistence error: {e}")
+            return None
+
+    async def _insert(self, job):
+        async def fn(session):
+            session.add(VideoJob(id=job.job_id, filename=job.filename, original_filename=job.original_filename,
+                                 content_hash=job.content_hash, mode=job.mode, camera_id=job.camera_id,
+                                 file_path=job.file_path,
+                                 output_url=job.output_url,
+                                 state=job.state, frames_processed=job.frames_processed, total_frames=job.total_frames,
+                                 stats=job.stats, created_at=job.created_at, started_at=job.started_at,
+                                 finished_at=job.finished_at))
+        await self._db(fn)
+
+    async def _save(self, job):
+        job.refresh_progress()
+        values = dict(state=job.state, content_hash=job.content_hash, output_url=job.output_url,
+                      frames_processed=job.frames_processed, total_frames=job.total_frames,
+                      fps=job.fps, error=job.error, stats=job.stats, started_at=job.started_at,
+                      finished_at=job.finished_at)
+
+        async def fn(session):
+            await session.execute(update(VideoJob).where(VideoJob.id == job.job_id).values(**values))
+        await self._db(fn)
+
+    # -- lifecycle --
+
+    async def start(self, use_db=True):
+        """Recovers unfinished jobs from the DB and starts the worker slots (call on startup)."""
+        self.use_db = use_db
+        self._pending = asyncio.Queue()
+
+        async def load_unfinished(session):
+            result = await session.execute(
+                select(VideoJob).where(VideoJob.state.in_(("queued", "running"))).order_by(VideoJob.created_at)
+            )
+            return result.scalars().all()
+
+        for row in await self._db(load_unfinished) or []:
+            upload = video_uploads.for_filename(row.filename)
+            job = VideoJobState(row.id, row.filename, row.file_path, row.original_filename, row.created_at,
+                                upload=upload if upload is not None and not upload.complete else None,
+                                content_hash=row.content_hash, mode=row.mode or "annotate",
+                                camera_id=row.camera_id)
+            job.interrupted = row.state == "running"
+            if row.file_path and os.path.exists(row.file_path):
+                self._jobs[job.job_id] = job
+                self._pending.put_nowait(job.job_id)
+                await self._save(job)
+                print(f"Video job {job.job_id} re-queued after restart.")
+            else:
+                job.state, job.error, job.finished_at = "failed", "Input file missing after restart.", _now()
+                await self._save(job)
+
+        loop = asyncio.get_running_loop()
+        video_store.on_evict = lambda key: loop.call_soon_threadsafe(self._result_evicted, key)
+        self._tasks = [asyncio.create_task(self._worker(slot)) for slot in range(self.workers)]
+        print(f"Video job queue started: {self.workers} worker slot(s), {self._pending.qsize()} job(s) pending.")
+
+    def shutdown(self):
+        for job in self._jobs.values():
+            if job.state == "running":
+                job.cancel_event.set()  # stops its pipeline; the job stays 'running' in the DB and resumes on restart
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    # -- API --
+
+    def queued(self):
+        return [j for j in self._jobs.values() if j.state == "queued"]
+
+    async def submit(self, file_path, filename, original_filename=None, upload=None, content_hash=None,
+                     mode="annotate", camera_id=None):
+        """
+        Queues an uploaded file (pass the UploadSession if it is still being received).
+        Raises QueueFull when max_queued jobs are already waiting.
+        """
+        if self._pending is None:
+            await self.start(use_db=False)
+        if len(self.queued()) >= self.max_queued:
+            raise QueueFull()
+        job = VideoJobState(str(uuid.uuid4()), filename, file_path, original_filename, upload=upload,
+                            content_hash=content_hash, mode=mode, camera_id=camera_id)
+        self._jobs[job.job_id] = job
+        await self._insert(job)
+        self._pending.put_nowait(job.job_id)
+        return job
+
+    async def add_cached(self, filename, original_filename, content_hash, result, mode="annotate",
+                         camera_id=None):
+        """Records an upload answered from video_store as a finished job (no processing)."""
+        job = VideoJobState(str(uuid.uuid4()), filename, None, original_filename, content_hash=content_hash,
+                            mode=mode, camera_id=camera_id)
+        job.state, job.output_url = "done", result["output_video_url"]
+        job.stats = {**(result.get("stats") or {}), "cache_hit": True}
+        job.frames_processed = job.stats.get("frames") or 0
+        job.total_frames = job.stats.get("total_frames")
+        job.started_at = job.finished_at = job.created_at
+        self._jobs[job.job_id] = job
+        await self._insert(job)
+        self._trim()
+        return job
+
+    def find_active(self, content_hash, mode="annotate", camera_id=None):
+        """A queued or running job for the same content, mode and camera, if any."""
+        if not content_hash:
+            return None
+        return next((j for j in self._jobs.values() if j.content_hash == content_hash and j.mode == mode
+                     and j.camera_id == camera_id and j.state in ("queued", "running")), None)
+
+    async def set_content_hash(self, job_id, content_hash):
+        """Hash known only after the job started (resumable upload completed while processing)."""
+        job = self._jobs.get(job_id)
+        if job is not None and not job.finished:
+            job.content_hash = content_hash
+            await self._save(job)
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def status(self, job):
+        position = None
+        if job.state == "queued":
+            position = next((i for i, j in enumerate(self.queued()) if j is job), None)
+        return job.to_dict(queue_position=position)
+
+    async def lookup(self, job_id):
+        """Status dict from memory, or from the DB for jobs of earlier runs; None if unknown."""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return self.status(job)
+
+        async def fn(session):
+            return (await session.execute(select(VideoJob).where(VideoJob.id == job_id))).scalar_one_or_none()
+        row = await self._db(fn)
+        return _row_dict(row) if row is not None else None
+
+    async def cancel(self, job_id):
+        """Cancels a queued or running job. Returns the job (None if unknown)."""
+        job = self._jobs.get(job_id)
+        if job is None or job.finished:
+            return job
+        if job.state == "queued":
+            job.state, job.finished_at = "cancelled", _now()
+            if os.path.exists(job.file_path):
+                os.remove(job.file_path)
+            await self._save(job)
+        else:
+            job.cancel_event.set()  # the worker marks it cancelled once the pipeline stops
+        return job
+
+    # -- workers --
+
+    async def _report_progress(self, job):
+        while True:
+            await asyncio.sleep(PROGRESS_INTERVAL)
+            await self._save(job)
+
+    async def _worker(self, slot):
+        model, model_lock = None, threading.Lock()
+        while True:
+            job = self._jobs.get(await self._pending.get())
+            if job is None or job.state != "queued":
+                continue  # cancelled while waiting
+            job.state, job.started_at = "running", _now()
+            await self._save(job)
+            progress = asyncio.create_task(self._report_progress(job))
+
+            def on_start(pipeline, job=job):
+                job.pipeline = pipeline
+
+            try:
+                if model is None:
+                    model = await asyncio.to_thread(load_yolo_model)
+                camera = get_camera(job.camera_id)
+                if camera is None:
+                    print(f"Camera {job.camera_id} is no longer configured; using the default settings.")
+                    camera = get_camera()
+                job.stats = await process_video_file(job.file_path, job.filename, cancel_event=job.cancel_event,
+                                                     model=model, model_lock=model_lock, on_start=on_start,
+                                                     upload=job.upload, mode=job.mode, camera=camera,
+                                                     replace_events=job.interrupted)
+                if job.content_hash:
+                    await self._store_result(job, camera)
+                job.state = "done"
+            except PipelineCancelled:
+                job.state = "cancelled"
+            except asyncio.CancelledError:
+                progress.cancel()
+                raise  # shutdown: leave the job 'running' so it is re-queued on restart
+            except Exception as e:
+                job.state, job.error = "failed", str(e)
+            progress.cancel()
+            job.refresh_progress()
+            job.pipeline = None
+            job.finished_at = _now()
+            await self._save(job)
+            self._trim()
+
+    def _result_evicted(self, key):
+        """video_store dropped an entry: jobs that served it no longer have a result."""
+        prefix = f"{video_store.url}/{key}."
+        for job in self._jobs.values():
+            if job.state == "done" and job.output_url and job.output_url.startswith(prefix):
+                job.state, job.output_url, job.error = "expired", None, EXPIRED_ERROR
+
+        async def fn(session):
+            await session.execute(update(VideoJob)
+                                  .where(VideoJob.state == "done", VideoJob.output_url.startswith(prefix, autoescape=True))
+                                  .values(state="expired", output_url=None, error=EXPIRED_ERROR))
+        task = asyncio.create_task(self._db(fn))
+        self._bg.add(task)
+        task.add_done_callback(self._bg.discard)
+
+    async def _store_result(self, job, camera):
+        result = {
+            "original_filename": job.original_filename,
+            "stats": job.stats,
+            "detections": summarize_detections(job.pipeline.events, job.pipeline.fps),
+        }
+        output_path, tracks_path = output_paths_for(job.filename, job.mode)
+        try:
+            job.output_url = await asyncio.to_thread(video_store.put,
+                                                     store_key(job.content_hash, job.mode, camera.fingerprint),
+                                                     output_path, result, tracks_path)
+        except OSError as e:
+            print(f"Video store error for {job.job_id}: {e}")  # the job's own output stays in place
+
+    def _trim(self):
+        finished = [j for j in self._jobs.values() if j.finished]
+        for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            self._jobs.pop(job.job_id, None)
+
+
+video_jobs = VideoJobQueue()
@@ -0,0 +1,623 @@
+import os
+import time
+import queue
+import threading
+
+import cv2
+import numpy as np
+
+from .video_tracker import BoxTracker
+
+# --- Staged Video Pipeline ---
+#
+#   decoder thread --decode_q--> inference (caller's thread) --encode_q--> encoder thread
+#                                batches of up to               (annotate + write)
+#                                VIDEO_BATCH_SIZE frames
+# Frames live in a pool of preallocated buffers: the decoder reads into a free
+# buffer (cap.read(image=buf)), the buffer travels through the queues and the
+# encoder hands it back once written. The pool and the bounded queues give
+# backpressure, so memory stays fixed and a video finishes at about the speed
+# of its slowest stage. run() blocks; callers on the event loop run it in a
+# worker thread (asyncio.to_thread).
+# Buffers have the size of the first decoded frame (not the container's, which
+# differs for rotated phone clips); frames decoded at another size later on are
+# scaled into them.
+#
+# With stride N only every Nth frame goes through YOLO; BoxTracker carries the
+# boxes (with track ids) across the frames in between. The decoder grab()s
+# every frame and only retrieve()s (color-converts/copies) the frames that are
+# inferred or written to the output.
+#
+# With a motion threshold, each stride candidate is first compared with the last
+# inferred frame on a small grayscale copy (MotionGate). Static candidates reuse
+# the previous detections; motion (and the following hold period) brings the
+# rate back to every stride frames, and a minimum inference rate bounds how long
+# detections are reused.
+#
+# With a region of interest (per camera, see video_cameras.py) only that crop is
+# compared by the motion gate and sent to YOLO, downscaled to the camera's
+# inference size first; boxes are mapped back to full-frame coordinates.
+#
+# Detections are filtered per result with one NumPy mask (class and confidence)
+# over the boxes tensor, and every frame's boxes are appended to a DetectionBuffer:
+# preallocated columns (frame index, class id, confidence) that callers drain
+# while the video runs (video_processor.py writes them to vehicle_events).
+#
+# Without an output path nothing is encoded: with record_tracks the boxes of
+# every frame are kept instead and written as a compact track file
+# (track_document()) that clients draw over the original video.
+#
+# The source may still be arriving (resumable upload, see video_uploads.py): at
+# end of file the decoder waits for more data, reopens the file and seeks back
+# to the next frame, until the upload is complete. Containers that cannot be
+# opened before they are complete (mp4 with the index at the end) simply start
+# once the last chunk is in.
+
+VIDEO_QUEUE_SIZE = int(os.getenv("VIDEO_QUEUE_SIZE", "8"))  # frames buffered between two stages
+# Frames per model call: one batched forward pass amortizes preprocessing and dispatch
+VIDEO_BATCH_SIZE = int(os.getenv("VIDEO_BATCH_SIZE", "8"))
+# Run detection on every Nth frame (1 = every frame)
+VIDEO_DETECT_STRIDE = int(os.getenv("VIDEO_DETECT_STRIDE", "1"))
+# Motion gating: mean absolute gray-level difference (0-255) that counts as motion; 0 disables
+VIDEO_MOTION_THRESHOLD = float(os.getenv("VIDEO_MOTION_THRESHOLD", "0"))
+VIDEO_MIN_INFER_FPS = float(os.getenv("VIDEO_MIN_INFER_FPS", "1.0"))       # inferences per video second while static
+VIDEO_MOTION_HOLD_SECONDS = float(os.getenv("VIDEO_MOTION_HOLD_SECONDS", "1.0"))  # full rate kept after motion
+MOTION_WIDTH = 64  # px; frames are compared at this width
+# Give up on a partially received source when no data arrives for this long
+VIDEO_UPLOAD_STALL_SECONDS = float(os.getenv("VIDEO_UPLOAD_STALL_SECONDS", "600"))
+VEHICLE_CLASSES = ('car', 'truck', 'bus', 'motorcycle')
+MIN_CONFIDENCE = 0.5
+BOX_COLOR = (0, 255, 0)
+ROI_COLOR = (255, 128, 0)
+_POLL = 0.1  # seconds; queue/pool waits re-check the stop flag at this interval
+
+# Ultralytics predictors are not thread-safe: one inference at a time per model
+_model_lock = threading.Lock()
+
+
+class PipelineCancelled(Exception):
+    pass
+
+
+class StageCounter:
+    """Frames handled and busy time of one stage (thread-safe enough: one writer per counter)."""
+    __slots__ = ("name", "frames", "busy")
+
+    def __init__(self, name):
+        self.name = name
+        self.frames = 0
+        self.busy = 0.0
+
+    def add(self, frames, seconds):
+        self.frames += frames
+        self.busy += seconds
+
+    def snapshot(self):
+        return {
+            "frames": self.frames,
+            "busy_seconds": round(self.busy, 3),
+            # Throughput the stage could sustain on its own
+            "fps": round(self.frames / self.busy, 2) if self.busy else None,
+        }
+
+
+class Frame:
+    __slots__ = ("index", "buf", "infer", "hold", "detections")
+
+    def __init__(self, index, buf, infer=True, hold=False):
+        self.index = index       # 1-based frame number
+        self.buf = buf           # pooled BGR buffer (None: grabbed only, not decoded)
+        self.infer = infer       # sent through YOLO (else boxes come from the tracker)
+        self.hold = hold         # static scene: keep the last boxes instead of moving them
+        self.detections = []     # (x1, y1, x2, y2, class_name, confidence, track_id)
+
+
+class DetectionBuffer:
+    """
+    Columnar log of (frame index, class id, confidence), one row per box per frame.
+    Preallocated and grown by doubling; appended by the inference thread, read from others.
+    """
+    def __init__(self, classes=VEHICLE_CLASSES, capacity=4096):
+        self.classes = list(classes)
+        self._class_ids = {name: i for i, name in enumerate(self.classes)}
+        self.frame_index = np.empty(capacity, dtype=np.int32)
+        self.class_id = np.empty(capacity, dtype=np.int8)
+        self.confidence = np.empty(capacity, dtype=np.float32)
+        self.size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.size
+
+    def _grow(self, needed):
+        capacity = max(needed, 2 * len(self.frame_index))
+        for name in ("frame_index", "class_id", "confidence"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+
+    def add(self, frame_index, detections):
+        """Appends one frame's (x1, y1, x2, y2, class_name, confidence, ...) boxes."""
+        n = len(detections)
+        if not n:
+            return
+        with self._lock:
+            if self.size + n > len(self.frame_index):
+                self._grow(self.size + n)
+            rows = slice(self.size, self.size + n)
+            self.frame_index[rows] = frame_index
+            self.class_id[rows] = [self._class_ids[d[4]] for d in detections]
+            self.confidence[rows] = [d[5] for d in detections]
+            self.size += n
+
+    def columns(self, start=0, end=None):
+        """Copies of rows [start, end): (frame_index, class_id, confidence) arrays."""
+        with self._lock:
+            end = self.size if end is None else min(end, self.size)
+            return (self.frame_index[start:end].copy(), self.class_id[start:end].copy(),
+                    self.confidence[start:end].copy())
+
+
+class MotionGate:
+    """Decides whether a candidate frame needs inference, from a downscaled frame difference."""
+    def __init__(self, threshold, min_interval, hold_frames, width=MOTION_WIDTH):
+        self.threshold = threshold
+        self.min_interval = max(1, int(min_interval))  # frames: longest reuse of old detections
+        self.hold_frames = int(hold_frames)
+        self.width = width
+        self._reference = None     # small gray copy of the last inferred frame
+        self._last_inferred = None
+        self._active_until = 0     # frame index until which motion keeps the full rate
+        self.gated = 0
+        self.last_score = None
+
+    def _small(self, buf):
+        h, w = buf.shape[:2]
+        small = cv2.resize(buf, (self.width, max(1, h * self.width // w)), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+    def should_infer(self, index, buf):
+        small = self._small(buf)
+        if self._reference is None:
+            infer = True
+        else:
+            self.last_score = float(cv2.absdiff(small, self._reference).mean())
+            if self.last_score >= self.threshold:
+                self._active_until = index + self.hold_frames
+            infer = self.active(index) or index - self._last_inferred >= self.min_interval
+        if infer:
+            self._reference = small
+            self._last_inferred = index
+        else:
+            self.gated += 1
+        return infer
+
+    def active(self, index):
+        """True while the full inference rate is kept after recent motion."""
+        return index <= self._active_until
+
+
+class FramePool:
+    """Fixed set of preallocated frame buffers, handed out and returned through a queue."""
+    def __init__(self, size, shape):
+        self._free = queue.Queue()
+        for _ in range(size):
+            self._free.put(np.empty(shape, dtype=np.uint8))
+
+    def acquire(self, stop):
+        while not stop.is_set():
+            try:
+                return self._free.get(timeout=_POLL)
+            except queue.Empty:
+                continue
+        return None
+
+    def release(self, buf):
+        self._free.put(buf)
+
+
+def open_writer(path, fps, size):
+    # 'avc1' (H.264) plays in browsers; builds without an H.264 encoder fall back to 'mp4v'
+    for codec in ('avc1', 'mp4v'):
+        out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*codec), fps, size)
+        if out.isOpened():
+            return out
+        print(f"VideoWriter: codec {codec} unavailable.")
+    return out
+
+
+class VideoPipeline:
+    def __init__(self, model, source_path, output_path, queue_size=VIDEO_QUEUE_SIZE,
+                 batch_size=VIDEO_BATCH_SIZE, stride=VIDEO_DETECT_STRIDE,
+                 motion_threshold=VIDEO_MOTION_THRESHOLD, min_infer_fps=VIDEO_MIN_INFER_FPS, cancel_event=None,
+                 model_lock=None, upload=None, record_tracks=False, roi=None, imgsz=None):
+        self.model = model
+        # Shared models are used under the module lock; a worker slot with its own model passes its own
+        self.model_lock = model_lock or _model_lock
+        self.source_path = source_path
+        self.upload = upload  # UploadSession while the source is still being received
+        self.output_path = output_path
+        self.queue_size = queue_size
+        self.batch_size = max(1, batch_size)
+        self.stride = max(1, stride)
+        self.motion_threshold = motion_threshold
+        self.min_infer_fps = min_infer_fps
+        self.roi = tuple(roi) if roi else None  # x1, y1, x2, y2 (clipped to the frame in run())
+        self.imgsz = imgsz                         # inference size; None = model default, no downscale
+        self.motion_gate = None  # built in run() once the video's fps is known
+        self.tracker = BoxTracker()
+        # Skipped frames only need decoding when annotated output is written
+        self.decode_skipped = output_path is not None
+        self.cancel_event = cancel_event or threading.Event()
+        self.counters = {name: StageCounter(name) for name in ("decode", "infer", "annotate", "encode")}
+        self.batches = 0
+        self.inferred = 0
+        self.fps = None
+        self.total_frames = None
+        self.frames_done = 0
+        self.started_at = None   # perf_counter at run() start
+        self.events = DetectionBuffer()  # every frame's boxes (tracked ones on skipped frames)
+        self._vehicle_ids = None         # model class ids of VEHICLE_CLASSES
+        self.record_tracks = record_tracks
+        self.tracks = []         # (frame index, [(x1, y1, x2, y2, class_name, conf, track_id)]) with record_tracks
+        self.width = None
+        self.height = None
+        self._stop = threading.Event()
+        self._error = None
+        self.resized_frames = 0  # frames whose decoded size differed from the first frame's
+        self._cap = None
+        self._source_final = True  # the open capture covers the whole file
+        self._source_seen = None   # upload bytes when the capture was opened
+
+    # -- queue helpers: never block forever once another stage has stopped --
+
+    def _put(self, q, item):
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=_POLL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q):
+        while True:
+            try:
+                return q.get(timeout=_POLL)
+            except queue.Empty:
+                if self._stop.is_set():
+                    return None
+
+    def _fail(self, e):
+        if self._error is None:
+            self._error = e
+        self._stop.set()
+
+    # -- source: a finished file, or one that is still being uploaded --
+
+    def _wait_for_source(self, seen):
+        """Waits until the upload grew past `seen` bytes or completed. False if the pipeline stopped."""
+        deadline = time.monotonic() + VIDEO_UPLOAD_STALL_SECONDS
+        while not self.upload.wait_for_data(seen, timeout=_POLL * 5):
+            if self.cancel_event.is_set():
+                raise PipelineCancelled()
+            if self._stop.is_set():
+                return False
+            if time.monotonic() > deadline:
+                raise IOError(f"Upload stalled: no data for {VIDEO_UPLOAD_STALL_SECONDS:.0f}s")
+        return True
+
+    def _open(self, start_frame=0):
+        """
+        Opens the source at `start_frame`, waiting for more of a partial upload while it cannot be opened.
+        Sets self._source_final when the file was complete at opening (its end is the real end).
+        """
+        while True:
+            complete = self.upload is None or self.upload.complete
+            seen = self.upload.received if self.upload is not None else None
+            cap = cv2.VideoCapture(self.source_path)
+            if cap.isOpened():
+                if start_frame:
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+                self._source_final = complete
+                self._source_seen = seen
+                if complete:
+                    self.total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or None
+                return cap
+            cap.release()
+            if complete:
+                raise IOError(f"Could not open video file: {self.source_path}")
+            if not self._wait_for_source(seen):
+                return None
+
+    # -- stages --
+
+    def _decode(self, pool, decode_q):
+        counter = self.counters["decode"]
+        index = 0
+        try:
+            while not self._stop.is_set():
+                if self.cancel_event.is_set():
+                    raise PipelineCancelled()
+                candidate = index % self.stride == 0
+                buf = None
+                if candidate or self.decode_skipped:
+                    buf = pool.acquire(self._stop)
+                    if buf is None:
+                        break
+                started = time.perf_counter()
+                ret = self._cap.grab()
+                if ret and buf is not None:
+                    ret, image = self._cap.retrieve(buf)
+                    if ret and image is not buf:
+                        self._fit(image, buf)
+                if not ret:
+                    if buf is not None:
+                        pool.release(buf)
+                    if self._source_final or not self._wait_for_source(self._source_seen):
+                        break
+                    # More of the upload arrived: reopen and continue from the next frame
+                    self._cap.release()
+                    self._cap = self._open(start_frame=index)
+                    if self._cap is None:
+                        break
+                    continue
+                index += 1
+                infer, hold = candidate, False
+                if candidate and self.motion_gate is not None:
+                    infer = self.motion_gate.should_infer(index, self._crop(buf))
+                    hold = not infer
+                elif not candidate and self.motion_gate is not None:
+                    hold = not self.motion_gate.active(index)
+                counter.add(1, time.perf_counter() - started)
+                if not self._put(decode_q, Frame(index, buf, infer, hold)):
+                    break
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self._put(decode_q, None)
+
+    def _fit(self, image, buf):
+        """
+        Puts a frame OpenCV decoded into a new array (its size differs from the pool's: the
+        resolution changed mid-stream) into the pool buffer, scaled to the output size.
+        """
+        if image.ndim != 3 or image.shape[2] != buf.shape[2]:
+            raise IOError(f"Unsupported frame format {image.shape} (expected BGR frames)")
+        if image.shape == buf.shape:
+            np.copyto(buf, image)
+            return
+        if not self.resized_frames:
+            print(f"Frame size changed to {image.shape[1]}x{image.shape[0]} mid-stream; "
+                  f"scaling to {buf.shape[1]}x{buf.shape[0]}.")
+        self.resized_frames += 1
+        cv2.resize(image, (buf.shape[1], buf.shape[0]), dst=buf, interpolation=cv2.INTER_AREA)
+
+    def _frame_size(self):
+        """
+        (width, height) of the decoded frames, from the first frame: the container's size can
+        differ (rotated phone clips are decoded upright). Reopens the source at its start.
+        """
+        width = int(self._cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(self._cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        ret, first = self._cap.read()
+        if not ret:
+            return width, height  # nothing decodable yet (upload still arriving)
+        self._cap.release()
+        self._cap = self._open()
+        return first.shape[1], first.shape[0]
+
+    def _crop(self, buf):
+        """View of the region of interest (the whole frame without one)."""
+        if self.roi is None:
+            return buf
+        x1, y1, x2, y2 = self.roi
+        return buf[y1:y2, x1:x2]
+
+    def _model_input(self, buf):
+        """ROI crop, downscaled to fit imgsz. Returns (image, scale applied)."""
+        image = self._crop(buf)
+        h, w = image.shape[:2]
+        if self.imgsz and max(h, w) > self.imgsz:
+            scale = self.imgsz / max(h, w)
+            size = (max(1, round(w * scale)), max(1, round(h * scale)))
+            return cv2.resize(image, size, interpolation=cv2.INTER_AREA), scale
+        return image, 1.0
+
+    def _infer(self, frames):
+        """One model call for the batch; results come back in input order."""
+        inputs = [self._model_input(f.buf) for f in frames]
+        kwargs = {"imgsz": self.imgsz} if self.imgsz else {}
+        results = self.model([image for image, _ in inputs], verbose=False, **kwargs)
+        names = self.model.names
+        if self._vehicle_ids is None:
+            self._vehicle_ids = np.array([i for i, name in names.items() if name in VEHICLE_CLASSES])
+        offset = np.array(self.roi[:2] * 2 if self.roi else (0, 0, 0, 0), dtype=np.float32)
+        for frame, (_, scale), result in zip(frames, inputs, results):
+            if not result.boxes:
+                continue
+            # One copy of the whole result (x1, y1, x2, y2, conf, cls per row), one mask for class and confidence
+            data = result.boxes.data.cpu().numpy()
+            cls = data[:, -1].astype(np.int64)
+            conf = data[:, -2]
+            keep = np.isin(cls, self._vehicle_ids) & (conf > MIN_CONFIDENCE)
+            if not keep.any():
+                continue
+            # Back to full-frame coordinates
+            xyxy = (data[keep, :4] / scale + offset).astype(np.int64)
+            frame.detections = [(x1, y1, x2, y2, names[c], cf) for (x1, y1, x2, y2), c, cf
+                                in zip(xyxy.tolist(), cls[keep].tolist(), conf[keep].tolist())]
+
+    def _next_window(self, decode_q):
+        """
+        Consecutive frames up to the batch_size-th frame to infer, and at most
+        batch_size x stride frames (what the pool holds; motion gating can space
+        inferred frames further apart). Waits for the first frame, then takes what
+        the decoder delivers. Returns (frames, end of stream).
+        """
+        max_window = self.batch_size * self.stride
+        first = self._get(decode_q)
+        if first is None:
+            return [], True
+        window = [first]
+        to_infer = int(first.infer)
+        while to_infer < self.batch_size and len(window) < max_window:
+            frame = self._get(decode_q)
+            if frame is None:
+                return window, True
+            window.append(frame)
+            to_infer += frame.infer
+        return window, False
+
+    def _track(self, window):
+        """In frame order: tracker update on inferred frames, propagated boxes on the others."""
+        for frame in window:
+            if frame.infer:
+                frame.detections = self.tracker.update(frame.index, frame.detections)
+            else:
+                frame.detections = self.tracker.predict(frame.index, hold=frame.hold)
+            self.events.add(frame.index, frame.detections)
+            if self.record_tracks and frame.detections:
+                self.tracks.append((frame.index, frame.detections))
+
+    def _inference_stage(self, decode_q, encode_q):
+        counter = self.counters["infer"]
+        try:
+            done = False
+            while not done:
+                window, done = self._next_window(decode_q)
+                if not window:
+                    break
+                started = time.perf_counter()
+                batch = [f for f in window if f.infer]
+                if batch:
+                    with self.model_lock:
+                        self._infer(batch)
+                    self.batches += 1
+                    self.inferred += len(batch)
+                self._track(window)
+                counter.add(len(window), time.perf_counter() - started)
+                for frame in window:
+                    if not self._put(encode_q, frame):
+                        return
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self._put(encode_q, None)
+
+    def _encode(self, out, pool, encode_q):
+        annotate, encode = self.counters["annotate"], self.counters["encode"]
+        try:
+            while True:
+                frame = self._get(encode_q)
+                if frame is None:
+                    break
+                if out is None or frame.buf is None:
+                    if frame.buf is not None:
+                        pool.release(frame.buf)
+                    self.frames_done = frame.index
+                    continue
+                started = time.perf_counter()
+                if self.roi is not None:
+                    cv2.rectangle(frame.buf, self.roi[:2], self.roi[2:], ROI_COLOR, 1)
+                for x1, y1, x2, y2, class_name, conf, _ in frame.detections:
+                    cv2.rectangle(frame.buf, (x1, y1), (x2, y2), BOX_COLOR, 2)
+                    cv2.putText(frame.buf, f"{class_name} {conf:.2f}", (x1, y1 - 10),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.5, BOX_COLOR, 2)
+                drawn = time.perf_counter()
+                annotate.add(1, drawn - started)
+                out.write(frame.buf)
+                encode.add(1, time.perf_counter() - drawn)
+                pool.release(frame.buf)
+                self.frames_done = frame.index
+        except Exception as e:
+            self._fail(e)
+
+    def run(self):
+        """Processes the whole video (blocking). Returns stats; raises on failure or cancellation."""
+        self._cap = self._open()
+        self.fps = self._cap.get(cv2.CAP_PROP_FPS) or 30
+        width, height = self.width, self.height = self._frame_size()
+        print(f"Video opened. FPS: {self.fps}, Resolution: {width}x{height}")
+        if self.roi is not None:
+            x1, y1, x2, y2 = self.roi
+            self.roi = (max(0, x1), max(0, y1), min(width, x2), min(height, y2))
+            if self.roi[2] <= self.roi[0] or self.roi[3] <= self.roi[1]:
+                print(f"ROI {(x1, y1, x2, y2)} is outside the {width}x{height} frame; using the full frame.")
+                self.roi = None
+        if self.motion_threshold > 0:
+            min_interval = self.fps / self.min_infer_fps if self.min_infer_fps > 0 else float("inf")
+            self.motion_gate = MotionGate(self.motion_threshold, min(min_interval, 10**9),
+                                          VIDEO_MOTION_HOLD_SECONDS * self.fps)
+
+        out = open_writer(self.output_path, self.fps, (width, height)) if self.output_path else None
+        # Every queue slot, the window being inferred (batch_size x stride frames at most)
+        # and the frame each other stage holds
+        pool = FramePool(2 * self.queue_size + self.batch_size * self.stride + 2, (height, width, 3))
+        decode_q = queue.Queue(maxsize=self.queue_size)
+        encode_q = queue.Queue(maxsize=self.queue_size)
+
+        started = self.started_at = time.perf_counter()
+        decoder = threading.Thread(target=self._decode, args=(pool, decode_q), name="video-decode", daemon=True)
+        encoder = threading.Thread(target=self._encode, args=(out, pool, encode_q), name="video-encode", daemon=True)
+        decoder.start()
+        encoder.start()
+        try:
+            self._inference_stage(decode_q, encode_q)
+        finally:
+            decoder.join()
+            encoder.join()
+            if self._cap is not None:
+                self._cap.release()
+            if out is not None:
+                out.release()
+        if self._error is not None:
+            raise self._error
+        return self.stats(time.perf_counter() - started)
+
+    def progress(self):
+        """(frames written, processing fps so far) — safe to call from other threads."""
+        if self.started_at is None:
+            return 0, None
+        elapsed = time.perf_counter() - self.started_at
+        return self.frames_done, round(self.frames_done / elapsed, 2) if elapsed > 0 else None
+
+    def track_document(self):
+        """
+        Recorded tracks as a compact JSON-able dict. Frame indices are 1-based (frame i is shown
+        from (i - 1) / fps); boxes are [x1, y1, x2, y2, class index, confidence, track id] in
+        source pixels. Frames without boxes are left out.
+        """
+        classes = list(VEHICLE_CLASSES)
+        frames = []
+        for index, detections in self.tracks:
+            frames.append([index, [[x1, y1, x2, y2, classes.index(name), round(conf, 2), track_id]
+                                   for x1, y1, x2, y2, name, conf, track_id in detections]])
+        return {
+            "version": 1,
+            "fps": self.fps,
+            "width": self.width,
+            "height": self.height,
+            "roi": self.roi,
+            "frame_count": self.frames_done,
+            "classes": classes,
+            "frames": frames,
+        }
+
+    def stats(self, seconds=None):
+        return {
+            "frames": self.frames_done,
+            "total_frames": self.total_frames,
+            "seconds": round(seconds, 3) if seconds is not None else None,
+            "fps": round(self.frames_done / seconds, 2) if seconds else None,
+            "batch_size": self.batch_size,
+            "batches": self.batches,
+            "stride": self.stride,
+            "roi": self.roi,
+            "imgsz": self.imgsz,
+            "inferred_frames": self.inferred,
+            "resized_frames": self.resized_frames,
+            "motion_gated_frames": self.motion_gate.gated if self.motion_gate else None,
+            "stages": {name: c.snapshot() for name, c in self.counters.items()},
+        }
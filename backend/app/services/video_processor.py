@@ -1,13 +1,27 @@
-import cv2
 import os
+import json
+import shutil
 import asyncio
 from typing import List
-from datetime import datetime, timedelta
+from datetime import datetime
+import pandas as pd
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 from ultralytics import YOLO
 
 from ..database import AsyncSessionLocal
-from ..models.events import VehicleEvent
+from .video_pipeline import VideoPipeline, PipelineCancelled
+from .bulk_writer import vehicle_event_writer
+
+# Processing modes:
+#   annotate - boxes are drawn into a re-encoded copy of the video (processed_<name>)
+#   overlay  - detection only: nothing is encoded; the original video is served with a
+#              per-frame track file next to it (<name>.tracks.json) and drawn client-side
+VIDEO_MODES = ("annotate", "overlay")
+VIDEO_DEFAULT_MODE = os.getenv("VIDEO_DEFAULT_MODE", "annotate")
+# Detection events (one sample per video second) are written to vehicle_events with COPY
+# every this many seconds while a video runs, instead of all at the end
+VIDEO_EVENT_FLUSH_SECONDS = float(os.getenv("VIDEO_EVENT_FLUSH_SECONDS", "5"))
 
 # Global model instance to avoid reloading
 _model = None
@@ -20,107 +34,149 @@ def get_yolo_model():
         _model = YOLO('yolo11n.pt')
     return _model
 
-async def process_video_file(file_path: str, filename: str):
+def load_yolo_model():
+    """A separate model instance (predictors are not thread-safe; one per worker slot)."""
+    return YOLO('yolo11n.pt')
+
+def run_video_pipeline(file_path: str, output_path: str, cancel_event=None, model=None, model_lock=None,
+                       on_start=None, upload=None, camera=None):
+    """
+    Blocking: loads the model and runs the staged pipeline (call from a worker thread).
+    Without output_path nothing is encoded and the per-frame tracks are recorded instead.
+    camera: CameraConfig with the region of interest and inference size (video_cameras.py).
+    """
+    pipeline = VideoPipeline(model or get_yolo_model(), file_path, output_path,
+                             cancel_event=cancel_event, model_lock=model_lock, upload=upload,
+                             record_tracks=output_path is None,
+                             roi=camera.roi if camera else None, imgsz=camera.imgsz if camera else None)
+    if on_start is not None:
+        on_start(pipeline)  # lets callers follow progress
+    stats = pipeline.run()
+    return pipeline, stats
+
+def output_paths_for(filename: str, mode: str = "annotate"):
+    """(video path, track file path or None) of an upload's result, served under /static/videos."""
+    if mode == "overlay":
+        video_path = os.path.join("static", "videos", filename)
+        return video_path, f"{video_path}.tracks.json"
+    return os.path.join("static", "videos", f"processed_{filename}"), None
+
+def write_tracks(pipeline, tracks_path):
+    with open(tracks_path, "w") as f:
+        json.dump(pipeline.track_document(), f, separators=(",", ":"))
+
+class VehicleEventFlusher:
+    """Writes the new rows of a pipeline's DetectionBuffer to vehicle_events, one per video second."""
+    def __init__(self, filename, start_time=None):
+        self.filename = filename
+        # We start "timestamp" at now, and increment by video time
+        self.start_time = start_time or datetime.now()
+        self.writer = vehicle_event_writer()
+        self.cursor = 0  # buffer rows already handled
+
+    async def flush(self, pipeline):
+        events = pipeline.events
+        if pipeline.fps is None or len(events) == self.cursor:
+            return 0
+        frame_index, class_id, conf = events.columns(self.cursor)
+        self.cursor += len(frame_index)
+        sampled = frame_index % max(1, int(pipeline.fps)) == 0
+        if not sampled.any():
+            return 0
+        df = pd.DataFrame({
+            "timestamp": self.start_time + pd.to_timedelta(frame_index[sampled] / pipeline.fps, unit="s"),
+            "video_source": self.filename,
+            "class_name": pd.Series(class_id[sampled]).map(dict(enumerate(events.classes))),
+            "confidence": conf[sampled].astype(float),
+            "event_type": "detection",
+        })
+        return await self.writer.write(df)
+
+async def delete_events(filename: str):
+    """Removes the vehicle_events of a video (partly written by a cancelled or interrupted run)."""
+    async with AsyncSessionLocal() as session:
+        async with session.begin():
+            await session.execute(text("DELETE FROM vehicle_events WHERE video_source = :source"),
+                                  {"source": filename})
+
+async def process_video_file(file_path: str, filename: str, cancel_event=None, model=None, model_lock=None,
+                             on_start=None, upload=None, mode="annotate", camera=None, replace_events=False):
     """
-    Background Task: Process video -> YOLO detection -> Draw Boxes -> Save to Static -> DB Insert
+    Process video -> YOLO detection -> Draw Boxes -> Save to Static -> DB Insert
+    Decoding, inference and encoding run in their own threads (see video_pipeline.py),
+    so the event loop stays free while a video is processed.
+    mode 'overlay' skips drawing/encoding: the original is moved to static with a track file.
+    upload: the UploadSession of a file still being received (processing follows the upload).
+    camera: CameraConfig (region of interest, inference size) of the camera that recorded the video.
+    replace_events: drop this video's events from an earlier, interrupted run first.
+    Returns the pipeline stats; failures and cancellation (PipelineCancelled) are raised.
     """
-    print(f"Starting processing for {filename}...")
+    print(f"Starting processing for {filename} ({mode})...")
     print(f"File path: {os.path.abspath(file_path)}")
     
-    output_filename = f"processed_{filename}"
-    output_dir = "static/videos"
-    os.makedirs(output_dir, exist_ok=True)
-    output_path = os.path.join(output_dir, output_filename)
+    output_path, tracks_path = output_paths_for(filename, mode)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
     
+    keep_input = False
+    flusher = VehicleEventFlusher(filename)
+    started = {}
+
+    def pipeline_started(pipeline):
+        started["pipeline"] = pipeline
+        if on_start is not None:
+            on_start(pipeline)
+
+    task = None
     try:
-        model = get_yolo_model()
-        print("Model retrieved.")
-        
-        cap = cv2.VideoCapture(file_path)
-        if not cap.isOpened():
-            print(f"ERROR: Could not open video file: {file_path}")
-            return
-
-        fps = cap.get(cv2.CAP_PROP_FPS) or 30
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        
-        print(f"Video opened. FPS: {fps}, Resolution: {width}x{height}")
-        
-        # Initialize Video Writer
-        # 'avc1' is H.264, widely supported by browsers. 
-        # If this fails in the container, we might need 'vp09' (WebM) or ensure libx264 is present.
-        # But let's try avc1 first as it's standard for .mp4
-        fourcc = cv2.VideoWriter_fourcc(*'avc1')
-        out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
-        
-        frame_interval = int(fps) # Process 1 frame per second for DB events, but write ALL frames for video
-        
-        events_to_save = []
-        frame_count = 0
-        
-        # We start "timestamp" at now, and increment by video time
-        start_time = datetime.now()
-        
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-                
-            frame_count += 1
-            
-            # Run Inference on every frames (or every Nth frame and track?)
-            # For smooth video, we should infer every frame or persist detections.
-            # To save compute, we might infer every 5th frame. 
-            # For this MVP, let's infer every frame to look good.
-            results = model(frame, verbose=False)
-            
-            # Draw Detections
-            if results and results[0].boxes:
-                for box in results[0].boxes:
-                    cls_id = int(box.cls[0])
-                    class_name = model.names[cls_id]
-                    conf = float(box.conf[0])
-                    
-                    if class_name in ['car', 'truck', 'bus', 'motorcycle'] and conf > 0.5:
-                        # Draw Box
-                        x1, y1, x2, y2 = map(int, box.xyxy[0])
-                        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                        label = f"{class_name} {conf:.2f}"
-                        cv2.putText(frame, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-                        
-                        # Only save event to DB once per second
-                        if frame_count % frame_interval == 0:
-                            current_video_time = start_time + timedelta(seconds=frame_count/fps)
-                            events_to_save.append(
-                                VehicleEvent(
-                                    timestamp=current_video_time,
-                                    video_source=filename,
-                                    class_name=class_name,
-                                    confidence=conf,
-                                    event_type='detection'
-                                )
-                            )
-            
-            # Write annotated frame
-            out.write(frame)
-
-        cap.release()
-        out.release()
-        
-        # Bulk Insert
-        if events_to_save:
-            print(f"Saving {len(events_to_save)} detection events to DB...")
-            async with AsyncSessionLocal() as session:
-                async with session.begin():
-                    session.add_all(events_to_save)
-            print(f"Processing complete. Video saved to {output_path}")
+        if replace_events:
+            await delete_events(filename)
+        task = asyncio.ensure_future(asyncio.to_thread(run_video_pipeline, file_path,
+                                                       output_path if tracks_path is None else None, cancel_event,
+                                                       model, model_lock, pipeline_started, upload, camera))
+        # Write events while the video runs
+        while not task.done():
+            await asyncio.wait({task}, timeout=VIDEO_EVENT_FLUSH_SECONDS)
+            if not task.done() and "pipeline" in started:
+                await flusher.flush(started["pipeline"])
+        pipeline, stats = task.result()
+        await flusher.flush(pipeline)
+        stats["mode"] = mode
+        stats["camera"] = camera.camera_id if camera else None
+        stats["events"] = flusher.writer.stats()
+        print(f"Pipeline finished: {stats['frames']} frames in {stats['seconds']}s ({stats['fps']} fps), "
+              f"YOLO on {stats['inferred_frames']} frames (motion-gated: {stats['motion_gated_frames']}). "
+              f"Stages: {stats['stages']}")
+        if tracks_path is not None:
+            # Serve the original next to its tracks instead of an annotated copy
+            await asyncio.to_thread(write_tracks, pipeline, tracks_path)
+            await asyncio.to_thread(shutil.move, file_path, output_path)
+
+        if flusher.writer.rows:
+            print(f"Saved {flusher.writer.rows} detection events to DB "
+                  f"({flusher.writer.copy_batches} COPY batches). Video saved to {output_path}")
         else:
             print(f"No vehicles detected in {filename}. Video saved anyway.")
-            
+        return stats
+
+    except PipelineCancelled:
+        print(f"Processing of {filename} cancelled.")
+        if tracks_path is None and os.path.exists(output_path):
+            os.remove(output_path)
+        if flusher.writer.rows:
+            await delete_events(filename)
+        raise
+    except asyncio.CancelledError:
+        # Server shutdown: keep the input so the job can be picked up again on restart
+        keep_input = True
+        if task is not None:
+            task.cancel()
+        raise
     except Exception as e:
         print(f"Error processing video {filename}: {e}")
+        if task is not None and not task.done() and "pipeline" in started:
+            started["pipeline"].cancel_event.set()  # e.g. an event flush failed: stop the pipeline too
+        raise
     finally:
         # Cleanup input temp file
-        if os.path.exists(file_path):
+        if not keep_input and os.path.exists(file_path):
             os.remove(file_path)
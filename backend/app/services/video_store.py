@@ -0,0 +1,155 @@
+import os
+import json
+import time
+import threading
+
+import numpy as np
+
+# --- Content-Addressed Video Result Store ---
+#
+# Processed results are kept under the sha256 of the uploaded video (plus the
+# processing mode and camera settings, see store_key()):
+#   static/videos/cas/<key>.mp4              annotated output, or the original in overlay mode
+#   static/videos/cas/<key>.mp4.tracks.json  per-frame tracks (overlay mode)
+#   static/videos/cas/<key>.json             stats and detection summary
+# served by the /static mount. An upload whose hash is already stored is
+# answered from here without running YOLO. An entry's files are touched on every
+# hit, and the least recently used entries are evicted once the store grows past
+# VIDEO_CACHE_MAX_MB. Jobs pointing at an evicted entry are told through on_evict
+# (video_jobs marks them expired). Status reads use peek(), which is not a use.
+
+VIDEO_STORE_DIR = os.path.join("static", "videos", "cas")
+VIDEO_STORE_URL = "/static/videos/cas"
+VIDEO_CACHE_MAX_MB = float(os.getenv("VIDEO_CACHE_MAX_MB", "2048"))
+
+
+def store_key(digest, mode="annotate", variant=None):
+    """
+    Entries of one video processed in different modes, or with different camera
+    settings (variant: CameraConfig.fingerprint), are stored side by side.
+    """
+    parts = [os.path.basename(digest.lower())]
+    if mode != "annotate":
+        parts.append(mode)
+    if variant:
+        parts.append(variant)
+    return "-".join(parts)
+
+
+def summarize_detections(events, fps):
+    """Per-class counts and one sample per video second of a pipeline's DetectionBuffer."""
+    fps = fps or 30
+    frame_interval = max(1, int(fps))
+    frame_index, class_id, conf = events.columns()
+    counts = np.bincount(class_id, minlength=len(events.classes)) if len(class_id) else []
+    sampled = frame_index % frame_interval == 0
+    return {
+        "counts": {name: int(n) for name, n in zip(events.classes, counts) if n},
+        "events": [[round(i / fps, 3), events.classes[c], round(p, 3)] for i, c, p
+                   in zip(frame_index[sampled].tolist(), class_id[sampled].tolist(), conf[sampled].tolist())],
+    }
+
+
+class VideoResultStore:
+    def __init__(self, root=VIDEO_STORE_DIR, url=VIDEO_STORE_URL, max_bytes=VIDEO_CACHE_MAX_MB * 2**20):
+        self.root = root
+        self.url = url
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.on_evict = None  # called with the key of every evicted entry (from the evicting thread)
+        self._lock = threading.Lock()  # put/evict from worker threads
+
+    def _files(self, key):
+        """All files of one entry (everything named <key>.*)."""
+        if not os.path.isdir(self.root):
+            return []
+        return [e.path for e in os.scandir(self.root) if e.name.split(".", 1)[0] == key]
+
+    def get(self, key):
+        """
+        Stored result for a store_key() (with 'output_video_url' and, in overlay mode, 'tracks_url'),
+        or None. Counts as a use for LRU.
+        """
+        result = self._read(key)
+        if result is None:
+            self.misses += 1
+            return None
+        now = time.time()
+        try:
+            for path in self._files(key):
+                os.utime(path, (now, now))
+        except OSError:
+            pass  # evicted meanwhile; the caller still got a complete result
+        self.hits += 1
+        return result
+
+    def peek(self, key):
+        """Like get(), but neither a use for LRU nor counted as a hit or miss (status reads)."""
+        return self._read(key)
+
+    def _read(self, key):
+        if not key:
+            return None
+        try:
+            with open(os.path.join(self.root, f"{key}.json")) as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            return None
+        result["output_video_url"] = f"{self.url}/{result.get('video', key + '.mp4')}"
+        result["tracks_url"] = f"{self.url}/{result['tracks']}" if result.get("tracks") else None
+        return result
+
+    def put(self, key, output_path, result, tracks_path=None):
+        """
+        Moves a processed video (and its track file) into the store with its result dict.
+        Returns the stored video's URL.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        video_name = key + os.path.splitext(output_path)[1]
+        tracks_name = f"{video_name}.tracks.json" if tracks_path else None
+        meta_path = os.path.join(self.root, f"{key}.json")
+        with self._lock:
+            os.replace(output_path, os.path.join(self.root, video_name))
+            if tracks_path:
+                os.replace(tracks_path, os.path.join(self.root, tracks_name))
+            tmp_path = meta_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"key": key, "stored_at": time.time(), "video": video_name, "tracks": tracks_name,
+                           **result}, f)
+            os.replace(tmp_path, meta_path)  # a result is visible only once complete
+            self._evict(keep=key)
+        return f"{self.url}/{video_name}"
+
+    def _evict(self, keep=None):
+        entries = {}  # key -> (last use, bytes)
+        for entry in os.scandir(self.root):
+            key = entry.name.split(".", 1)[0]
+            st = entry.stat()
+            last_use, size = entries.get(key, (0, 0))
+            entries[key] = (max(last_use, st.st_mtime), size + st.st_size)
+        total = sum(size for _, size in entries.values())
+        for key, (_, size) in sorted(entries.items(), key=lambda kv: kv[1][0]):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            for path in self._files(key):
+                os.remove(path)
+            total -= size
+            print(f"Video store: evicted {key[:12]} ({size / 2**20:.1f} MB)")
+            if self.on_evict is not None:
+                self.on_evict(key)
+
+    def stats(self):
+        files = [e for e in os.scandir(self.root)] if os.path.isdir(self.root) else []
+        return {
+            "entries": sum(1 for e in files if e.name.count(".") == 1 and e.name.endswith(".json")),
+            "bytes": sum(e.stat().st_size for e in files),
+            "max_bytes": int(self.max_bytes),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+video_store = VideoResultStore()
@@ -0,0 +1,111 @@
+import numpy as np
+
+# --- Lightweight Box Tracker ---
+#
+# Associates each detection step's boxes with existing tracks by IoU (greedy,
+# same class) and keeps a per-frame velocity for every track, so boxes can be
+# carried across frames that were not sent through YOLO. No appearance model:
+# this is meant for smooth overlays between detection steps, not re-identification.
+
+
+def iou_matrix(a, b):
+    """Pairwise IoU of (n, 4) and (m, 4) xyxy boxes -> (n, m)."""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)))
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+
+class Track:
+    __slots__ = ("track_id", "box", "velocity", "class_name", "confidence", "frame", "missed")
+
+    def __init__(self, track_id, box, class_name, confidence, frame):
+        self.track_id = track_id
+        self.box = box                  # xyxy float array at `frame`
+        self.velocity = np.zeros(4)     # xyxy change per frame
+        self.class_name = class_name
+        self.confidence = confidence
+        self.frame = frame
+        self.missed = 0                 # detection steps without a match
+
+    def box_at(self, frame_index):
+        return self.box + self.velocity * (frame_index - self.frame)
+
+
+class BoxTracker:
+    def __init__(self, iou_threshold=0.3, max_missed=1, smoothing=0.5):
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed    # detection steps a track survives unmatched
+        self.smoothing = smoothing      # weight of the newest velocity estimate
+        self.tracks = []
+        self._next_id = 1
+
+    def update(self, frame_index, detections):
+        """
+        Folds one detection step into the tracks.
+        detections: [(x1, y1, x2, y2, class_name, confidence)]
+        Returns the detections with their track id appended, in input order.
+        """
+        boxes = np.array([d[:4] for d in detections], dtype=float).reshape(-1, 4)
+        predicted = np.array([t.box_at(frame_index) for t in self.tracks]).reshape(-1, 4)
+        ious = iou_matrix(predicted, boxes)
+
+        track_for = [None] * len(detections)
+        used_tracks = set()
+        # Greedy assignment, best overlaps first
+        for t, d in zip(*np.unravel_index(np.argsort(-ious, axis=None), ious.shape)):
+            if ious[t, d] < self.iou_threshold:
+                break
+            if t in used_tracks or track_for[d] is not None:
+                continue
+            if self.tracks[t].class_name != detections[d][4]:
+                continue
+            used_tracks.add(t)
+            track_for[d] = t
+
+        survivors = []
+        for t, track in enumerate(self.tracks):
+            if t not in used_tracks:
+                track.missed += 1
+                if track.missed <= self.max_missed:
+                    survivors.append(track)
+
+        tracked = []
+        for d, det in enumerate(detections):
+            t = track_for[d]
+            if t is None:
+                track = Track(self._next_id, boxes[d], det[4], det[5], frame_index)
+                self._next_id += 1
+            else:
+                track = self.tracks[t]
+                dt = frame_index - track.frame
+                if dt > 0:
+                    velocity = (boxes[d] - track.box) / dt
+                    track.velocity = self.smoothing * velocity + (1 - self.smoothing) * track.velocity
+                track.box, track.frame, track.missed = boxes[d], frame_index, 0
+                track.class_name, track.confidence = det[4], det[5]
+            survivors.append(track)
+            tracked.append(tuple(det) + (track.track_id,))
+        self.tracks = survivors
+        return tracked
+
+    def predict(self, frame_index, hold=False):
+        """
+        Boxes of the tracks seen at the last detection step, moved to `frame_index`
+        (or left where they were last detected with hold=True, e.g. for a static scene).
+        """
+        out = []
+        for track in self.tracks:
+            if track.missed:
+                continue
+            box = track.box if hold else track.box_at(frame_index)
+            x1, y1, x2, y2 = (int(v) for v in box)
+            out.append((x1, y1, x2, y2, track.class_name, track.confidence, track.track_id))
+        return out
@@ -0,0 +1,265 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import shutil
+import hashlib
+import threading
+
+# --- Streaming & Resumable Video Uploads ---
+#
+# Uploads are written to disk chunk by chunk from the event loop, with the file
+# writes in worker threads, so a large mp4 never blocks other requests.
+#
+# Resumable uploads (for large CCTV exports over unreliable links):
+#   POST /api/video/uploads                     -> upload_id (optionally declare size and sha256)
+#   PUT  /api/video/uploads/{id}?offset=N       -> raw bytes, optional X-Chunk-SHA256 header
+#   GET  /api/video/uploads/{id}                -> bytes received so far: resume from there
+#   POST /api/video/uploads/{id}/complete       -> verifies the whole-file sha256
+# A chunk must start at the current offset and is all-or-nothing: it is staged in
+# <file>.part and appended to the upload file only after the size and checksum
+# checks, so a mismatch or a dropped connection leaves the file untouched (and
+# the pipeline, which reads the file while it grows, never decodes rejected bytes).
+# Session metadata sits next to the data file (<upload_id>.upload.json), so a
+# session can be resumed after a server restart.
+#
+# Both paths hash the file as it arrives (sha256), which is the key for reusing
+# earlier results (video_store.py).
+#
+# UploadSession also lets the video pipeline read the file while it grows:
+# received/complete plus wait_for_data() (called from the decoder thread).
+
+UPLOAD_DIR = "temp_uploads"
+UPLOAD_CHUNK_BYTES = 1024 * 1024  # read/write granularity when streaming to disk
+UPLOAD_SESSION_TTL = float(os.getenv("UPLOAD_SESSION_TTL_HOURS", "24")) * 3600  # unfinished sessions expire
+# Start processing once this much of a resumable upload has arrived (streamable containers
+# can be decoded from the start; others wait for the rest of the file inside the pipeline)
+VIDEO_STREAM_START_BYTES = int(os.getenv("VIDEO_STREAM_START_BYTES", str(8 * 1024 * 1024)))
+
+
+class UploadError(Exception):
+    pass
+
+
+class OffsetMismatch(UploadError):
+    def __init__(self, offset):
+        super().__init__(f"Chunk must start at offset {offset}.")
+        self.offset = offset
+
+
+class ChecksumMismatch(UploadError):
+    pass
+
+
+async def save_upload_file(upload_file, path):
+    """
+    Streams a FastAPI UploadFile to disk without blocking the event loop, hashing it on the way.
+    Returns (bytes written, sha256 hex digest).
+    """
+    written = 0
+    h = hashlib.sha256()
+    f = await asyncio.to_thread(open, path, "wb")
+    try:
+        while True:
+            chunk = await upload_file.read(UPLOAD_CHUNK_BYTES)
+            if not chunk:
+                break
+            h.update(chunk)
+            await asyncio.to_thread(f.write, chunk)
+            written += len(chunk)
+    finally:
+        await asyncio.to_thread(f.close)
+    return written, h.hexdigest()
+
+
+class UploadSession:
+    def __init__(self, upload_id, original_filename, size=None, sha256=None, created_at=None,
+                 complete=False, job_id=None, mode="annotate", camera_id=None, upload_dir=UPLOAD_DIR):
+        self.upload_id = upload_id
+        self.original_filename = original_filename
+        self.filename = f"{upload_id}_{original_filename}"  # same naming as single-request uploads
+        self.path = os.path.join(upload_dir, self.filename)
+        self.meta_path = os.path.join(upload_dir, f"{upload_id}.upload.json")
+        self.size = size            # declared total size, if the client knows it
+        self.sha256 = sha256        # declared whole-file checksum; the verified content hash once complete
+        self.created_at = created_at or time.time()
+        self.complete = complete
+        self.job_id = job_id
+        self.mode = mode            # processing mode of the job (video_processor.VIDEO_MODES)
+        self.camera_id = camera_id  # camera settings of the job (video_cameras.py)
+        self.received = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        self._hasher = None          # running whole-file hash; rebuilt from disk after a restart
+        self._hashed = 0
+        self._lock = asyncio.Lock()  # one chunk at a time
+        self._cond = threading.Condition()
+
+    def to_dict(self):
+        return {
+            "upload_id": self.upload_id,
+            "filename": self.filename,
+            "original_filename": self.original_filename,
+            "offset": self.received,
+            "size": self.size,
+            "complete": self.complete,
+            "sha256": self.sha256 if self.complete else None,
+            "mode": self.mode,
+            "camera_id": self.camera_id,
+            "job_id": self.job_id,
+        }
+
+    def save_meta(self):
+        meta = {"upload_id": self.upload_id, "original_filename": self.original_filename, "size": self.size,
+                "sha256": self.sha256, "created_at": self.created_at, "complete": self.complete,
+                "job_id": self.job_id, "mode": self.mode, "camera_id": self.camera_id}
+        with open(self.meta_path, "w") as f:
+            json.dump(meta, f)
+
+    # -- growing-file interface for the pipeline decoder (thread-safe) --
+
+    def wait_for_data(self, seen, timeout):
+        """Blocks until more than `seen` bytes arrived or the upload completed. False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.received > seen or self.complete, timeout)
+
+    def _notify(self):
+        with self._cond:
+            self._cond.notify_all()
+
+    # -- writes (event loop) --
+
+    async def write_chunk(self, offset, stream, sha256=None):
+        """Appends one chunk read from an async byte stream at `offset`. Returns the new offset."""
+        async with self._lock:
+            if self.complete:
+                raise UploadError("Upload is already complete.")
+            if offset != self.received:
+                raise OffsetMismatch(self.received)
+            if self.received and not os.path.exists(self.path):
+                raise UploadError("Upload file is gone (processing was cancelled or failed).")
+            if self._hasher is None or self._hashed != self.received:
+                self._hasher = await asyncio.to_thread(self._hash_file)
+                self._hashed = self.received
+
+            # The chunk is staged in its own file and appended only once verified: the pipeline
+            # may be decoding the upload file meanwhile and must never see rejected bytes
+            chunk_hash = hashlib.sha256()
+            file_hash = self._hasher.copy()
+            written = 0
+            part_path = self.path + ".part"
+            part = await asyncio.to_thread(open, part_path, "w+b")
+            try:
+                async for piece in stream:
+                    if self.size is not None and offset + written + len(piece) > self.size:
+                        raise UploadError(f"Chunk goes past the declared size of {self.size} bytes.")
+                    chunk_hash.update(piece)
+                    file_hash.update(piece)
+                    await asyncio.to_thread(part.write, piece)
+                    written += len(piece)
+                if sha256 and chunk_hash.hexdigest() != sha256.lower():
+                    raise ChecksumMismatch("Chunk checksum mismatch.")
+                await asyncio.to_thread(self._append, part, offset)
+            finally:
+                await asyncio.to_thread(part.close)
+                await asyncio.to_thread(os.remove, part_path)
+
+            self._hasher, self._hashed = file_hash, offset + written
+            self.received = offset + written
+            self._notify()
+            return self.received
+
+    async def finish(self, sha256=None):
+        """Marks the upload complete after checking the size and whole-file checksum."""
+        async with self._lock:
+            if self.complete:
+                return self
+            if self.size is not None and self.received != self.size:
+                raise UploadError(f"Received {self.received} of {self.size} bytes.")
+            if self._hasher is None or self._hashed != self.received:
+                self._hasher = await asyncio.to_thread(self._hash_file)
+                self._hashed = self.received
+            expected = (sha256 or self.sha256 or "").lower()
+            if expected and self._hasher.hexdigest() != expected:
+                raise ChecksumMismatch("File checksum mismatch: re-upload the file.")
+            self.sha256 = self._hasher.hexdigest()
+            self.complete = True
+            await asyncio.to_thread(self.save_meta)
+            self._notify()
+            return self
+
+    def _append(self, part, offset):
+        """Appends a verified chunk file at `offset` (all-or-nothing: cut back on failure)."""
+        part.seek(0)
+        with open(self.path, "r+b" if os.path.exists(self.path) else "wb") as f:
+            f.seek(offset)
+            try:
+                shutil.copyfileobj(part, f, UPLOAD_CHUNK_BYTES)
+                f.flush()
+            except BaseException:
+                f.truncate(offset)
+                raise
+
+    def _hash_file(self):
+        h = hashlib.sha256()
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                for block in iter(lambda: f.read(UPLOAD_CHUNK_BYTES), b""):
+                    h.update(block)
+        return h
+
+
+class ResumableUploads:
+    def __init__(self, upload_dir=UPLOAD_DIR, ttl=UPLOAD_SESSION_TTL):
+        self.upload_dir = upload_dir
+        self.ttl = ttl
+        self._sessions = {}
+
+    async def create(self, original_filename, size=None, sha256=None, mode="annotate", camera_id=None):
+        await asyncio.to_thread(self.purge_expired)
+        session = UploadSession(str(uuid.uuid4()), os.path.basename(original_filename), size=size,
+                                sha256=sha256.lower() if sha256 else None, mode=mode, camera_id=camera_id,
+                                upload_dir=self.upload_dir)
+        await asyncio.to_thread(session.save_meta)
+        self._sessions[session.upload_id] = session
+        return session
+
+    def get(self, upload_id):
+        """Session by id: from memory, or reloaded from its metadata file after a restart."""
+        session = self._sessions.get(upload_id)
+        if session is not None:
+            return session
+        meta_path = os.path.join(self.upload_dir, f"{os.path.basename(upload_id)}.upload.json")
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        session = UploadSession(upload_dir=self.upload_dir, **meta)
+        self._sessions[upload_id] = session
+        return session
+
+    def for_filename(self, filename):
+        """The resumable session a stored upload belongs to (filenames start with the upload id)."""
+        return self.get(filename.split("_", 1)[0])
+
+    def discard(self, session):
+        self._sessions.pop(session.upload_id, None)
+        for path in (session.path, session.path + ".part", session.meta_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def purge_expired(self):
+        now = time.time()
+        for name in os.listdir(self.upload_dir):
+            if not name.endswith(".upload.json"):
+                continue
+            session = self.get(name[:-len(".upload.json")])
+            if session is None:
+                continue
+            if session.complete and not os.path.exists(session.path):
+                self.discard(session)  # processed (the pipeline removes its input)
+            elif not session.complete and now - session.created_at > self.ttl:
+                print(f"Upload {session.upload_id} expired.")
+                self.discard(session)
+
+
+video_uploads = ResumableUploads()
@@ -0,0 +1,231 @@
+# Benchmark suite for the dashboard, analytics, recommendation and forecast engines.
+# Usage (from backend/):
+#   python benchmarks/run_benchmarks.py                      # compare against baselines.json
+#   python benchmarks/run_benchmarks.py --save               # record new baselines
+#   python benchmarks/run_benchmarks.py --sizes 30x5 365x50 --cases feature_engineer_process
+# Data is DataGenerator output (fixed seed and start date), one dataset per DAYSxSTATIONS size.
+# Each case records the median wall time over --repeat runs and the tracemalloc peak
+# of one extra run. The comparison exits with status 1 if any case is slower than
+# baseline * (1 + --time-threshold) or its peak memory exceeds
+# baseline * (1 + --memory-threshold). Differences under --min-delta-ms / --min-delta-mb
+# are ignored, so millisecond-scale cases do not fail on timer noise.
+# Baselines are machine-specific: re-record them (--save) on the machine that compares.
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from app.models.prediction.demand_prediction_engine import DataGenerator, FeatureEngineer, EnsembleForecaster
+from app.models.dashboard.dashboard_engine import (
+    DataSimulator, RevenueEngine, PerformanceEngine, HeatmapEngine, WeeklyStatsEngine
+)
+from app.models.analytics.analytics_backend import AnalyticsEngine
+from app.models.recommendations.recommendation_engine import RecommendationEngine
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+MODEL_DIR = os.path.join(BACKEND_DIR, "app", "models", "prediction")
+DEFAULT_SIZES = ["30x5", "90x20"]
+SEED = 42
+START_DATE = datetime.datetime(2024, 1, 1)
+
+
+class Dataset:
+    """Raw events of one size plus lazily derived inputs shared by the cases."""
+    def __init__(self, days, stations):
+        self.days = days
+        self.stations = stations
+        self.raw = DataGenerator(start_date=START_DATE, days=days, n_stations=stations, seed=SEED).generate()
+        self._sessions = None
+        self._features = None
+        self._ensemble = None
+
+    @property
+    def sessions(self):
+        if self._sessions is None:
+            self._sessions = DataSimulator(self.raw.copy()).get_charger_level_data()
+        return self._sessions
+
+    @property
+    def features(self):
+        if self._features is None:
+            df_model, df_full, _ = FeatureEngineer().process(self.raw.copy())
+            self._features = (df_model, df_full)
+        return self._features
+
+    @property
+    def ensemble(self):
+        if self._ensemble is None:
+            self._ensemble = EnsembleForecaster(*self.features)
+            self._ensemble.load_or_train(MODEL_DIR)
+        return self._ensemble
+
+
+# name -> (prepare(dataset) -> state, run(state)); prepare is untimed and runs before every repetition,
+# so engines that mutate their input always start from the same frame.
+CASES = {
+    "data_simulator": (
+        lambda d: d.raw.copy(),
+        lambda raw: DataSimulator(raw).get_charger_level_data(),
+    ),
+    "revenue_engine": (
+        lambda d: d.sessions.copy(),
+        lambda sessions: RevenueEngine(sessions).analyze(),
+    ),
+    "performance_engine": (
+        lambda d: d.sessions.copy(),
+        lambda sessions: PerformanceEngine(sessions).get_table(),
+    ),
+    "heatmap_engine": (
+        lambda d: d.raw.copy(),
+        lambda raw: HeatmapEngine(raw).generate(),
+    ),
+    "weekly_stats_engine": (
+        lambda d: d.raw.copy(),
+        lambda raw: WeeklyStatsEngine(raw).generate(),
+    ),
+    "analytics_compute_metrics": (
+        lambda d: AnalyticsEngine(d.raw),
+        lambda engine: [engine.compute_metrics(w) for w in ("24h", "7d", "30d")],
+    ),
+    "feature_engineer_process": (
+        lambda d: d.raw.copy(),
+        lambda raw: FeatureEngineer().process(raw),
+    ),
+    "ensemble_forecast": (
+        lambda d: d.ensemble,
+        lambda ensemble: ensemble.forecast(hours=24 * 7),
+    ),
+    "recommendation_engine": (
+        lambda d: d.sessions.copy(),
+        lambda sessions: RecommendationEngine(sessions).generate_recommendations(),
+    ),
+}
+
+
+def parse_size(size):
+    days, stations = size.lower().split("x")
+    return int(days), int(stations)
+
+
+def measure(prepare, run, dataset, repeat):
+    """Median/min wall time over `repeat` runs, then the tracemalloc peak of one more run."""
+    times = []
+    for _ in range(repeat):
+        state = prepare(dataset)
+        started = time.perf_counter()
+        run(state)
+        times.append(time.perf_counter() - started)
+
+    state = prepare(dataset)
+    tracemalloc.start()
+    try:
+        run(state)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "seconds": round(statistics.median(times), 6),
+        "min_seconds": round(min(times), 6),
+        "peak_mb": round(peak / 2**20, 3),
+        "repeat": repeat,
+    }
+
+
+def machine():
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()}
+
+
+def load_baselines(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(results, baselines, time_threshold, memory_threshold, min_delta_s=0.005, min_delta_mb=0.5):
+    """Prints a comparison table. Returns the list of regressed keys."""
+    regressions = []
+    print(f"\n{'case':<42}{'seconds':>11}{'base':>11}{'delta':>9}{'peak MB':>10}{'base':>10}{'delta':>9}")
+    for key, result in results.items():
+        base = (baselines or {}).get("results", {}).get(key)
+        if base is None:
+            print(f"{key:<42}{result['seconds']:>11.4f}{'-':>11}{'new':>9}{result['peak_mb']:>10.2f}{'-':>10}{'new':>9}")
+            continue
+        dt = result["seconds"] / base["seconds"] - 1 if base["seconds"] else 0.0
+        dm = result["peak_mb"] / base["peak_mb"] - 1 if base["peak_mb"] else 0.0
+        flag = ""
+        if dt > time_threshold and result["seconds"] - base["seconds"] > min_delta_s:
+            flag += " SLOWER"
+        if dm > memory_threshold and result["peak_mb"] - base["peak_mb"] > min_delta_mb:
+            flag += " MEMORY"
+        if flag:
+            regressions.append(key)
+        print(f"{key:<42}{result['seconds']:>11.4f}{base['seconds']:>11.4f}{dt:>+9.1%}"
+              f"{result['peak_mb']:>10.2f}{base['peak_mb']:>10.2f}{dm:>+9.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES, help="DAYSxSTATIONS datasets, e.g. 30x5 90x20")
+    parser.add_argument("--cases", nargs="+", default=list(CASES), choices=list(CASES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="Write the results as the new baselines")
+    parser.add_argument("--time-threshold", type=float, default=0.25, help="Allowed slowdown (0.25 = +25%%)")
+    parser.add_argument("--memory-threshold", type=float, default=0.25, help="Allowed peak memory growth")
+    parser.add_argument("--min-delta-ms", type=float, default=5.0, help="Ignore slowdowns smaller than this")
+    parser.add_argument("--min-delta-mb", type=float, default=0.5, help="Ignore memory growth smaller than this")
+    parser.add_argument("--output", default=None, help="Also write this run's results as JSON")
+    args = parser.parse_args()
+
+    results = {}
+    for size in args.sizes:
+        days, stations = parse_size(size)
+        print(f"Dataset {days}d x {stations} stations...")
+        dataset = Dataset(days, stations)
+        for name in args.cases:
+            prepare, run = CASES[name]
+            key = f"{name}[{days}x{stations}]"
+            results[key] = measure(prepare, run, dataset, args.repeat)
+            print(f"  {key}: {results[key]['seconds']:.4f}s, peak {results[key]['peak_mb']:.2f} MB")
+
+    report = {"created_at": datetime.datetime.now().isoformat(timespec="seconds"), "machine": machine(), "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save:
+        baselines = load_baselines(args.baseline) or {"results": {}}
+        baselines["results"].update(results)
+        baselines.update(created_at=report["created_at"], machine=report["machine"])
+        with open(args.baseline, "w") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"\nSaved {len(results)} baselines to {args.baseline}")
+        return 0
+
+    baselines = load_baselines(args.baseline)
+    if baselines is None:
+        print(f"\nNo baselines at {args.baseline}; run with --save first.")
+        return 0
+    if baselines.get("machine") != report["machine"]:
+        print(f"\nWARNING: baselines were recorded on {baselines.get('machine')}; timings may not be comparable.")
+    regressions = compare(results, baselines, args.time_threshold, args.memory_threshold,
+                          min_delta_s=args.min_delta_ms / 1000, min_delta_mb=args.min_delta_mb)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) past threshold: {', '.join(regressions)}")
+        return 1
+    print("\nNo regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+# Large-scale synthetic ev_events generator (load tests / bootstrapping).
+# Usage: python generate_data.py --days 365 --stations 1000 --seed 42 --out events.parquet
+#        python generate_data.py --days 30 --stations 50 --db     (COPY into ev_events)
+# Output is written chunk by chunk, so memory is bounded by --chunk-days, not by the total size.
+import argparse
+import asyncio
+import datetime
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.models.prediction.demand_prediction_engine import DataGenerator
+
+
+async def write_db(gen):
+    from app.services.bulk_writer import ev_event_writer
+
+    writer = ev_event_writer()
+
+    def utc_chunks():
+        for chunk in gen.iter_chunks():
+            chunk['timestamp'] = chunk['timestamp'].dt.tz_localize('UTC')
+            yield chunk
+
+    await writer.write_frames(utc_chunks())
+    print(f"Bulk writer: {writer.stats()}")
+    return writer.rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--stations", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--chunk-days", type=int, default=7, help="Days of data generated per chunk")
+    parser.add_argument("--start", default=None, help="Start date (YYYY-MM-DD); default: --days before now")
+    parser.add_argument("--out", default=None, help="Output file (.csv or .parquet)")
+    parser.add_argument("--db", action="store_true", help="Write into the ev_events table")
+    args = parser.parse_args()
+
+    if not args.out and not args.db:
+        parser.error("Give --out and/or --db")
+
+    start = datetime.datetime.fromisoformat(args.start) if args.start else None
+    gen = DataGenerator(start_date=start, days=args.days, n_stations=args.stations,
+                        seed=args.seed, chunk_days=args.chunk_days)
+    print(f"Generating {args.days * 24 * args.stations:,} rows "
+          f"({args.days} days x {args.stations} stations, seed={args.seed})...")
+
+    started = time.perf_counter()
+    if args.out:
+        if args.out.endswith(".parquet"):
+            rows = gen.to_parquet(args.out)
+        else:
+            rows = gen.to_csv(args.out)
+        print(f"Wrote {rows:,} rows to {args.out}")
+    if args.db:
+        rows = asyncio.run(write_db(gen))
+        print(f"Wrote {rows:,} rows to ev_events")
+    print(f"Done in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
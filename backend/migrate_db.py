@@ -12,6 +12,19 @@ async def migrate():
         except Exception as e:
             print(f"Migration error (model_predictions): {e}")
 
+        try:
+            await conn.execute(text("ALTER TABLE model_predictions ADD COLUMN IF NOT EXISTS station_id VARCHAR"))
+            await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_model_predictions_station_id ON model_predictions (station_id)"))
+            print("Added 'station_id' column to model_predictions.")
+        except Exception as e:
+            print(f"Migration error (station_id): {e}")
+
+        try:
+            await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_model_predictions_created_at ON model_predictions (created_at)"))
+            print("Indexed model_predictions.created_at.")
+        except Exception as e:
+            print(f"Migration error (created_at index): {e}")
+
         try:
             await conn.execute(text("ALTER TABLE recommendations ADD COLUMN IF NOT EXISTS estimated_monthly_revenue VARCHAR"))
             print("Added 'estimated_monthly_revenue' column to recommendations.")
@@ -24,5 +37,54 @@ async def migrate():
         except Exception as e:
             print(f"Migration error (key_insights): {e}")
 
+        # Forecast runs: one row per run with array columns (replaces per-hour model_predictions rows)
+        try:
+            from app.database import Base
+            from app.models.outputs import ForecastRun
+            await conn.run_sync(Base.metadata.create_all, tables=[ForecastRun.__table__])
+            result = await conn.execute(text("""
+                INSERT INTO forecast_runs (run_id, station_id, model_type, start_time, end_time, horizon,
+                                           ensemble, lower, upper, source, created_at)
+                SELECT run_id, station_id, min(model_type), min(timestamp), max(timestamp), count(*),
+                       array_agg(predicted_value ORDER BY timestamp),
+                       array_agg(coalesce(lower_bound, 0) ORDER BY timestamp),
+                       array_agg(coalesce(upper_bound, 0) ORDER BY timestamp),
+                       coalesce(min(source_file), 'model_predictions'), max(created_at)
+                FROM model_predictions
+                WHERE run_id NOT IN (SELECT run_id FROM forecast_runs WHERE run_id IS NOT NULL)
+                GROUP BY run_id, station_id
+            """))
+            print(f"Copied {result.rowcount} model_predictions runs into forecast_runs.")
+        except Exception as e:
+            print(f"Migration error (forecast_runs): {e}")
+
+        # Persistent video processing queue
+        try:
+            from app.database import Base
+            from app.models.outputs import VideoJob
+            await conn.run_sync(Base.metadata.create_all, tables=[VideoJob.__table__])
+            print("Created 'video_jobs' table.")
+        except Exception as e:
+            print(f"Migration error (video_jobs): {e}")
+
+        try:
+            await conn.execute(text("ALTER TABLE video_jobs ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)"))
+            await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_video_jobs_content_hash ON video_jobs (content_hash)"))
+            print("Added 'content_hash' column to video_jobs.")
+        except Exception as e:
+            print(f"Migration error (content_hash): {e}")
+
+        try:
+            await conn.execute(text("ALTER TABLE video_jobs ADD COLUMN IF NOT EXISTS mode VARCHAR DEFAULT 'annotate'"))
+            print("Added 'mode' column to video_jobs.")
+        except Exception as e:
+            print(f"Migration error (mode): {e}")
+
+        try:
+            await conn.execute(text("ALTER TABLE video_jobs ADD COLUMN IF NOT EXISTS camera_id VARCHAR"))
+            print("Added 'camera_id' column to video_jobs.")
+        except Exception as e:
+            print(f"Migration error (camera_id): {e}")
+
 if __name__ == "__main__":
     asyncio.run(migrate())
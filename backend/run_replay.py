@@ -0,0 +1,227 @@
+# Replay / soak test: streams synthetic ev_events into the database at a
+# compressed rate while simulated dashboard clients poll the read routes.
+# Usage:
+#   python run_replay.py --stations 50 --days 7 --seed 1 --speed 3600 --clients 20
+#   python run_replay.py --csv app/models/prediction/synthetic_data.csv --speed 7200
+# Needs DATABASE_URL and a running API (--base-url). --speed is data seconds per
+# wall second (3600 = one hour of events per second). Replayed timestamps are
+# shifted to start right after the newest event already stored.
+#
+# Reported:
+#   ingest lag      wall time a batch was committed after its scheduled replay time
+#   refresh latency commit -> visible in /api/dashboard/freshness (the cached read path)
+#   read latency    p50/p99 per polled route, plus error counts
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+READ_ROUTES = [
+    "/api/metrics/current",
+    "/api/dashboard/live",
+    "/api/forecast/run",
+    "/api/analytics/occupancy",
+    "/api/chargers",
+]
+FRESHNESS_ROUTE = "/api/dashboard/freshness"
+
+
+def percentiles(values):
+    if not values:
+        return {"count": 0}
+    ms = np.array(values) * 1000
+    return {"count": len(ms), "p50": round(float(np.percentile(ms, 50)), 2),
+            "p99": round(float(np.percentile(ms, 99)), 2), "max": round(float(ms.max()), 2)}
+
+
+def source_frames(args):
+    """Source rows as frames in timestamp order (CSV read in chunks, or DataGenerator chunks)."""
+    if args.csv:
+        for chunk in pd.read_csv(args.csv, chunksize=100_000):
+            chunk['timestamp'] = pd.to_datetime(chunk['timestamp'])
+            yield chunk
+    else:
+        from app.models.prediction.demand_prediction_engine import DataGenerator
+        start = datetime.datetime(2000, 1, 1)  # shifted before writing
+        yield from DataGenerator(start_date=start, days=args.days, n_stations=args.stations,
+                                 seed=args.seed, chunk_days=1).iter_chunks()
+
+
+def hourly_batches(frames):
+    """Frames -> (hour, rows) batches; timestamps are naive or UTC."""
+    for frame in frames:
+        ts = frame['timestamp']
+        if ts.dt.tz is None:
+            frame['timestamp'] = ts.dt.tz_localize('UTC')
+        hours = frame['timestamp'].dt.floor('h')
+        for hour, rows in frame.groupby(hours, sort=True):
+            yield hour, rows
+
+
+async def newest_stored():
+    from sqlalchemy import select, func
+    from app.database import AsyncSessionLocal
+    from app.models.events import EvEvent
+
+    async with AsyncSessionLocal() as session:
+        return (await session.execute(select(func.max(EvEvent.timestamp)))).scalar_one_or_none()
+
+
+class Replay:
+    def __init__(self, args):
+        self.args = args
+        self.ingest_lags = []
+        self.write_times = []
+        self.refresh_latencies = []
+        self.read_latencies = {route: [] for route in args.routes}
+        self.read_errors = {route: 0 for route in args.routes}
+        self.committed = []        # (data timestamp, wall time of commit), in order
+        self.visible_upto = 0      # index into committed already seen through freshness
+        self.rows = 0
+        self.batches = 0
+        self.ingest_done = False
+        self.server_freshness = None
+
+    async def ingest(self):
+        from app.services.bulk_writer import ev_event_writer
+
+        writer = ev_event_writer()
+        stored = await newest_stored()
+        if stored is not None:
+            target = pd.Timestamp(stored).tz_convert('UTC').floor('h') + pd.Timedelta(hours=1)
+        else:
+            target = pd.Timestamp.now(tz='UTC').floor('h')
+
+        shift = None
+        for hour, rows in hourly_batches(source_frames(self.args)):
+            if shift is None:
+                # Clock starts at the first batch (source setup is not ingest lag)
+                t0 = time.perf_counter()
+                shift = target - hour
+                first_hour = hour
+                print(f"Replaying from {target} (shift {shift}) at {self.args.speed:g}x...")
+            due = t0 + (hour - first_hour).total_seconds() / self.args.speed
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            rows = rows.assign(timestamp=rows['timestamp'] + shift)
+            started = time.perf_counter()
+            await writer.write(rows)
+            done = time.perf_counter()
+            self.write_times.append(done - started)
+            self.ingest_lags.append(max(0.0, done - due))
+            self.committed.append((rows['timestamp'].max(), done))
+            self.rows += len(rows)
+            self.batches += 1
+            if self.args.max_seconds and done - t0 > self.args.max_seconds:
+                print("Reached --max-seconds, stopping ingest.")
+                break
+        self.ingest_done = True
+        print(f"Ingest finished: {self.rows:,} rows in {self.batches} hourly batches ({writer.stats()}).")
+
+    async def watch_freshness(self, client):
+        """Polls the freshness route and times commit -> visible for every committed batch."""
+        while True:
+            try:
+                r = await client.get(FRESHNESS_ROUTE)
+                data = r.json()
+                self.server_freshness = data
+                newest = data.get("newest_event")
+                if newest is not None:
+                    newest = pd.Timestamp(newest)
+                    now = time.perf_counter()
+                    while self.visible_upto < len(self.committed) and self.committed[self.visible_upto][0] <= newest:
+                        self.refresh_latencies.append(now - self.committed[self.visible_upto][1])
+                        self.visible_upto += 1
+            except Exception as e:
+                print(f"Freshness poll failed: {e}")
+            if self.ingest_done and self.visible_upto >= len(self.committed):
+                return
+            await asyncio.sleep(self.args.freshness_interval)
+
+    async def client(self, client, i):
+        """One simulated dashboard: polls every read route each poll interval."""
+        await asyncio.sleep(self.args.poll_interval * i / max(1, self.args.clients))  # stagger
+        while not self.ingest_done:
+            for route in self.args.routes:
+                started = time.perf_counter()
+                try:
+                    r = await client.get(route)
+                    ok = r.status_code < 400
+                except Exception:
+                    ok = False
+                if ok:
+                    self.read_latencies[route].append(time.perf_counter() - started)
+                else:
+                    self.read_errors[route] += 1
+            await asyncio.sleep(self.args.poll_interval)
+
+    async def run(self):
+        import httpx
+
+        async with httpx.AsyncClient(base_url=self.args.base_url, timeout=self.args.timeout) as client:
+            ingest = asyncio.create_task(self.ingest())
+            clients = [asyncio.create_task(self.client(client, i)) for i in range(self.args.clients)]
+            watcher = asyncio.create_task(self.watch_freshness(client))
+            await ingest
+            await asyncio.gather(*clients)
+            try:
+                await asyncio.wait_for(watcher, timeout=self.args.grace)
+            except asyncio.TimeoutError:
+                print(f"{len(self.committed) - self.visible_upto} batches not visible after {self.args.grace}s grace.")
+        return self.report()
+
+    def report(self):
+        all_reads = [v for values in self.read_latencies.values() for v in values]
+        return {
+            "rows": self.rows,
+            "batches": self.batches,
+            "speed": self.args.speed,
+            "clients": self.args.clients,
+            "ingest_lag_ms": percentiles(self.ingest_lags),
+            "write_ms": percentiles(self.write_times),
+            "cache_refresh_latency_ms": dict(percentiles(self.refresh_latencies),
+                                             not_visible=len(self.committed) - self.visible_upto),
+            "read_latency_ms": dict(percentiles(all_reads), errors=sum(self.read_errors.values())),
+            "read_latency_by_route_ms": {route: dict(percentiles(values), errors=self.read_errors[route])
+                                         for route, values in self.read_latencies.items()},
+            "server_freshness": self.server_freshness,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--csv", default=None, help="Replay an existing CSV instead of generated data")
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--stations", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--speed", type=float, default=3600, help="Data seconds replayed per wall second")
+    parser.add_argument("--clients", type=int, default=10, help="Simulated dashboard clients")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds between a client's polls")
+    parser.add_argument("--freshness-interval", type=float, default=0.25)
+    parser.add_argument("--routes", nargs="+", default=READ_ROUTES)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--grace", type=float, default=60.0, help="Seconds to wait for the last batches to become visible")
+    parser.add_argument("--max-seconds", type=float, default=None, help="Stop ingesting after this many wall seconds")
+    parser.add_argument("--report", default=None, help="Also write the report as JSON to this path")
+    args = parser.parse_args()
+
+    report = asyncio.run(Replay(args).run())
+    print(json.dumps(report, indent=2, default=str))
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,106 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Upload, Video, CheckCircle, AlertCircle, Loader } from 'lucide-react';
 
+const POLL_INTERVAL_MS = 1500;
+const BOX_COLOR = '#22c55e';
+const ROI_COLOR = '#0080ff';
+
+// Draws the boxes of the frame currently shown by `video` onto `canvas`.
+// tracks: backend track file ({fps, width, height, classes, frames: [[index, [[x1, y1, x2, y2, cls, conf, id]]]]}),
+// frame indices are 1-based. The video is letterboxed (object-contain), so boxes are scaled the same way.
+const drawBoxes = (canvas, video, tracks, boxesByFrame) => {
+    const ctx = canvas.getContext('2d');
+    const w = video.clientWidth;
+    const h = video.clientHeight;
+    if (canvas.width !== w || canvas.height !== h) {
+        canvas.width = w;
+        canvas.height = h;
+    }
+    ctx.clearRect(0, 0, w, h);
+    if (!tracks.width || !tracks.height) return;
+
+    const scale = Math.min(w / tracks.width, h / tracks.height);
+    const offsetX = (w - tracks.width * scale) / 2;
+    const offsetY = (h - tracks.height * scale) / 2;
+    const frameIndex = Math.floor(video.currentTime * (tracks.fps || 30)) + 1;
+    const boxes = boxesByFrame.get(frameIndex) || [];
+
+    // Region the camera's detections are limited to
+    if (tracks.roi) {
+        const [rx1, ry1, rx2, ry2] = tracks.roi;
+        ctx.lineWidth = 1;
+        ctx.strokeStyle = ROI_COLOR;
+        ctx.setLineDash([6, 4]);
+        ctx.strokeRect(offsetX + rx1 * scale, offsetY + ry1 * scale, (rx2 - rx1) * scale, (ry2 - ry1) * scale);
+        ctx.setLineDash([]);
+    }
+
+    ctx.lineWidth = 2;
+    ctx.strokeStyle = BOX_COLOR;
+    ctx.fillStyle = BOX_COLOR;
+    ctx.font = '12px sans-serif';
+    for (const [x1, y1, x2, y2, cls, conf, trackId] of boxes) {
+        const x = offsetX + x1 * scale;
+        const y = offsetY + y1 * scale;
+        ctx.strokeRect(x, y, (x2 - x1) * scale, (y2 - y1) * scale);
+        ctx.fillText(`${tracks.classes[cls]} ${conf.toFixed(2)} #${trackId}`, x, Math.max(12, y - 4));
+    }
+};
+
 const VideoAnalysis = () => {
     const [file, setFile] = useState(null);
     const [uploading, setUploading] = useState(false);
     const [processing, setProcessing] = useState(false);
+    const [progress, setProgress] = useState(null);
     const [resultUrl, setResultUrl] = useState(null);
+    const [tracks, setTracks] = useState(null);
+    const [burnIn, setBurnIn] = useState(false);
     const [error, setError] = useState(null);
+    const videoRef = useRef(null);
+    const canvasRef = useRef(null);
+    const pollRef = useRef(null);
 
     const handleFileChange = (e) => {
         if (e.target.files) {
             setFile(e.target.files[0]);
             setError(null);
             setResultUrl(null);
+            setTracks(null);
+        }
+    };
+
+    useEffect(() => () => clearTimeout(pollRef.current), []);
+
+    const finish = async (status) => {
+        if (status.state !== 'done') {
+            setError(status.error ? `Processing failed: ${status.error}` : `Processing ${status.state}.`);
+            return;
+        }
+        // Overlay mode: the original video plus a track file drawn client-side
+        if (status.tracks_url) {
+            const response = await fetch(status.tracks_url);
+            if (response.ok) setTracks(await response.json());
         }
+        setResultUrl(status.output_video_url);
+    };
+
+    const pollStatus = async (statusUrl) => {
+        try {
+            const response = await fetch(statusUrl);
+            if (!response.ok) throw new Error('Status request failed');
+            const status = await response.json();
+            if (status.state === 'queued' || status.state === 'running') {
+                setProgress(status.progress);
+                pollRef.current = setTimeout(() => pollStatus(statusUrl), POLL_INTERVAL_MS);
+                return;
+            }
+            await finish(status);
+        } catch (err) {
+            console.error(err);
+            setError('Lost track of the processing job. Please try again.');
+        }
+        setProcessing(false);
+        setUploading(false);
     };
 
     const handleUpload = async () => {
@@ -29,38 +116,68 @@ const VideoAnalysis = () => {
             // Use config or relative path if proxy is working
             // Ideally use the api service, but direct fetch for multipart is often easier
             // Assuming Vite proxy forwards /api to backend
-            const response = await fetch('/api/video/upload', {
+            const mode = burnIn ? 'annotate' : 'overlay';
+            const response = await fetch(`/api/video/upload?mode=${mode}`, {
                 method: 'POST',
                 body: formData,
             });
 
             if (!response.ok) {
-                throw new Error('Upload failed');
+                throw new Error(response.status === 503 ? 'Processing queue is full' : 'Upload failed');
             }
 
             const data = await response.json();
             console.log('Upload success:', data);
 
-            // Backend returns output_video_url immediately, but processing is async background
-            // For UX, we show "Processing" for a few seconds then show the video
-            // In a real app we'd poll status. Here we set URL but maybe wait to load it.
-            setProcessing(true);
-            setResultUrl(data.output_video_url);
-
-            // Simulate waiting for processing (since we don't have real polling yet)
-            // The video won't support range requests until it's written, so loading it immediately might 404
-            setTimeout(() => {
-                setProcessing(false);
+            // Already processed videos come back done (cached); otherwise poll the job
+            if (data.status === 'done') {
+                await finish({ ...data, state: 'done' });
                 setUploading(false);
-            }, 5000); // Wait 5s for short demo video
+                return;
+            }
+            setProcessing(true);
+            setProgress(null);
+            pollStatus(data.status_url);
 
         } catch (err) {
             console.error(err);
-            setError('Failed to upload video. Please try again.');
+            setError(`Failed to upload video (${err.message}). Please try again.`);
             setUploading(false);
         }
     };
 
+    // Redraw the overlay on every displayed frame
+    useEffect(() => {
+        const video = videoRef.current;
+        const canvas = canvasRef.current;
+        if (!video || !canvas || !tracks) return;
+
+        const boxesByFrame = new Map(tracks.frames);
+        let handle = null;
+        let stopped = false;
+        const draw = () => drawBoxes(canvas, video, tracks, boxesByFrame);
+        const schedule = () => {
+            if (stopped) return;
+            if (video.requestVideoFrameCallback) {
+                handle = video.requestVideoFrameCallback(() => { draw(); schedule(); });
+            } else {
+                handle = requestAnimationFrame(() => { draw(); schedule(); });
+            }
+        };
+        schedule();
+        video.addEventListener('seeked', draw);
+        video.addEventListener('loadeddata', draw);
+        window.addEventListener('resize', draw);
+        return () => {
+            stopped = true;
+            if (video.cancelVideoFrameCallback) video.cancelVideoFrameCallback(handle);
+            else cancelAnimationFrame(handle);
+            video.removeEventListener('seeked', draw);
+            video.removeEventListener('loadeddata', draw);
+            window.removeEventListener('resize', draw);
+        };
+    }, [tracks, resultUrl]);
+
     return (
         <div className="card">
             <div className="flex items-center justify-between mb-4">
@@ -70,7 +187,8 @@ const VideoAnalysis = () => {
                 </h3>
                 {processing && (
                     <span className="text-sm text-yellow-500 flex items-center gap-1">
-                        <Loader className="w-4 h-4 animate-spin" /> Processing...
+                        <Loader className="w-4 h-4 animate-spin" />
+                        Processing{progress != null ? ` ${Math.round(progress * 100)}%` : '...'}
                     </span>
                 )}
             </div>
@@ -103,13 +221,23 @@ const VideoAnalysis = () => {
 
                 {/* Action Button */}
                 {file && !uploading && !resultUrl && (
-                    <button
-                        onClick={handleUpload}
-                        disabled={uploading}
-                        className="w-full btn-primary flex items-center justify-center gap-2"
-                    >
-                        Start Analysis
-                    </button>
+                    <>
+                        <label className="flex items-center gap-2 text-sm text-slate-400">
+                            <input
+                                type="checkbox"
+                                checked={burnIn}
+                                onChange={(e) => setBurnIn(e.target.checked)}
+                            />
+                            Burn boxes into a new video (slower; default draws them over the original)
+                        </label>
+                        <button
+                            onClick={handleUpload}
+                            disabled={uploading}
+                            className="w-full btn-primary flex items-center justify-center gap-2"
+                        >
+                            Start Analysis
+                        </button>
+                    </>
                 )}
 
                 {/* Error */}
@@ -126,11 +254,18 @@ const VideoAnalysis = () => {
                         <h4 className="text-sm font-semibold mb-2 text-slate-300">Processed Output:</h4>
                         <div className="relative rounded-lg overflow-hidden bg-black aspect-video">
                             <video
+                                ref={videoRef}
                                 src={resultUrl}
                                 controls
-                                className="w-full h-full"
+                                className="w-full h-full object-contain"
                                 onError={(e) => console.error("Video load error", e)}
                             />
+                            {tracks && (
+                                <canvas
+                                    ref={canvasRef}
+                                    className="absolute inset-0 w-full h-full pointer-events-none"
+                                />
+                            )}
                         </div>
                         <p className="text-xs text-slate-500 mt-2 text-center">
                             Vehicle detections highlighted in green. Check Database for events.
@@ -139,7 +274,7 @@ const VideoAnalysis = () => {
                 )}
 
                 {/* Processing State Placeholder */}
-                {resultUrl && processing && (
+                {processing && (
                     <div className="mt-4 animate-pulse">
                         <div className="bg-slate-800 aspect-video rounded-lg flex items-center justify-center">
                             <p className="text-slate-500">Analyzing Frames...</p>